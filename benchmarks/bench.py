@@ -0,0 +1,217 @@
+"""Times the app's core operations on synthetic databases from 1k to 1M tasks.
+
+Everything runs through taskmaster_core, which is what the GUI calls underneath: opening a
+database is initialize_db's work, the list filters are refresh_task_list's, and so on. Each
+operation is repeated and its median kept. The JSON report can be saved as a baseline, and
+later runs are compared against it, failing when an operation got slower.
+
+    python3 benchmarks/bench.py --sizes 1k,10k --save-baseline
+    python3 benchmarks/bench.py --sizes 1k,10k            # compares with the saved baseline
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from taskmaster_core import TaskService, make_task
+from taskmaster_core.search import SEARCH_INDEX_SUFFIX
+from synthetic import CATEGORIES, GENERATOR_VERSION, ensure_database
+
+REPORT_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "taskmaster-bench")
+SEARCH_TYPED = "quarterly report"  # Typed one character at a time for the keystroke benchmark
+SEARCH_WORD = "report"
+BULK_DELETE_SHARE = 0.01
+HOURS = ("9:00 AM - 6:00 PM", "9:00 AM - 12:00 PM", "3:00 PM - 5:00 PM")
+COMPARABLE_SETTINGS = ("engine", "seed", "generator")  # Runs that differ here time different work
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+def measure(fn, repeat, budget_s, setup=None, teardown=None):
+    """Runs fn up to repeat times (fewer once budget_s is used up) and summarizes the timings.
+
+    setup() runs before each timed call and its result is passed to fn; teardown(result of fn)
+    runs after. Neither is timed.
+    """
+    samples = []
+    spent = 0.0
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        value = fn(arg) if setup else fn()
+        elapsed = time.perf_counter() - start
+        if teardown:
+            teardown(value)
+        samples.append(elapsed * 1000)
+        spent += elapsed
+        if spent > budget_s:
+            break
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3),
+            "runs": len(samples)}
+
+def run_size(source_path, count, args, work_dir):
+    """All benchmarks for one database size; mutating ones run last, on a private copy."""
+    journaled = args.engine == "journal"
+    path = os.path.join(work_dir, os.path.basename(source_path))
+    shutil.copyfile(source_path, path)
+    results = {}
+
+    def bench(name, fn, **kwargs):
+        results[name] = measure(fn, args.repeat, args.budget, **kwargs)
+        print(f"  {name:<34} {results[name]['median_ms']:>12.3f} ms  ({results[name]['runs']} runs)", flush=True)
+
+    def open_service(_=None):
+        service = TaskService(path, journaled)
+        service.search  # The app builds the search index while loading too
+        return service
+
+    def drop_search_index():
+        if os.path.exists(path + SEARCH_INDEX_SUFFIX):
+            os.remove(path + SEARCH_INDEX_SUFFIX)
+
+    close = lambda service: service.close()
+    bench("open_cold", open_service, setup=drop_search_index, teardown=close)
+    bench("open", open_service, teardown=close)  # With the search index saved by the last close
+
+    service = open_service()
+    try:
+        category = CATEGORIES[0]
+        for use_category in (False, True):
+            for hide_done in (False, True):
+                for search in (False, True):
+                    name = "list/" + "+".join(
+                        [("category" if use_category else "all")]
+                        + (["hide_done"] if hide_done else []) + (["search"] if search else []))
+                    filters = (category if use_category else "All Categories", hide_done,
+                               SEARCH_WORD if search else "")
+                    bench(name, lambda filters=filters: service.list_tasks(*filters))
+
+        def type_search(_):
+            for end in range(1, len(SEARCH_TYPED) + 1):
+                service.list_tasks(search_text=SEARCH_TYPED[:end])
+
+        # Each run types into an empty search box; every keystroke refreshes the list
+        bench("search_keystrokes", type_search, setup=service.search.invalidate)
+        bench("categories", service.categories)
+        bench("plan_prompt", lambda: service.plan_request(*HOURS, "Claude"))
+        export_path = os.path.join(work_dir, "export.csv")
+        bench("export_csv", lambda: service.export(export_path))
+
+        # Writes include the flush, so they measure what reaching the disk costs
+        def insert():
+            service.add_task(make_task("Benchmark task", "Medium", "Work", False, "2026-01-20"))
+            service.flush()
+
+        def update(doc_id):
+            task = service.tasks.get(doc_id)
+            service.update_task(doc_id, {'status': "Pending" if task.get('status') == "Completed" else "Completed"})
+            service.flush()
+
+        remaining = sorted(service.tasks.doc_ids())
+        bench("insert", insert)
+        bench("update", update, setup=lambda: remaining[len(remaining) // 2])
+
+        delete_count = max(1, int(count * BULK_DELETE_SHARE))
+
+        def next_delete_batch():
+            batch = remaining[-delete_count:]
+            del remaining[-delete_count:]
+            return batch
+
+        def bulk_delete(doc_ids):
+            service.remove_tasks(doc_ids)
+            service.flush()
+
+        bench("bulk_delete", bulk_delete, setup=next_delete_batch)
+    finally:
+        service.close()
+    return results
+
+def compare(report, baseline, threshold, floor_ms):
+    """One row per operation timed in both runs; regressed when slower by more than threshold."""
+    rows = []
+    for size, ops in report["results"].items():
+        for op, result in ops.items():
+            base = baseline.get("results", {}).get(size, {}).get(op)
+            if not base:
+                continue
+            ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+            rows.append({
+                "size": size, "op": op, "baseline_ms": base["median_ms"], "median_ms": result["median_ms"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + threshold and result["median_ms"] - base["median_ms"] > floor_ms,
+            })
+    return rows
+
+def environment(args):
+    return {
+        "python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+        "engine": args.engine, "seed": args.seed, "generator": GENERATOR_VERSION,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TaskMaster's core operations on synthetic databases.")
+    parser.add_argument("--sizes", default="1k,10k,100k,1m", help="task counts, e.g. 1k,10k,100k,1m")
+    parser.add_argument("--engine", choices=("json", "journal", "sqlite"), default="json")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per operation (median is reported)")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="stop repeating an operation after this many seconds (at least one run)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated databases are cached")
+    parser.add_argument("--out", default="bench_report.json", help="JSON report to write")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also save this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--floor-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    report = {"version": REPORT_VERSION, "created": datetime.datetime.now().isoformat(timespec="seconds"),
+              "environment": environment(args), "results": {}}
+    with tempfile.TemporaryDirectory(prefix="taskmaster-bench-") as work_dir:
+        for count in [parse_size(size) for size in args.sizes.split(",")]:
+            print(f"{count} tasks ({args.engine})", flush=True)
+            source = ensure_database(args.data_dir, count, args.seed, "sqlite" if args.engine == "sqlite" else "json")
+            report["results"][str(count)] = run_size(source, count, args, work_dir)
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        base_env = baseline.get("environment", {})
+        mismatched = [key for key in COMPARABLE_SETTINGS if base_env.get(key) != report["environment"][key]]
+        if mismatched:
+            print(f"Not comparing: the baseline used a different {', '.join(mismatched)}.")
+        else:
+            if base_env != report["environment"]:
+                print("Note: the baseline was recorded on a different machine or Python version.")
+            report["baseline"] = {"path": args.baseline, "created": baseline.get("created"),
+                                  "threshold": args.threshold, "floor_ms": args.floor_ms}
+            report["comparison"] = compare(report, baseline, args.threshold, args.floor_ms)
+            regressions = [row for row in report["comparison"] if row["regressed"]]
+            for row in regressions:
+                print(f"REGRESSION {row['size']:>8} {row['op']:<34} {row['baseline_ms']:.3f} -> "
+                      f"{row['median_ms']:.3f} ms (x{row['ratio']})")
+            print(f"{len(report['comparison'])} operation(s) compared, {len(regressions)} regression(s).")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
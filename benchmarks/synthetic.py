@@ -0,0 +1,119 @@
+"""Synthetic task databases for the benchmarks.
+
+The same size and seed always give the same file, so timings are comparable between runs
+and machines. Distributions aim to look like a real, long-lived task list: a few categories
+hold most tasks, most tasks have short or no notes with a long tail of long ones, and
+deadlines spread over the months around the anchor date, with many already done.
+"""
+import datetime
+import json
+import os
+import random
+
+from taskmaster_core.storage import SQLiteStore
+from taskmaster_core.tasks import get_priority
+
+GENERATOR_VERSION = 1  # Bump when the data changes, so cached databases are rebuilt
+ANCHOR_DATE = datetime.date(2026, 1, 15)  # "Today" for deadlines; fixed so files are reproducible
+
+CATEGORIES = ["Work", "Personal", "Errands", "Health", "Finance", "Home", "Learning",
+              "Side Project", "Family", "Travel", "Admin", "Hobbies"]
+CATEGORY_WEIGHTS = [1 / (rank + 1) ** 1.1 for rank in range(len(CATEGORIES))]
+STATUSES = ["Completed", "Pending", "In Progress", "On Hold"]
+STATUS_WEIGHTS = [45, 35, 15, 5]
+IMPACTS = ["High", "Medium", "Low"]
+IMPACT_WEIGHTS = [25, 45, 30]
+URGENT_SHARE = 0.3
+NOTES_EMPTY_SHARE = 0.4
+
+VOCABULARY = (
+    "review report draft send update plan call email meeting budget invoice design fix test "
+    "deploy write read prepare book schedule clean buy pay renew check follow up with team "
+    "client doctor dentist gym groceries taxes insurance car house garden kitchen laundry "
+    "proposal slides notes research outline chapter course lesson homework project launch "
+    "release bug feature roadmap sprint retro standup interview hiring onboarding contract "
+    "quarterly monthly weekly annual goals metrics dashboard backup server database migration "
+    "flight hotel visa passport tickets birthday gift dinner party photos album music guitar "
+    "painting reading list podcast newsletter blog post article documentation api security"
+).split()
+WORD_WEIGHTS = [1 / (rank + 1) ** 0.9 for rank in range(len(VOCABULARY))]
+
+def _words(rng, count):
+    return " ".join(rng.choices(VOCABULARY, WORD_WEIGHTS, k=count))
+
+def _notes(rng):
+    if rng.random() < NOTES_EMPTY_SHARE:
+        return ""
+    # Log-normal length: mostly a sentence or two, occasionally a page
+    length = min(4000, int(rng.lognormvariate(4.2, 1.0)))
+    return _words(rng, max(1, length // 7))[:length]
+
+def make_tasks(count, seed):
+    """Yields (doc_id, record) for count tasks."""
+    rng = random.Random(seed)
+    for doc_id in range(1, count + 1):
+        impact = rng.choices(IMPACTS, IMPACT_WEIGHTS)[0]
+        is_urgent = rng.random() < URGENT_SHARE
+        deadline = ANCHOR_DATE + datetime.timedelta(days=int(rng.gauss(10, 30)))
+        created = deadline - datetime.timedelta(days=rng.randint(0, 60))
+        yield doc_id, {
+            'title': _words(rng, rng.randint(2, 8)).capitalize(),
+            'impact': impact,
+            'category': rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0],
+            'is_urgent': is_urgent,
+            'priority': get_priority(impact, is_urgent),
+            'deadline': deadline.isoformat(),
+            'status': rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+            'notes': _notes(rng),
+            'created_at': created.isoformat(),
+        }
+
+def make_goals(seed):
+    rng = random.Random(seed + 1)
+    return {doc_id: {'category': category, 'goal': _words(rng, 12).capitalize()}
+            for doc_id, category in enumerate(CATEGORIES[:6], start=1)}
+
+def _write_tinydb(path, count, seed):
+    # Written record by record so even a million tasks never sit in memory at once
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"tasks": {')
+        for doc_id, record in make_tasks(count, seed):
+            f.write(('' if doc_id == 1 else ', ') + f'"{doc_id}": ' + json.dumps(record, ensure_ascii=False))
+        f.write('}, "category_goals": ')
+        json.dump({str(doc_id): goal for doc_id, goal in make_goals(seed).items()}, f, ensure_ascii=False)
+        f.write('}')
+
+def _write_sqlite(path, count, seed, chunk=10000):
+    store = SQLiteStore(path)
+    try:
+        tasks = store.table('tasks')
+        batch = {}
+        for doc_id, record in make_tasks(count, seed):
+            batch[doc_id] = record
+            if len(batch) >= chunk:
+                tasks.apply_batch(batch, [])
+                batch = {}
+        tasks.apply_batch(batch, [])
+        store.table('category_goals').apply_batch(make_goals(seed), [])
+    finally:
+        store.close()
+
+def database_path(data_dir, count, seed, engine):
+    ext = ".db" if engine == "sqlite" else ".json"
+    return os.path.join(data_dir, f"tasks_{count}_s{seed}_v{GENERATOR_VERSION}{ext}")
+
+def ensure_database(data_dir, count, seed, engine):
+    """Path of the synthetic database, generating it first if it isn't cached in data_dir yet."""
+    path = database_path(data_dir, count, seed, engine)
+    if os.path.exists(path):
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    tmp_path = path + ".part"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    if engine == "sqlite":
+        _write_sqlite(tmp_path, count, seed)
+    else:
+        _write_tinydb(tmp_path, count, seed)
+    os.replace(tmp_path, path)
+    return path
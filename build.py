@@ -37,6 +37,8 @@ def build_app():
         f'--add-data={cal_path}:tkcalendar',
         f'--add-data={babel_path}:babel',
         f'--icon={ICON_ICNS}',
+        # The AI SDKs are imported lazily, so PyInstaller can't see them on its own
+        '--hidden-import=anthropic',
         '--hidden-import=google.genai',
         '--hidden-import=ollama',
     ]
@@ -54,7 +54,10 @@ def build_app():
         f'--add-data={ctk_path}{sep}customtkinter',
         f'--add-data={cal_path}{sep}tkcalendar',
         f'--add-data={babel_path}{sep}babel',
+        # The AI SDKs are imported lazily, so PyInstaller can't see them on its own
+        '--hidden-import=anthropic',
         '--hidden-import=google.genai',
+        '--hidden-import=ollama',
     ]
 
     if has_icon:
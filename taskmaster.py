@@ -1,35 +1,66 @@
+import time
+_STARTUP_T0 = time.perf_counter()
+import importlib
+import sys
+
+# With a command (taskmaster.py list, add, ...) run the command line tool instead of the app,
+# before anything imports Tk. macOS may pass a -psn_ process id to app bundles; that isn't one.
+if __name__ == "__main__" and len(sys.argv) > 1 and not sys.argv[1].startswith("-psn_"):
+    from taskmaster_core.cli import main
+    sys.exit(main())
+
+# Startup timings (ms), written to startup_report.jsonl once the first database load finishes
+STARTUP_TIMINGS = {}
+
+def _timed_import(name):
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    STARTUP_TIMINGS[f"import {name}"] = round((time.perf_counter() - start) * 1000, 1)
+    return module
+
+# Import the heavy dependencies one at a time first so each gets its own line in the report
+for _module_name in ("customtkinter", "tinydb", "tkcalendar"):
+    _timed_import(_module_name)
+
 import customtkinter as ctk 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from tinydb import TinyDB, Query
 from tkcalendar import Calendar 
 import datetime
 import os
 import json
-import sys
+import re
+import zlib
 import platform
 import csv
 import threading
-import anthropic
-from google import genai
-from google.genai import types as genai_types
-import ollama
+import contextlib
+import hashlib
+import queue
+import random
+import concurrent.futures
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+# Everything that doesn't need a window lives in the taskmaster_core package; this file is the GUI
+from taskmaster_core import TaskService
+from taskmaster_core.config import USER_DATA_DIR, CONFIG_FILE
+from taskmaster_core.planning import (PLAN_SYSTEM_PROMPT, estimate_tokens, estimate_request_tokens,
+                                      fit_messages_to_budget, smallest_budget_provider, truncate_text)
+from taskmaster_core.storage import (describe_engine, is_sqlite_path, migrate_tinydb_to_sqlite,
+                                     read_database_snapshot, diff_table, read_json_file)
+from taskmaster_core.tasks import DEFAULT_IMPACT, TASK_IMPACTS, TASK_STATUSES, PRIORITY_ORDER, make_task
+from taskmaster_core.transfer import write_task_export, format_import_plan
+
+STARTUP_TIMINGS["imports done"] = round((time.perf_counter() - _STARTUP_T0) * 1000, 1)
 
 # --- 1. PATH CONFIGURATION ---
-APP_NAME = "TaskMaster"
-
-if platform.system() == "Darwin":
-    USER_DATA_DIR = os.path.join(os.path.expanduser("~"), "Library", "Application Support", APP_NAME)
-elif platform.system() == "Windows":
-    USER_DATA_DIR = os.path.join(os.getenv("APPDATA"), APP_NAME)
-else:
-    USER_DATA_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", APP_NAME)
-
+# APP_NAME, USER_DATA_DIR and CONFIG_FILE come from taskmaster_core.config
 if not os.path.exists(USER_DATA_DIR):
     os.makedirs(USER_DATA_DIR)
 
-CONFIG_FILE = os.path.join(USER_DATA_DIR, 'todo_config.json')
-
 # --- 2. UI CONFIGURATION ---
 ctk.set_appearance_mode("Dark") 
 ctk.set_default_color_theme("blue") 
@@ -42,6 +73,7 @@ FONT_ICON = ("SF Pro Display", 18, "bold")
 FONT_TIMER = ("SF Pro Display", 60, "bold") 
 
 # Global Vars
+task_service = None  # The open database; db and the tables below are its parts
 db = None
 tasks_table = None
 checked_task_ids = set()
@@ -51,7 +83,11 @@ hide_completed_var = None
 search_var = None
 CURRENT_DB_PATH = None
 _last_db_mtime = None
-DB_POLL_INTERVAL_MS = 30000  # 30 seconds
+DB_POLL_INTERVAL_MS = 30000  # 30 seconds, slowest poll when watchdog isn't installed
+DB_POLL_MIN_INTERVAL_MS = 1000
+DB_WATCH_DEBOUNCE_MS = 250
+JSON_JOURNAL_ENABLED = False
+FLUSH_LATENCY_MS = 2000  # Longest a change may wait in memory before it is written
 ANTHROPIC_API_KEY = None
 GEMINI_API_KEY = None
 AI_PROVIDER = "Claude"  # "Claude", "Gemini", or "Ollama"
@@ -59,7 +95,16 @@ OLLAMA_MODEL = "llama3.1:8b"
 WORKING_HOURS = "9:00 AM - 6:00 PM"
 PEAK_HOURS = "9:00 AM - 12:00 PM"
 WIND_DOWN_HOURS = "3:00 PM - 5:00 PM"
+AI_FASTEST_AVAILABLE = False  # Race the configured providers instead of using only AI_PROVIDER
+HEDGE_DELAY_MS = 4000  # How long the primary provider gets before the next one is asked too
+PLAN_ARCHIVE_AFTER_DAYS = 30  # Plan chats older than this are packed into monthly archives
+PLAN_CHATS_MAX_MB = 200  # Cap on plan chat history; the oldest sessions are deleted first
+PLAN_CACHE_TTL_HOURS = 12  # How long an unchanged Plan My Day request reuses its last plan (0 = off)
 goals_table = None
+SEARCH_DEBOUNCE_MS = 150
+VIRTUAL_LIST_THRESHOLD = 2000  # Row count at which the task list switches to virtual mode
+VIRTUAL_OVERSCAN = 5
+LIST_STREAM_CHUNK = 100  # Rows inserted per frame while the list first fills in
 
 # --- 3. HELPER FUNCTIONS ---
 
@@ -129,41 +174,194 @@ def toggle_theme():
     ctk.set_appearance_mode(new_mode)
     apply_tree_theme(new_mode)
 
-def export_to_csv():
+class ExportProgressWindow(ctk.CTkToplevel):
+    """Non-modal progress dialog for an export running on a worker thread."""
+    def __init__(self, parent, table, doc_ids, file_path, fmt):
+        super().__init__(parent)
+        self.title("Exporting...")
+        center_window_to_parent(self, 380, 170)
+        self.total = len(doc_ids)
+        self.progress_count = 0
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.cancel_event = threading.Event()
+
+        self.lbl_status = ctk.CTkLabel(self, text=f"Exporting {self.total} task(s) to {os.path.basename(file_path)}...",
+                                       font=FONT_MAIN, wraplength=340)
+        self.lbl_status.pack(pady=(25, 10), padx=20)
+        self.progress = ctk.CTkProgressBar(self)
+        self.progress.set(0)
+        self.progress.pack(fill="x", padx=20)
+        self.btn = ctk.CTkButton(self, text="Cancel", width=100, command=self._cancel,
+                                 fg_color="#FF3B30", hover_color="#d32f2f", font=FONT_BOLD)
+        self.btn.pack(pady=15)
+
+        def run():
+            try:
+                self.result = write_task_export(table, doc_ids, file_path, fmt,
+                                                progress=self._set_progress, cancel_event=self.cancel_event)
+            except Exception as e:
+                self.error = str(e)
+            self.finished = True
+
+        threading.Thread(target=run, daemon=True).start()
+        self._poll()
+
+    def _set_progress(self, count):
+        self.progress_count = count
+
+    def _poll(self):
+        if not self.winfo_exists():
+            return
+        self.progress.set(self.progress_count / self.total if self.total else 1)
+        if not self.finished:
+            self.after(100, self._poll)
+            return
+        if self.error:
+            self.lbl_status.configure(text=f"Failed to export: {self.error}")
+        elif self.result is None:
+            self.lbl_status.configure(text="Export cancelled.")
+        else:
+            self.title("Export Complete")
+            self.lbl_status.configure(text=f"Exported {self.result} task(s) successfully!")
+        self.btn.configure(text="Close", command=self.destroy, fg_color="#555555", hover_color="#666666")
+
+    def _cancel(self):
+        self.cancel_event.set()
+        self.btn.configure(state="disabled", text="Cancelling...")
+
+def export_tasks():
     if tasks_table is None: return
-    
+
+    # With a filter, search or Hide Done active, offer to export just what the list shows
+    filtered = False
+    if filter_var.get() != "All Categories" or hide_completed_var.get() or search_var.get().strip():
+        answer = messagebox.askyesnocancel(
+            "Export", "Export only the tasks in the current view (category, search and Hide Done)?\n\n"
+                      "Choose No to export every task.", parent=app)
+        if answer is None:
+            return
+        filtered = answer
+
     file_path = filedialog.asksaveasfilename(
-        title="Export Tasks to CSV",
+        title="Export Tasks",
         defaultextension=".csv",
-        filetypes=[("CSV Files", "*.csv")],
+        filetypes=[("CSV Files", "*.csv"), ("JSON Lines", "*.jsonl")],
         initialfile=f"tasks_export_{datetime.date.today()}.csv",
         parent=app
     )
-    
-    if file_path:
-        try:
-            all_tasks = tasks_table.all()
-            with open(file_path, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                # Header
-                writer.writerow(["ID", "Title", "Category", "Priority", "Status", "Deadline", "Impact", "Urgent", "Notes", "Created At"])
-                # Rows
-                for task in all_tasks:
-                    writer.writerow([
-                        task.doc_id,
-                        task.get('title', ''),
-                        task.get('category', ''),
-                        task.get('priority', ''),
-                        task.get('status', ''),
-                        task.get('deadline', ''),
-                        task.get('impact', ''),
-                        task.get('is_urgent', ''),
-                        task.get('notes', ''),
-                        task.get('created_at', '')
-                    ])
-            messagebox.showinfo("Success", "Tasks exported successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export: {e}")
+    if not file_path:
+        return
+    fmt = "jsonl" if file_path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+    if filtered:
+        doc_ids = [t.doc_id for t in task_service.list_tasks(filter_var.get(), hide_completed_var.get(),
+                                                              search_var.get())]
+    else:
+        doc_ids = tasks_table.doc_ids()
+    ExportProgressWindow(app, tasks_table, doc_ids, file_path, fmt)
+
+class ImportWindow(ctk.CTkToplevel):
+    """Reads an import file on a worker thread, then asks before adding anything."""
+    def __init__(self, parent, file_path, fmt):
+        super().__init__(parent)
+        self.title("Importing...")
+        center_window_to_parent(self, 460, 300)
+        self.file_name = os.path.basename(file_path)
+        self.total = max(os.path.getsize(file_path), 1)
+        self.progress_count = 0
+        self.plan = None
+        self.error = None
+        self.finished = False
+        self.cancel_event = threading.Event()
+
+        self.lbl_status = ctk.CTkLabel(self, text=f"Reading {self.file_name}...", font=FONT_MAIN,
+                                       wraplength=420, justify="left")
+        self.lbl_status.pack(pady=(25, 10), padx=20, fill="x")
+        self.progress = ctk.CTkProgressBar(self)
+        self.progress.set(0)
+        self.progress.pack(fill="x", padx=20)
+        btn_row = ctk.CTkFrame(self, fg_color="transparent")
+        btn_row.pack(side="bottom", pady=15)
+        self.btn_import = ctk.CTkButton(btn_row, text="Import", width=100, command=self._commit,
+                                        fg_color="#34C759", hover_color="#2da84e", font=FONT_BOLD)
+        self.btn = ctk.CTkButton(btn_row, text="Cancel", width=100, command=self._cancel,
+                                 fg_color="#FF3B30", hover_color="#d32f2f", font=FONT_BOLD)
+        self.btn.pack(side="left", padx=5)
+
+        # The plan is checked for duplicates against this database, so only it may receive the rows
+        self.service = task_service
+
+        def run():
+            try:
+                self.plan = self.service.plan_import(file_path, fmt, progress=self._set_progress,
+                                                     cancel_event=self.cancel_event)
+            except (OSError, ValueError, csv.Error) as e:
+                self.error = str(e)
+            self.finished = True
+
+        threading.Thread(target=run, daemon=True).start()
+        self._poll()
+
+    def _set_progress(self, count):
+        self.progress_count = count
+
+    def _poll(self):
+        if not self.winfo_exists():
+            return
+        if not self.finished:
+            self.progress.set(self.progress_count / self.total)
+            self.after(100, self._poll)
+            return
+        self.progress.set(1)
+        if self.error:
+            self.lbl_status.configure(text=f"Failed to read {self.file_name}: {self.error}")
+        elif self.plan is None:
+            self.lbl_status.configure(text="Import cancelled.")
+        else:
+            self.title("Import Summary")
+            self.lbl_status.configure(text=format_import_plan(self.plan, self.file_name))
+            if self.plan["records"]:
+                self.btn_import.pack(side="left", padx=5, before=self.btn)
+                self.btn.configure(command=self.destroy)
+                return
+        self._show_close()
+
+    def _show_close(self):
+        self.btn.configure(text="Close", command=self.destroy, fg_color="#555555", hover_color="#666666")
+
+    def _cancel(self):
+        self.cancel_event.set()
+        self.btn.configure(state="disabled", text="Cancelling...")
+
+    def _commit(self):
+        self.btn_import.pack_forget()
+        if task_service is not self.service:
+            self.lbl_status.configure(text="Another database was opened, so nothing was imported. "
+                                           "Import the file again to add it there.")
+            self._show_close()
+            return
+        count = len(self.service.add_tasks(self.plan["records"]))
+        refresh_task_list()
+        update_filter_options()
+        self.title("Import Complete")
+        self.lbl_status.configure(text=f"Imported {count} task(s) successfully!")
+        self._show_close()
+
+def import_tasks():
+    if task_service is None: return
+    file_path = filedialog.askopenfilename(
+        title="Import Tasks",
+        filetypes=[("Task Files", "*.csv *.json *.jsonl *.ndjson"), ("CSV Files", "*.csv"),
+                   ("JSON Files", "*.json"), ("JSON Lines", "*.jsonl *.ndjson")],
+        parent=app
+    )
+    if not file_path:
+        return
+    ext = os.path.splitext(file_path)[1].lower()
+    fmt = {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(ext, "csv")
+    ImportWindow(app, file_path, fmt)
 
 def center_window_to_parent(window, width, height):
     app.update_idletasks()
@@ -175,21 +373,283 @@ def center_window_to_parent(window, width, height):
     y_pos = main_y + (main_h // 2) - (height // 2)
     window.geometry(f"{width}x{height}+{x_pos}+{y_pos}")
 
-def get_priority(impact, is_urgent):
-    if impact == "High": return "Critical" if is_urgent else "Planned"
-    elif impact == "Medium": return "Important" if is_urgent else "Review"
-    else: return "Delegate" if is_urgent else "Trivial"
-
 def get_all_categories():
-    if tasks_table is None: return ["All Categories"]
-    cats = set(task.get('category', 'General') for task in tasks_table.all())
-    cats.add("General") 
-    sorted_cats = sorted(list(cats))
-    return ["All Categories"] + sorted_cats
+    if task_service is None: return ["All Categories"]
+    return ["All Categories"] + task_service.categories()
+
+# AI provider SDKs are imported on first use (or pre-warmed in the background after
+# startup), since most launches never touch Plan My Day.
+AI_SDK_MODULES = {
+    "Claude": ("anthropic",),
+    "Gemini": ("google.genai", "google.genai.types"),
+    "Ollama": ("ollama",),
+}
+_ai_sdk_lock = threading.Lock()
+
+def load_ai_sdk(name):
+    module = sys.modules.get(name)
+    if module is None:
+        with _ai_sdk_lock:
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            STARTUP_TIMINGS.setdefault(f"import {name}", round((time.perf_counter() - start) * 1000, 1))
+    return module
+
+# All AI work (requests, SDK pre-warming, model lists) runs on one bounded pool. Workers are
+# daemon threads so a hung request can never hold up quitting the app.
+AI_MAX_WORKERS = 3
+AI_CONNECT_TIMEOUT_SECONDS = 10
+AI_TIMEOUT_SECONDS = {"Claude": 60, "Gemini": 60, "Ollama": 180}  # Longest wait for the next bytes
+AI_MAX_RETRIES = 2
+AI_RETRY_BASE_SECONDS = 1.0
+AI_TRANSIENT_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+class AIExecutor:
+    """Bounded pool of daemon worker threads; run() hands results back to Tk through app.after."""
+    def __init__(self, max_workers=AI_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._jobs = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        self._jobs.put((future, fn, args))
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, daemon=True, name=f"ai-worker-{len(self._workers)}")
+                worker.start()
+                self._workers.append(worker)
+        return future
+
+    def _work(self):
+        while True:
+            future, fn, args = self._jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def run(self, fn, on_success=None, on_error=None):
+        """Runs fn on the pool, then calls on_success(result) or on_error(message) on the Tk thread."""
+        def deliver(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            try:
+                if error is None and on_success:
+                    app.after(0, lambda: on_success(future.result()))
+                elif error is not None and on_error:
+                    app.after(0, lambda: on_error(str(error)))
+            except RuntimeError:
+                pass  # Tk has already been torn down
+        future = self.submit(fn)
+        future.add_done_callback(deliver)
+        return future
+
+ai_executor = AIExecutor()
+
+def is_transient_ai_error(error):
+    """True for failures worth retrying: rate limits, overloaded or erroring servers, timeouts and dropped connections."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int):
+        return status in AI_TRANSIENT_STATUS
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    name = type(error).__name__
+    return "Timeout" in name or "Connect" in name or "Network" in name
+
+def ai_retry_delay(attempt):
+    """Exponential backoff with jitter: about 1 s, 2 s, 4 s..."""
+    return AI_RETRY_BASE_SECONDS * (2 ** attempt) * random.uniform(1.0, 1.5)
+
+def prewarm_ai_sdk(provider=None, on_done=None):
+    def warm():
+        for name in AI_SDK_MODULES.get(provider or AI_PROVIDER, ()):
+            try:
+                load_ai_sdk(name)
+            except Exception:
+                pass
+        try:
+            get_ai_client(provider or AI_PROVIDER)
+        except Exception:
+            pass
+        if on_done:
+            on_done()
+    ai_executor.submit(warm)
+
+# One long-lived SDK client per provider/key, so follow-up requests reuse the pooled
+# keep-alive connection instead of paying DNS + TCP + TLS setup every time.
+AI_LATENCY_KEEP = 50
+AI_LATENCY_LOG = []
+_ai_request_timing = threading.local()
+
+class _TimedTransport:
+    """Wraps an httpx transport and adds connection setup time to the active request timing."""
+    def __init__(self, inner):
+        self._inner = inner
+
+    def handle_request(self, request):
+        timing = getattr(_ai_request_timing, "current", None)
+        if timing is not None:
+            outer_trace = request.extensions.get("trace")
+            started = {}
+
+            def trace(event, info):
+                step, _, phase = event.rpartition(".")
+                if step in ("connection.connect_tcp", "connection.start_tls"):
+                    if phase == "started":
+                        started[step] = time.perf_counter()
+                    elif step in started:
+                        timing["connect_ms"] += (time.perf_counter() - started.pop(step)) * 1000
+                if outer_trace:
+                    outer_trace(event, info)
+
+            request.extensions["trace"] = trace
+        return self._inner.handle_request(request)
+
+    def close(self):
+        self._inner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _timed_http_transport():
+    return _TimedTransport(load_ai_sdk("httpx").HTTPTransport())
+
+def _build_ai_client(provider, credential):
+    # Retries are left to AIStream, so the SDKs' own retry loops are switched off
+    timeout = load_ai_sdk("httpx").Timeout(AI_TIMEOUT_SECONDS[provider], connect=AI_CONNECT_TIMEOUT_SECONDS)
+    if provider == "Ollama":
+        return load_ai_sdk("ollama").Client(transport=_timed_http_transport(), timeout=timeout)
+    if provider == "Gemini":
+        genai = load_ai_sdk("google.genai")
+        genai_types = load_ai_sdk("google.genai.types")
+        return genai.Client(api_key=credential,
+                            http_options=genai_types.HttpOptions(
+                                timeout=AI_TIMEOUT_SECONDS[provider] * 1000,
+                                client_args={"transport": _timed_http_transport()}))
+    anthropic = load_ai_sdk("anthropic")
+    return anthropic.Anthropic(api_key=credential, timeout=timeout, max_retries=0,
+                               http_client=anthropic.DefaultHttpxClient(transport=_timed_http_transport()))
+
+class AIClientRegistry:
+    """Caches one client per (provider, credential); a changed key replaces and closes the old client."""
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider, credential):
+        with self._lock:
+            client = self._clients.get(provider)
+            if client is not None and client[0] == credential:
+                return client[1]
+            stale = client[1] if client is not None else None
+            client = _build_ai_client(provider, credential)
+            self._clients[provider] = (credential, client)
+        if stale is not None:
+            _close_ai_client(stale)
+        return client
+
+    def invalidate(self, provider=None):
+        with self._lock:
+            names = [p for p in self._clients if provider is None or p == provider]
+            stale = [self._clients.pop(p)[1] for p in names]
+        for client in stale:
+            _close_ai_client(client)
+
+def _close_ai_client(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+
+ai_clients = AIClientRegistry()
+
+def get_ai_client(provider):
+    credential = {"Claude": ANTHROPIC_API_KEY, "Gemini": GEMINI_API_KEY}.get(provider)
+    return ai_clients.get(provider, credential)
+
+@contextlib.contextmanager
+def timed_ai_request(provider):
+    """Times one AI request, splitting connection setup from the wait for the generated reply."""
+    timing = {"provider": provider, "connect_ms": 0.0}
+    _ai_request_timing.current = timing
+    start = time.perf_counter()
+    timing["ok"] = False
+    try:
+        yield timing
+        timing["ok"] = True
+    finally:
+        _ai_request_timing.current = None
+        total_ms = (time.perf_counter() - start) * 1000
+        timing["connect_ms"] = round(timing["connect_ms"], 1)
+        timing["generation_ms"] = round(total_ms - timing["connect_ms"], 1)
+        timing["total_ms"] = round(total_ms, 1)
+        timing["reused_connection"] = timing["connect_ms"] == 0
+        timing["date"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        _ai_request_timing.last = timing
+        AI_LATENCY_LOG.append(timing)
+        del AI_LATENCY_LOG[:-AI_LATENCY_KEEP]
+
+def _record_ai_usage(input_tokens, cached_tokens=None):
+    """Adds the provider-reported prompt size, and how much of it came from the prompt cache, to the active timing.
+
+    cached_tokens is None when the provider doesn't report cache use; nothing is recorded for it then.
+    """
+    timing = getattr(_ai_request_timing, "current", None)
+    if timing is not None and input_tokens is not None:
+        timing["input_tokens"] = input_tokens
+        if cached_tokens is not None:
+            timing["cached_tokens"] = cached_tokens
+
+def last_ai_timing():
+    """Timing of the most recent AI request made on the calling thread."""
+    return getattr(_ai_request_timing, "last", None)
+
+def format_ai_timing(timing):
+    if not timing:
+        return ""
+    parts = ["reused connection" if timing["reused_connection"] else f"connect {timing['connect_ms']:.0f} ms"]
+    if "first_token_ms" in timing:
+        parts.append(f"first token {timing['first_token_ms'] / 1000:.1f} s")
+    parts.append(f"generation {timing['generation_ms'] / 1000:.1f} s")
+    if timing.get("input_tokens") and "cached_tokens" in timing:
+        parts.append(f"{timing['cached_tokens'] * 100 // timing['input_tokens']}% of input cached")
+    return f"{timing['provider']}: {timing['total_ms'] / 1000:.1f} s ({', '.join(parts)})"
+
+STARTUP_REPORT_FILE = os.path.join(USER_DATA_DIR, 'startup_report.jsonl')
+STARTUP_REPORT_KEEP = 200
+
+def mark_startup(event):
+    STARTUP_TIMINGS.setdefault(event, round((time.perf_counter() - _STARTUP_T0) * 1000, 1))
+
+def write_startup_report():
+    """Appends this launch's timings as one JSON line, keeping the last STARTUP_REPORT_KEEP launches."""
+    entry = {
+        "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "frozen": bool(getattr(sys, 'frozen', False)),
+        "timings_ms": dict(STARTUP_TIMINGS),
+    }
+    try:
+        lines = []
+        if os.path.exists(STARTUP_REPORT_FILE):
+            with open(STARTUP_REPORT_FILE, 'r', encoding='utf-8') as f:
+                lines = f.readlines()[-(STARTUP_REPORT_KEEP - 1):]
+        lines.append(json.dumps(entry) + "\n")
+        with open(STARTUP_REPORT_FILE, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+    except OSError:
+        pass
 
 def _get_ollama_models():
     try:
-        response = ollama.list()
+        response = get_ai_client("Ollama").list()
         return [m.model for m in response.models] if response.models else []
     except Exception:
         return []
@@ -332,25 +792,105 @@ def open_settings():
     entry_path.configure(state="readonly")
     entry_path.pack(side="left", fill="x", expand=True, padx=(0, 10))
 
+    def show_db_path(path):
+        entry_path.configure(state="normal")
+        entry_path.delete(0, "end")
+        entry_path.insert(0, path)
+        entry_path.configure(state="readonly")
+        lbl_engine.configure(text=f"Storage engine: {describe_engine(path, JSON_JOURNAL_ENABLED)}")
+
     def change_db():
         new_path = filedialog.asksaveasfilename(
             title="Select or Create Database File",
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json")],
+            filetypes=[("JSON Files", "*.json"), ("SQLite Database", "*.db *.sqlite *.sqlite3")],
             initialfile="my_tasks.json",
             parent=set_win
         )
         if new_path:
             save_config_and_start(new_path)
-            entry_path.configure(state="normal")
-            entry_path.delete(0, "end")
-            entry_path.insert(0, new_path)
-            entry_path.configure(state="readonly")
+            show_db_path(new_path)
             messagebox.showinfo("Success", "Database switched successfully!", parent=set_win)
 
+    def migrate_to_sqlite():
+        if not CURRENT_DB_PATH or is_sqlite_path(CURRENT_DB_PATH):
+            messagebox.showinfo("Migrate", "The current database is already using SQLite.", parent=set_win)
+            return
+        new_path = filedialog.asksaveasfilename(
+            title="Save SQLite Database As",
+            defaultextension=".db",
+            filetypes=[("SQLite Database", "*.db *.sqlite *.sqlite3")],
+            initialfile=os.path.splitext(os.path.basename(CURRENT_DB_PATH))[0] + ".db",
+            parent=set_win
+        )
+        if not new_path: return
+        if os.path.exists(new_path):
+            messagebox.showerror("Error", "Please choose a new file for the SQLite database.", parent=set_win)
+            return
+        try:
+            if db is not None:
+                db.flush()
+            counts = migrate_tinydb_to_sqlite(CURRENT_DB_PATH, new_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Migration failed: {e}", parent=set_win)
+            return
+        save_config_and_start(new_path)
+        show_db_path(new_path)
+        messagebox.showinfo("Success",
+                            f"Migrated {counts.get('tasks', 0)} task(s) and {counts.get('category_goals', 0)} goal(s) to SQLite.\n"
+                            f"The original JSON file was left untouched.", parent=set_win)
+
     btn_change = ctk.CTkButton(path_frame, text="Change", width=80, command=change_db)
     btn_change.pack(side="right")
 
+    lbl_engine = ctk.CTkLabel(scrollable, text=f"Storage engine: {describe_engine(CURRENT_DB_PATH, JSON_JOURNAL_ENABLED) if CURRENT_DB_PATH else 'None'}",
+                              font=FONT_MAIN, text_color="#A0A0A0")
+    lbl_engine.pack(pady=(0, 2))
+    ctk.CTkButton(scrollable, text="Migrate to SQLite", command=migrate_to_sqlite,
+                   fg_color="#555555", hover_color="#666666", font=FONT_BOLD, width=150).pack(pady=(2, 0))
+
+    def on_journal_toggle():
+        global JSON_JOURNAL_ENABLED
+        JSON_JOURNAL_ENABLED = bool(journal_var.get())
+        _save_all_settings()
+        if CURRENT_DB_PATH and not is_sqlite_path(CURRENT_DB_PATH):
+            # Reopen so the new mode takes effect; closing a journaled store compacts it first
+            initialize_db(CURRENT_DB_PATH)
+            lbl_engine.configure(text=f"Storage engine: {describe_engine(CURRENT_DB_PATH, JSON_JOURNAL_ENABLED)}")
+
+    journal_var = ctk.BooleanVar(value=JSON_JOURNAL_ENABLED)
+    ctk.CTkSwitch(scrollable, text="Journaled writes for JSON databases", variable=journal_var,
+                  onvalue=True, offvalue=False, command=on_journal_toggle, font=FONT_MAIN).pack(pady=(8, 0))
+
+    flush_frame = ctk.CTkFrame(scrollable, fg_color="transparent")
+    flush_frame.pack(pady=5, padx=20, fill="x")
+    ctk.CTkLabel(flush_frame, text="Max Write Delay (ms):", font=FONT_MAIN, width=150, anchor="w").pack(side="left")
+    entry_flush = ctk.CTkEntry(flush_frame, font=FONT_MAIN, width=80)
+    entry_flush.insert(0, str(FLUSH_LATENCY_MS))
+    entry_flush.pack(side="left")
+
+    def save_flush_latency():
+        global FLUSH_LATENCY_MS
+        try:
+            FLUSH_LATENCY_MS = max(0, int(entry_flush.get().strip()))
+        except ValueError:
+            messagebox.showerror("Error", "Max write delay must be a whole number of milliseconds.", parent=set_win)
+            return
+        if db is not None:
+            db.max_latency_ms = FLUSH_LATENCY_MS
+        _save_all_settings()
+        messagebox.showinfo("Success", "Max write delay saved!", parent=set_win)
+
+    def flush_now():
+        if db is None: return
+        pending = db.pending_count()
+        db.flush()
+        messagebox.showinfo("Flushed", f"Wrote {pending} pending change(s) to disk.", parent=set_win)
+
+    ctk.CTkButton(flush_frame, text="Flush Now", width=80, command=flush_now,
+                   fg_color="#555555", hover_color="#666666").pack(side="right")
+    ctk.CTkButton(flush_frame, text="Save", width=60, command=save_flush_latency).pack(side="right", padx=(0, 10))
+
     # AI Provider Selector
     ctk.CTkLabel(scrollable, text="AI Provider:", font=FONT_TITLE).pack(pady=(15, 0))
 
@@ -358,12 +898,41 @@ def open_settings():
         global AI_PROVIDER
         AI_PROVIDER = value
         _save_all_settings()
+        prewarm_ai_sdk(value)
 
     provider_seg = ctk.CTkSegmentedButton(scrollable, values=["Claude", "Gemini", "Ollama"],
                                            command=on_provider_change, font=FONT_BOLD)
     provider_seg.set(AI_PROVIDER)
     provider_seg.pack(pady=5, padx=20)
 
+    def on_fastest_toggle():
+        global AI_FASTEST_AVAILABLE
+        AI_FASTEST_AVAILABLE = bool(fastest_var.get())
+        _save_all_settings()
+
+    fastest_var = ctk.BooleanVar(value=AI_FASTEST_AVAILABLE)
+    ctk.CTkSwitch(scrollable, text="Fastest available (also ask other configured providers)", variable=fastest_var,
+                  onvalue=True, offvalue=False, command=on_fastest_toggle, font=FONT_MAIN).pack(pady=(5, 0))
+
+    hedge_frame = ctk.CTkFrame(scrollable, fg_color="transparent")
+    hedge_frame.pack(pady=5, padx=20, fill="x")
+    ctk.CTkLabel(hedge_frame, text="Ask Next Provider After (ms):", font=FONT_MAIN, width=200, anchor="w").pack(side="left")
+    entry_hedge = ctk.CTkEntry(hedge_frame, font=FONT_MAIN, width=80)
+    entry_hedge.insert(0, str(HEDGE_DELAY_MS))
+    entry_hedge.pack(side="left")
+
+    def save_hedge_delay():
+        global HEDGE_DELAY_MS
+        try:
+            HEDGE_DELAY_MS = max(0, int(entry_hedge.get().strip()))
+        except ValueError:
+            messagebox.showerror("Error", "The delay must be a whole number of milliseconds.", parent=set_win)
+            return
+        _save_all_settings()
+        messagebox.showinfo("Success", "Hedge delay saved!", parent=set_win)
+
+    ctk.CTkButton(hedge_frame, text="Save", width=60, command=save_hedge_delay).pack(side="right")
+
     # Anthropic API Key
     ctk.CTkLabel(scrollable, text="Anthropic API Key:", font=FONT_TITLE).pack(pady=(15, 0))
 
@@ -380,6 +949,7 @@ def open_settings():
         key = entry_api.get().strip()
         ANTHROPIC_API_KEY = key if key else None
         _save_all_settings()
+        ai_clients.invalidate("Claude")
         messagebox.showinfo("Success", "Anthropic API key saved!", parent=set_win)
 
     ctk.CTkButton(api_frame, text="Save Key", width=80, command=save_anthropic_key,
@@ -401,6 +971,7 @@ def open_settings():
         key = entry_gemini.get().strip()
         GEMINI_API_KEY = key if key else None
         _save_all_settings()
+        ai_clients.invalidate("Gemini")
         messagebox.showinfo("Success", "Gemini API key saved!", parent=set_win)
 
     ctk.CTkButton(gemini_frame, text="Save Key", width=80, command=save_gemini_key,
@@ -412,11 +983,19 @@ def open_settings():
     ollama_frame = ctk.CTkFrame(scrollable, fg_color="transparent")
     ollama_frame.pack(pady=5, padx=20, fill="x")
 
-    available_models = _get_ollama_models()
-    ollama_combo = ctk.CTkComboBox(ollama_frame, values=available_models, font=FONT_MAIN, height=35)
-    ollama_combo.set(OLLAMA_MODEL if OLLAMA_MODEL in available_models else (available_models[0] if available_models else ""))
+    # The model list is fetched on the AI executor so a slow or missing Ollama server can't freeze Settings
+    ollama_combo = ctk.CTkComboBox(ollama_frame, values=[], font=FONT_MAIN, height=35)
+    ollama_combo.set(OLLAMA_MODEL)
     ollama_combo.pack(side="left", fill="x", expand=True, padx=(0, 10))
 
+    def show_ollama_models(models, prefer=OLLAMA_MODEL):
+        if not set_win.winfo_exists():
+            return
+        ollama_combo.configure(values=models)
+        ollama_combo.set(prefer if prefer in models else (models[0] if models else ""))
+
+    ai_executor.run(_get_ollama_models, on_success=show_ollama_models)
+
     def save_ollama_model():
         global OLLAMA_MODEL
         OLLAMA_MODEL = ollama_combo.get().strip()
@@ -427,14 +1006,62 @@ def open_settings():
                    fg_color="#FF9500", hover_color="#e08600").pack(side="right")
 
     def refresh_ollama_list():
-        models = _get_ollama_models()
-        ollama_combo.configure(values=models)
-        if models:
-            ollama_combo.set(models[0])
+        ai_executor.run(_get_ollama_models,
+                        on_success=lambda models: show_ollama_models(models, prefer=ollama_combo.get()))
 
     ctk.CTkButton(scrollable, text="Refresh Ollama Models", command=refresh_ollama_list,
                    fg_color="#FF9500", hover_color="#e08600", font=FONT_BOLD, width=180).pack(pady=(5, 0))
 
+    plan_cache_frame = ctk.CTkFrame(scrollable, fg_color="transparent")
+    plan_cache_frame.pack(pady=(10, 5), padx=20, fill="x")
+    ctk.CTkLabel(plan_cache_frame, text="Reuse Plans For (hours):", font=FONT_MAIN, width=170, anchor="w").pack(side="left")
+    entry_plan_ttl = ctk.CTkEntry(plan_cache_frame, font=FONT_MAIN, width=60)
+    entry_plan_ttl.insert(0, f"{PLAN_CACHE_TTL_HOURS:g}")
+    entry_plan_ttl.pack(side="left")
+
+    def save_plan_cache_ttl():
+        global PLAN_CACHE_TTL_HOURS
+        try:
+            PLAN_CACHE_TTL_HOURS = max(0.0, float(entry_plan_ttl.get().strip()))
+        except ValueError:
+            messagebox.showerror("Error", "Plan reuse time must be a number of hours.", parent=set_win)
+            return
+        _save_all_settings()
+        messagebox.showinfo("Success", "Plan cache setting saved!", parent=set_win)
+
+    def clear_plan_cache():
+        removed = plan_cache.clear()
+        messagebox.showinfo("Cleared", f"Removed {removed} cached plan(s).", parent=set_win)
+
+    ctk.CTkButton(plan_cache_frame, text="Clear", width=60, command=clear_plan_cache,
+                   fg_color="#555555", hover_color="#666666").pack(side="right")
+    ctk.CTkButton(plan_cache_frame, text="Save", width=60, command=save_plan_cache_ttl).pack(side="right", padx=(0, 10))
+
+    retention_frame = ctk.CTkFrame(scrollable, fg_color="transparent")
+    retention_frame.pack(pady=5, padx=20, fill="x")
+    ctk.CTkLabel(retention_frame, text="Archive Chats After (days):", font=FONT_MAIN, width=170, anchor="w").pack(side="left")
+    entry_archive_days = ctk.CTkEntry(retention_frame, font=FONT_MAIN, width=50)
+    entry_archive_days.insert(0, str(PLAN_ARCHIVE_AFTER_DAYS))
+    entry_archive_days.pack(side="left")
+    ctk.CTkLabel(retention_frame, text="Cap (MB):", font=FONT_MAIN, anchor="w").pack(side="left", padx=(10, 5))
+    entry_chats_cap = ctk.CTkEntry(retention_frame, font=FONT_MAIN, width=60)
+    entry_chats_cap.insert(0, str(PLAN_CHATS_MAX_MB))
+    entry_chats_cap.pack(side="left")
+
+    def save_chat_retention():
+        global PLAN_ARCHIVE_AFTER_DAYS, PLAN_CHATS_MAX_MB
+        try:
+            PLAN_ARCHIVE_AFTER_DAYS = max(0, int(entry_archive_days.get().strip()))
+            PLAN_CHATS_MAX_MB = max(1, int(entry_chats_cap.get().strip()))
+        except ValueError:
+            messagebox.showerror("Error", "Days and cap must be whole numbers.", parent=set_win)
+            return
+        _save_all_settings()
+        start_plan_chat_maintenance()
+        messagebox.showinfo("Success", "Chat history settings saved!", parent=set_win)
+
+    ctk.CTkButton(retention_frame, text="Save", width=60, command=save_chat_retention).pack(side="right")
+
     # Productivity Schedule
     ctk.CTkLabel(scrollable, text="Productivity Schedule:", font=FONT_TITLE).pack(pady=(20, 0))
 
@@ -482,37 +1109,131 @@ def open_settings():
                               fg_color="#555555", hover_color="#666666", font=FONT_BOLD)
     btn_theme.pack(pady=10)
 
+    virtual_frame = ctk.CTkFrame(scrollable, fg_color="transparent")
+    virtual_frame.pack(pady=5, padx=20, fill="x")
+    ctk.CTkLabel(virtual_frame, text="Virtual List Above (rows):", font=FONT_MAIN, width=180, anchor="w").pack(side="left")
+    entry_virtual = ctk.CTkEntry(virtual_frame, font=FONT_MAIN, width=80)
+    entry_virtual.insert(0, str(VIRTUAL_LIST_THRESHOLD))
+    entry_virtual.pack(side="left")
+
+    def save_virtual_threshold():
+        global VIRTUAL_LIST_THRESHOLD
+        try:
+            VIRTUAL_LIST_THRESHOLD = max(1, int(entry_virtual.get().strip()))
+        except ValueError:
+            messagebox.showerror("Error", "The row count must be a whole number.", parent=set_win)
+            return
+        _save_all_settings()
+        refresh_task_list()
+        messagebox.showinfo("Success", "Virtual list threshold saved!", parent=set_win)
+
+    ctk.CTkButton(virtual_frame, text="Save", width=60, command=save_virtual_threshold).pack(side="right")
+
     ctk.CTkButton(scrollable, text="Close", command=set_win.destroy, fg_color="#FF3B30", hover_color="#d32f2f").pack(pady=(20, 20))
 
 # --- 5. DATABASE & SETUP ---
 
 def check_deadlines():
-    if tasks_table is None: return
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    Task = Query()
-    due_tasks = tasks_table.search(Task.deadline == today)
-    due_tasks = [t for t in due_tasks if t.get('status') != 'Completed']
-    
+    if task_service is None: return
+    due_tasks = task_service.due_today()
+
     if due_tasks:
         count = len(due_tasks)
         send_notification("TaskMaster", f"You have {count} task(s) due today!")
 
+def _load_db(path):
+    """Opens the database and builds the cache and indexes. Runs on a worker thread."""
+    service = TaskService(path, JSON_JOURNAL_ENABLED, FLUSH_LATENCY_MS, app)
+    service.search  # Build the search index here rather than on the first keystroke
+    return service
+
+def _close_db():
+    global task_service, db, tasks_table, goals_table
+    if task_service is not None:
+        task_service.close()
+    task_service = db = tasks_table = goals_table = None
+
+_db_load_generation = 0
+_compaction_warned = False
+
 def initialize_db(path):
-    global db, tasks_table, goals_table, CURRENT_DB_PATH, _last_db_mtime
+    """Switches to the database at path. Loading happens on a worker thread; the list shows a
+    loading state until the first rows are ready."""
+    global CURRENT_DB_PATH, _db_load_generation
+    _stop_db_watch()
     try:
-        if db is not None:
-            db.close()
-        db = TinyDB(path)
-        tasks_table = db.table('tasks')
-        goals_table = db.table('category_goals')
-        CURRENT_DB_PATH = path
-        _last_db_mtime = _get_db_mtime()
-        refresh_task_list()
-        update_filter_options()
-        app.after(2000, check_deadlines)
-        _start_db_poll()
+        _close_db()
     except Exception as e:
-        messagebox.showerror("Error", f"Could not load database: {e}")
+        messagebox.showerror("Error", f"Could not save the previous database: {e}")
+    CURRENT_DB_PATH = path
+    checked_task_ids.clear()
+    _db_load_generation += 1
+    generation = _db_load_generation
+    task_list_view.show_loading()
+
+    filters = (filter_var.get(), hide_completed_var.get(), search_var.get())
+
+    def load():
+        try:
+            loaded = _load_db(path)
+            # Do the first filter and sort here too, so the UI thread only inserts rows
+            first_tasks = loaded.list_tasks(*filters)
+            app.after(0, lambda: _on_db_loaded(generation, loaded, filters, first_tasks))
+        except Exception as e:
+            err_msg = str(e)
+            app.after(0, lambda: _on_db_load_failed(generation, err_msg))
+
+    threading.Thread(target=load, daemon=True).start()
+
+def _on_db_loaded(generation, loaded, filters, first_tasks):
+    global task_service, db, tasks_table, goals_table, _last_db_mtime, _compaction_warned
+    if generation != _db_load_generation:
+        # Another database was picked while this one loaded
+        loaded.close()
+        return
+    task_service = loaded
+    db, tasks_table, goals_table = loaded.db, loaded.tasks, loaded.goals
+    db.add_reassign_listener(lambda name, moved: app.after(0, lambda: _on_ids_reassigned(name, moved)))
+    if hasattr(db.store, 'add_compaction_error_listener'):
+        store = db.store
+        store.add_compaction_error_listener(lambda e: app.after(0, lambda: _on_compaction_failed(store, e)))
+    _compaction_warned = False
+    _last_db_mtime = _get_db_mtime()
+    if filters == (filter_var.get(), hide_completed_var.get(), search_var.get()):
+        task_list_view.show_progressively(build_task_rows(first_tasks))
+    else:
+        refresh_task_list()
+    update_filter_options()
+    app.after(2000, check_deadlines)
+    _start_db_watch()
+
+    if "first rows" not in STARTUP_TIMINGS:
+        mark_startup("first rows")
+        # The UI is usable now; load the AI SDK in the background and then record the launch
+        prewarm_ai_sdk(on_done=write_startup_report)
+
+def _on_compaction_failed(store, error):
+    # Warn once per database: every change is still in the journal, which just keeps growing
+    global _compaction_warned
+    if db is None or db.store is not store or _compaction_warned: return
+    _compaction_warned = True
+    messagebox.showwarning("Save Warning",
+                           f"Could not fold the change journal into {os.path.basename(CURRENT_DB_PATH)}: {error}\n\n"
+                           "Your changes are safe in the journal, but it will keep growing until this is fixed.")
+
+def _on_ids_reassigned(table_name, moved):
+    # Another app sharing the database took the ids our new tasks were shown with
+    if table_name != 'tasks' or task_service is None: return
+    remapped = {moved.get(doc_id, doc_id) for doc_id in checked_task_ids}
+    checked_task_ids.clear()
+    checked_task_ids.update(remapped)
+    refresh_task_list()
+
+def _on_db_load_failed(generation, error_msg):
+    if generation != _db_load_generation:
+        return
+    task_list_view.show([])
+    messagebox.showerror("Error", f"Could not load database: {error_msg}")
 
 def _get_db_mtime():
     try:
@@ -520,33 +1241,111 @@ def _get_db_mtime():
     except OSError:
         return None
 
+# Watching the database for external edits. With watchdog installed the OS reports
+# changes (FSEvents / inotify / ReadDirectoryChangesW); otherwise the file is polled,
+# quickly after a change and backing off to DB_POLL_INTERVAL_MS while it is quiet.
 _db_poll_id = None
+_db_poll_interval_ms = DB_POLL_MIN_INTERVAL_MS
+_db_observer = None
+_db_check_id = None
+_db_load_in_flight = False
+
+class _DBFileEventHandler:
+    """watchdog handler that forwards events touching the database file to the Tk thread."""
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+    def dispatch(self, event):
+        paths = (event.src_path, getattr(event, 'dest_path', None))
+        if any(p and os.path.abspath(p) == self.path for p in paths):
+            app.after(0, _on_db_file_event)
+
+def _start_db_watch():
+    global _db_poll_id, _db_observer, _db_poll_interval_ms
+    _stop_db_watch()
+    if Observer is not None:
+        try:
+            _db_observer = Observer()
+            _db_observer.daemon = True
+            _db_observer.schedule(_DBFileEventHandler(CURRENT_DB_PATH), os.path.dirname(os.path.abspath(CURRENT_DB_PATH)))
+            _db_observer.start()
+            return
+        except Exception:
+            _db_observer = None
+    _db_poll_interval_ms = DB_POLL_MIN_INTERVAL_MS
+    _db_poll_id = app.after(_db_poll_interval_ms, _poll_db_for_changes)
 
-def _start_db_poll():
-    global _db_poll_id
+def _stop_db_watch():
+    global _db_observer, _db_poll_id
     if _db_poll_id is not None:
         app.after_cancel(_db_poll_id)
-    _db_poll_id = app.after(DB_POLL_INTERVAL_MS, _poll_db_for_changes)
+        _db_poll_id = None
+    if _db_observer is not None:
+        _db_observer.stop()
+        _db_observer = None
 
 def _poll_db_for_changes():
-    global _last_db_mtime, db, tasks_table, goals_table, _db_poll_id
-    if CURRENT_DB_PATH is None:
-        _db_poll_id = app.after(DB_POLL_INTERVAL_MS, _poll_db_for_changes)
-        return
+    global _db_poll_id, _db_poll_interval_ms
+    changed = _check_db_for_changes()
+    _db_poll_interval_ms = DB_POLL_MIN_INTERVAL_MS if changed else min(_db_poll_interval_ms * 2, DB_POLL_INTERVAL_MS)
+    _db_poll_id = app.after(_db_poll_interval_ms, _poll_db_for_changes)
+
+def _on_db_file_event():
+    # One save can raise several events; look once they settle
+    global _db_check_id
+    if _db_check_id is not None:
+        app.after_cancel(_db_check_id)
+    _db_check_id = app.after(DB_WATCH_DEBOUNCE_MS, _run_db_check)
+
+def _run_db_check():
+    global _db_check_id
+    _db_check_id = None
+    _check_db_for_changes()
+
+def _check_db_for_changes():
+    """Starts a background merge if the file changed on disk for a reason other than our own write."""
+    global _last_db_mtime, _db_load_in_flight
+    if CURRENT_DB_PATH is None or db is None or _db_load_in_flight:
+        return False
     current_mtime = _get_db_mtime()
-    if current_mtime is not None and current_mtime != _last_db_mtime:
-        _last_db_mtime = current_mtime
+    if current_mtime is None or current_mtime == _last_db_mtime:
+        return False
+    # Skip only when our own writes are all that happened since we last looked; a write that
+    # landed on top of an external edit still needs the diff
+    own_writes_only = db.only_own_writes_since(_last_db_mtime, current_mtime)
+    _last_db_mtime = current_mtime
+    if own_writes_only:
+        return False
+
+    generation = _db_load_generation
+    path = CURRENT_DB_PATH
+    snapshots = {'tasks': tasks_table.snapshot(), 'category_goals': goals_table.snapshot()}
+    _db_load_in_flight = True
+
+    def load():
         try:
-            if db is not None:
-                db.close()
-            db = TinyDB(CURRENT_DB_PATH)
-            tasks_table = db.table('tasks')
-            goals_table = db.table('category_goals')
-            refresh_task_list()
-            update_filter_options()
+            fresh = read_database_snapshot(path)
+            diffs = {name: diff_table(snap, fresh.get(name, {})) for name, snap in snapshots.items()}
         except Exception:
-            pass
-    _db_poll_id = app.after(DB_POLL_INTERVAL_MS, _poll_db_for_changes)
+            diffs = None
+        app.after(0, lambda: _apply_external_changes(generation, snapshots, diffs))
+
+    threading.Thread(target=load, daemon=True).start()
+    return True
+
+def _apply_external_changes(generation, snapshots, diffs):
+    global _db_load_in_flight
+    _db_load_in_flight = False
+    # The database may have been switched or reopened while the file was loading
+    if diffs is None or generation != _db_load_generation or tasks_table is None:
+        return
+    changed = 0
+    for name, table in (('tasks', tasks_table), ('category_goals', goals_table)):
+        upserts, removes = diffs[name]
+        changed += table.apply_external(snapshots[name], upserts, removes)
+    if changed:
+        refresh_task_list()
+        update_filter_options()
 
 def _save_all_settings():
     config = {}
@@ -570,6 +1369,14 @@ def _save_all_settings():
     config['working_hours'] = WORKING_HOURS
     config['peak_hours'] = PEAK_HOURS
     config['wind_down_hours'] = WIND_DOWN_HOURS
+    config['json_journal'] = JSON_JOURNAL_ENABLED
+    config['flush_latency_ms'] = FLUSH_LATENCY_MS
+    config['virtual_list_threshold'] = VIRTUAL_LIST_THRESHOLD
+    config['plan_cache_ttl_hours'] = PLAN_CACHE_TTL_HOURS
+    config['ai_fastest_available'] = AI_FASTEST_AVAILABLE
+    config['hedge_delay_ms'] = HEDGE_DELAY_MS
+    config['plan_archive_days'] = PLAN_ARCHIVE_AFTER_DAYS
+    config['plan_chats_max_mb'] = PLAN_CHATS_MAX_MB
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f)
 
@@ -592,6 +1399,14 @@ def save_config_and_start(path):
     config['working_hours'] = WORKING_HOURS
     config['peak_hours'] = PEAK_HOURS
     config['wind_down_hours'] = WIND_DOWN_HOURS
+    config['json_journal'] = JSON_JOURNAL_ENABLED
+    config['flush_latency_ms'] = FLUSH_LATENCY_MS
+    config['virtual_list_threshold'] = VIRTUAL_LIST_THRESHOLD
+    config['plan_cache_ttl_hours'] = PLAN_CACHE_TTL_HOURS
+    config['ai_fastest_available'] = AI_FASTEST_AVAILABLE
+    config['hedge_delay_ms'] = HEDGE_DELAY_MS
+    config['plan_archive_days'] = PLAN_ARCHIVE_AFTER_DAYS
+    config['plan_chats_max_mb'] = PLAN_CHATS_MAX_MB
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f)
     initialize_db(path)
@@ -617,7 +1432,7 @@ def open_setup_wizard():
         file_path = filedialog.asksaveasfilename(
             title="Create Database File",
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json")],
+            filetypes=[("JSON Files", "*.json"), ("SQLite Database", "*.db *.sqlite *.sqlite3")],
             initialfile="my_tasks.json",
             parent=app
         )
@@ -631,7 +1446,9 @@ def open_setup_wizard():
 
 def check_config_on_startup():
     global ANTHROPIC_API_KEY, GEMINI_API_KEY, AI_PROVIDER, OLLAMA_MODEL
-    global WORKING_HOURS, PEAK_HOURS, WIND_DOWN_HOURS
+    global WORKING_HOURS, PEAK_HOURS, WIND_DOWN_HOURS, JSON_JOURNAL_ENABLED, FLUSH_LATENCY_MS
+    global VIRTUAL_LIST_THRESHOLD, PLAN_CACHE_TTL_HOURS, AI_FASTEST_AVAILABLE, HEDGE_DELAY_MS
+    global PLAN_ARCHIVE_AFTER_DAYS, PLAN_CHATS_MAX_MB
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, 'r') as f:
@@ -644,6 +1461,14 @@ def check_config_on_startup():
                 WORKING_HOURS = config.get('working_hours', '9:00 AM - 6:00 PM')
                 PEAK_HOURS = config.get('peak_hours', '9:00 AM - 12:00 PM')
                 WIND_DOWN_HOURS = config.get('wind_down_hours', '3:00 PM - 5:00 PM')
+                JSON_JOURNAL_ENABLED = config.get('json_journal', False)
+                FLUSH_LATENCY_MS = config.get('flush_latency_ms', 2000)
+                VIRTUAL_LIST_THRESHOLD = config.get('virtual_list_threshold', 2000)
+                PLAN_CACHE_TTL_HOURS = config.get('plan_cache_ttl_hours', 12)
+                AI_FASTEST_AVAILABLE = config.get('ai_fastest_available', False)
+                HEDGE_DELAY_MS = config.get('hedge_delay_ms', 4000)
+                PLAN_ARCHIVE_AFTER_DAYS = config.get('plan_archive_days', 30)
+                PLAN_CHATS_MAX_MB = config.get('plan_chats_max_mb', 200)
                 # Backward compat: migrate old api_key
                 if not ANTHROPIC_API_KEY and config.get('api_key'):
                     ANTHROPIC_API_KEY = config['api_key']
@@ -664,51 +1489,225 @@ def update_filter_options():
     if filter_var.get() not in opts:
         filter_var.set("All Categories")
 
-def refresh_task_list(event=None):
-    if tasks_table is None: return
+class TreeReconciler:
+    """Brings the Treeview in line with a desired row list, touching only rows that changed.
+
+    Rows are (iid, values); the even/odd tag follows each row's position, counted from
+    start when the rows are a window into a longer list.
+    """
+    def __init__(self, tree):
+        self.tree = tree
+        self._rows = {}   # iid -> (values, tag) as last written to the tree
+        self._order = []  # iids in the order they currently appear
+
+    def apply(self, rows, start=0):
+        tree = self.tree
+        order = [iid for iid, _ in rows]
+        wanted = set(order)
+
+        stale = [iid for iid in self._order if iid not in wanted]
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                del self._rows[iid]
+        current_order = [iid for iid in self._order if iid in wanted]
+
+        for position, (iid, values) in enumerate(rows, start):
+            tag = 'evenrow' if position % 2 == 0 else 'oddrow'
+            current = self._rows.get(iid)
+            if current is None:
+                tree.insert("", "end", iid=iid, values=values, tags=(tag,))
+                current_order.append(iid)
+            elif current != (values, tag):
+                tree.item(iid, values=values, tags=(tag,))
+            self._rows[iid] = (values, tag)
+
+        if current_order != order:
+            # One Tk call reorders every row; the surviving rows keep their selection state
+            top = tree.yview()[0]
+            tree.set_children("", *order)
+            tree.yview_moveto(top)
+        self._order = order
+
+    def set_check(self, iid, symbol):
+        values, tag = self._rows[iid]
+        values = (symbol,) + values[1:]
+        self.tree.item(iid, values=values)
+        self._rows[iid] = (values, tag)
+
+class TaskListView:
+    """Shows task rows in the Treeview, virtualizing once there are too many to insert.
+
+    In virtual mode the tree only holds the rows in view plus a small overscan, and the
+    scrollbar, mouse wheel and arrow keys move a window over the full in-memory row list.
+    """
+    def __init__(self, tree, scrollbar, is_checked):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.reconciler = TreeReconciler(tree)
+        self.is_checked = is_checked
+        self.rows = []
+        self.first = 0
+        self.virtual = False
+        self._stream_id = None
+        self.loading_label = ctk.CTkLabel(tree.master, text="Loading tasks...", font=FONT_TITLE,
+                                          text_color="#A0A0A0")
+
+        tree.bind("<MouseWheel>", self._on_wheel)
+        tree.bind("<Button-4>", lambda e: self._on_wheel(e, -1))
+        tree.bind("<Button-5>", lambda e: self._on_wheel(e, 1))
+        tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        tree.bind("<Down>", lambda e: self._on_arrow(1))
+        tree.bind("<Configure>", lambda e: self._render() if self.virtual else None)
+
+    def show_loading(self):
+        self._cancel_stream()
+        self.show([])
+        self.loading_label.place(relx=0.5, rely=0.5, anchor="center")
+
+    def show_progressively(self, rows):
+        """Like show(), but inserts a first screenful right away and the rest in later chunks."""
+        if len(rows) >= VIRTUAL_LIST_THRESHOLD or len(rows) <= LIST_STREAM_CHUNK:
+            self.show(rows)
+            return
+        self.show(rows[:LIST_STREAM_CHUNK])
+        self._stream_id = self.tree.after(1, lambda: self._stream(rows, 2 * LIST_STREAM_CHUNK))
+
+    def _stream(self, rows, end):
+        self._stream_id = None
+        self.reconciler.apply(rows[:end])
+        self.rows = rows[:end]
+        if end < len(rows):
+            self._stream_id = self.tree.after(1, lambda: self._stream(rows, end + LIST_STREAM_CHUNK))
+
+    def _cancel_stream(self):
+        if self._stream_id is not None:
+            self.tree.after_cancel(self._stream_id)
+            self._stream_id = None
+
+    def show(self, rows):
+        # A newer row set replaces any half-streamed one
+        self._cancel_stream()
+        self.loading_label.place_forget()
+        self.rows = rows
+        if len(rows) >= VIRTUAL_LIST_THRESHOLD:
+            if not self.virtual:
+                self.virtual = True
+                self.first = 0
+                self.tree.configure(yscrollcommand="")
+                self.scrollbar.configure(command=self._on_scrollbar)
+            self._render()
+        else:
+            if self.virtual:
+                self.virtual = False
+                self.scrollbar.configure(command=self.tree.yview)
+                self.tree.configure(yscrollcommand=self.scrollbar.set)
+            self.reconciler.apply(rows)
+
+    def set_check(self, iid, symbol):
+        self.reconciler.set_check(iid, symbol)
+
+    def refresh_checks(self):
+        """Redraws the check column after many checks changed at once."""
+        self.rows = [(iid, ("☑" if self.is_checked(iid) else "☐",) + tuple(values[1:]))
+                     for iid, values in self.rows]
+        if self.virtual:
+            self._render()
+        else:
+            self.reconciler.apply(self.rows)
+
+    def _visible_count(self):
+        row_height = 40  # matches the Treeview rowheight in apply_tree_theme
+        # The heading takes roughly one row at the top
+        return max(1, self.tree.winfo_height() // row_height - 1)
+
+    def _render(self):
+        visible = self._visible_count()
+        total = len(self.rows)
+        self.first = max(0, min(self.first, total - visible))
+        window = []
+        for iid, values in self.rows[self.first:self.first + visible + VIRTUAL_OVERSCAN]:
+            # Checks can change while a row is scrolled out, so take them fresh
+            window.append((iid, ("☑" if self.is_checked(iid) else "☐",) + tuple(values[1:])))
+        self.reconciler.apply(window, start=self.first)
+        self.tree.yview_moveto(0)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
 
-    checked_task_ids.clear()
-    for item in tree.get_children():
-        tree.delete(item)
+    def _scroll_to(self, first):
+        self.first = first
+        self._render()
 
-    all_tasks = tasks_table.all()
-    
-    # 1. Category Filter
-    current_filter = filter_var.get()
-    if current_filter != "All Categories":
-        all_tasks = [t for t in all_tasks if t.get('category', 'General') == current_filter]
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * len(self.rows)))
+        else:
+            step = self._visible_count() if unit == "pages" else 1
+            self._scroll_to(self.first + int(amount) * step)
+
+    def _on_wheel(self, event, direction=None):
+        if not self.virtual:
+            return None
+        if direction is None:
+            direction = -1 if event.delta > 0 else 1
+        self._scroll_to(self.first + direction * 3)
+        return "break"
+
+    def _on_arrow(self, step):
+        if not self.virtual or not self.rows:
+            return None
+        focus = self.tree.focus()
+        order = self.reconciler._order
+        position = self.first + order.index(focus) if focus in order else self.first
+        target = max(0, min(len(self.rows) - 1, position + step))
+        visible = self._visible_count()
+        if target < self.first:
+            self.first = target
+        elif target >= self.first + visible:
+            self.first = target - visible + 1
+        self._render()
+        iid = self.rows[target][0]
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        return "break"
+
+def build_task_rows(all_tasks):
+    rows = []
+    for task in all_tasks:
+        rows.append((str(task.doc_id), (
+            "☑" if task.doc_id in checked_task_ids else "☐",
+            task['title'],
+            task.get('category', 'General'),
+            task['priority'],
+            task.get('status', 'Pending'),
+            task['deadline']
+        )))
+    return rows
 
-    # 2. Hide Completed Filter
-    if hide_completed_var.get(): 
-        all_tasks = [t for t in all_tasks if t.get('status') != 'Completed']
+def refresh_task_list(event=None):
+    if task_service is None: return
 
-    # 3. Search Filter
-    search_txt = search_var.get().lower()
-    if search_txt:
-        all_tasks = [t for t in all_tasks if search_txt in t['title'].lower()]
+    all_tasks = task_service.list_tasks(filter_var.get(), hide_completed_var.get(), search_var.get())
 
-    # Sort Logic
-    priority_order = {"Critical": 0, "Important": 1, "Planned": 2, "Review": 3, "Delegate": 4, "Trivial": 5}
-    all_tasks.sort(key=lambda x: priority_order.get(x['priority'], 99))
+    # Checks survive a refresh, but only for rows that are still visible
+    checked_task_ids.intersection_update(t.doc_id for t in all_tasks)
+    task_list_view.show(build_task_rows(all_tasks))
 
-    count = 0
-    for task in all_tasks:
-        row_id = task.doc_id
-        tag = 'evenrow' if count % 2 == 0 else 'oddrow'
-        cat_display = task.get('category', 'General')
-
-        tree.insert("", "end", iid=row_id, values=(
-            "☐", 
-            task['title'], 
-            cat_display,
-            task['priority'], 
-            task.get('status', 'Pending'), 
-            task['deadline']
-        ), tags=(tag,))
-        count += 1
-    
-    if filter_menu:
-        filter_menu.configure(values=get_all_categories())
+_search_after_id = None
+
+def on_search_changed(*args):
+    # Wait for a pause in typing; a newer keystroke cancels the pending refresh
+    global _search_after_id
+    if _search_after_id is not None:
+        app.after_cancel(_search_after_id)
+    _search_after_id = app.after(SEARCH_DEBOUNCE_MS, _run_search)
+
+def _run_search():
+    global _search_after_id
+    _search_after_id = None
+    refresh_task_list()
 
 def delete_selected_tasks():
     if tasks_table is None: return
@@ -718,7 +1717,7 @@ def delete_selected_tasks():
 
     confirm = messagebox.askyesno("Confirm Delete", f"Delete {len(checked_task_ids)} selected task(s)?")
     if confirm:
-        tasks_table.remove(doc_ids=list(checked_task_ids))
+        task_service.remove_tasks(checked_task_ids)
         refresh_task_list()
         update_filter_options() 
 
@@ -729,22 +1728,142 @@ def toggle_check(event):
     row_id = tree.identify_row(event.y)
     
     if col == "#1" and row_id:
-        current_vals = list(tree.item(row_id, "values"))
-        sym = current_vals[0]
         doc_id = int(row_id)
 
-        if sym == "☐":
-            current_vals[0] = "☑"
+        if doc_id not in checked_task_ids:
             checked_task_ids.add(doc_id)
+            task_list_view.set_check(row_id, "☑")
         else:
-            current_vals[0] = "☐"
-            if doc_id in checked_task_ids: checked_task_ids.remove(doc_id)
-        
-        tree.item(row_id, values=current_vals)
+            checked_task_ids.remove(doc_id)
+            task_list_view.set_check(row_id, "☐")
         return "break" 
 
+# Selection shortcuts work on the rows the list currently shows
+SELECT_OPTIONS = (["All Shown", "None", "Overdue", "Due Today"]
+                  + [f"Status: {s}" for s in TASK_STATUSES] + [f"Priority: {p}" for p in PRIORITY_ORDER])
+
+def shown_tasks():
+    return [task for task in (tasks_table.get(int(iid)) for iid, _ in task_list_view.rows) if task is not None]
+
+def select_matching(choice):
+    """Checks the shown tasks that match a SELECT_OPTIONS entry, replacing the current checks."""
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    if choice == "All Shown":
+        match = lambda task: True
+    elif choice == "None":
+        match = lambda task: False
+    elif choice == "Overdue":
+        match = lambda task: task['deadline'] < today and task.get('status') != "Completed"
+    elif choice == "Due Today":
+        match = lambda task: task['deadline'] == today
+    elif choice.startswith("Status: "):
+        match = lambda task: task.get('status', 'Pending') == choice[len("Status: "):]
+    else:
+        match = lambda task: task['priority'] == choice[len("Priority: "):]
+    checked_task_ids.clear()
+    checked_task_ids.update(task.doc_id for task in shown_tasks() if match(task))
+    task_list_view.refresh_checks()
+
+def on_select_menu(choice):
+    if tasks_table is not None:
+        select_matching(choice)
+    select_menu.set("Select")
+
+def toggle_check_all():
+    # Clicking the check column heading checks every shown row, or clears them if all are checked
+    if tasks_table is None: return
+    shown = {int(iid) for iid, _ in task_list_view.rows}
+    select_matching("None" if shown and shown <= checked_task_ids else "All Shown")
+
+def apply_bulk_edit(**edit):
+    """Applies one bulk edit to the checked tasks as a single batch; returns how many changed."""
+    if task_service is None or not checked_task_ids: return 0
+    changed = task_service.bulk_edit(sorted(checked_task_ids), **edit)
+    if changed:
+        refresh_task_list()
+        if 'category' in edit:
+            update_filter_options()
+    return len(changed)
+
 # --- 7. POPUP WINDOWS ---
 
+def open_bulk_edit_window():
+    if tasks_table is None: return
+    if not checked_task_ids:
+        messagebox.showwarning("No Selection", "Please check the box next to tasks to edit.")
+        return
+    win = ctk.CTkToplevel(app)
+    win.title("Bulk Edit")
+    center_window_to_parent(win, 420, 520)
+    win.grab_set()
+    win.attributes("-topmost", True)
+
+    frame = ctk.CTkFrame(win, corner_radius=15)
+    frame.pack(fill="both", expand=True, padx=20, pady=20)
+    ctk.CTkLabel(frame, text=f"{len(checked_task_ids)} checked task(s)", font=FONT_TITLE).pack(pady=(10, 5))
+
+    def apply(**edit):
+        count = apply_bulk_edit(**edit)
+        win.destroy()
+        messagebox.showinfo("Bulk Edit", f"Updated {count} task(s).", parent=app)
+
+    def section(title):
+        ctk.CTkLabel(frame, text=title, font=FONT_TITLE, text_color="#A0A0A0").pack(anchor="w", padx=15, pady=(10, 5))
+        row = ctk.CTkFrame(frame, fg_color="transparent")
+        row.pack(fill="x", padx=15)
+        return row
+
+    # 1. Status
+    row = section("Status")
+    combo_status = ctk.CTkComboBox(row, values=list(TASK_STATUSES), state="readonly", font=FONT_MAIN, height=35)
+    combo_status.set("Completed")
+    combo_status.pack(side="left", fill="x", expand=True)
+    ctk.CTkButton(row, text="Apply", width=70, font=FONT_BOLD,
+                  command=lambda: apply(status=combo_status.get())).pack(side="left", padx=(10, 0))
+
+    # 2. Category
+    row = section("Category")
+    combo_category = ctk.CTkComboBox(row, values=get_all_categories()[1:], font=FONT_MAIN, height=35)
+    combo_category.set("General")
+    combo_category.pack(side="left", fill="x", expand=True)
+    ctk.CTkButton(row, text="Apply", width=70, font=FONT_BOLD,
+                  command=lambda: apply(category=combo_category.get().strip() or "General")).pack(side="left", padx=(10, 0))
+
+    # 3. Impact & urgency; priority is recomputed for each task
+    row = section("Impact & Urgency")
+    combo_impact = ctk.CTkComboBox(row, values=["Keep"] + list(TASK_IMPACTS), state="readonly", font=FONT_MAIN,
+                                   height=35, width=110)
+    combo_impact.set("Keep")
+    combo_impact.pack(side="left")
+    combo_urgent = ctk.CTkComboBox(row, values=["Keep", "Urgent", "Not Urgent"], state="readonly", font=FONT_MAIN,
+                                   height=35, width=120)
+    combo_urgent.set("Keep")
+    combo_urgent.pack(side="left", padx=(10, 0))
+
+    def apply_priority():
+        impact = None if combo_impact.get() == "Keep" else combo_impact.get()
+        is_urgent = None if combo_urgent.get() == "Keep" else combo_urgent.get() == "Urgent"
+        if impact is None and is_urgent is None: return
+        apply(impact=impact, is_urgent=is_urgent)
+
+    ctk.CTkButton(row, text="Apply", width=70, font=FONT_BOLD, command=apply_priority).pack(side="right")
+
+    # 4. Deadline shift
+    row = section("Shift Deadline (days, negative moves earlier)")
+    entry_days = ctk.CTkEntry(row, font=FONT_MAIN, height=35)
+    entry_days.insert(0, "7")
+    entry_days.pack(side="left", fill="x", expand=True)
+
+    def apply_shift():
+        try:
+            days = int(entry_days.get().strip())
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter a whole number of days.", parent=win)
+            return
+        if days: apply(shift_days=days)
+
+    ctk.CTkButton(row, text="Apply", width=70, font=FONT_BOLD, command=apply_shift).pack(side="left", padx=(10, 0))
+
 def open_category_goal_window():
     selected_cat = filter_var.get()
     if selected_cat == "All Categories":
@@ -769,16 +1888,12 @@ def open_category_goal_window():
     txt_goal = ctk.CTkTextbox(goal_win, font=FONT_MAIN, height=120, wrap="word")
     txt_goal.pack(fill="x", padx=20, pady=(0, 10))
 
-    existing = goals_table.get(Query().category == selected_cat)
-    if existing and existing.get('goal', ''):
-        txt_goal.insert("1.0", existing['goal'])
+    existing = task_service.get_goal(selected_cat)
+    if existing:
+        txt_goal.insert("1.0", existing)
 
     def save_goal():
-        goal_text = txt_goal.get("1.0", "end-1c").strip()
-        if existing:
-            goals_table.update({'goal': goal_text}, Query().category == selected_cat)
-        else:
-            goals_table.insert({'category': selected_cat, 'goal': goal_text})
+        task_service.set_goal(selected_cat, txt_goal.get("1.0", "end-1c").strip())
         goal_win.destroy()
 
     btn_frame = ctk.CTkFrame(goal_win, fg_color="transparent")
@@ -829,19 +1944,13 @@ def open_task_window(task_id=None, task_data=None):
         if not title: return
         if not category.strip(): category = "General"
 
-        calculated_priority = get_priority(impact, is_urgent)
-        record = {
-            'title': title, 'impact': impact, 'category': category, 
-            'is_urgent': is_urgent, 'priority': calculated_priority, 'deadline': deadline,
-            'status': status,
-            'notes': notes,
-            'created_at': datetime.datetime.now().strftime("%Y-%m-%d") if not is_edit else task_data['created_at']
-        }
+        record = make_task(title, impact, category, is_urgent, deadline, status, notes,
+                           created_at=task_data['created_at'] if is_edit else None)
 
         if is_edit:
-            tasks_table.update(record, doc_ids=[task_id])
+            task_service.update_task(task_id, record)
         else:
-            tasks_table.insert(record)
+            task_service.add_task(record)
 
         refresh_task_list()
         update_filter_options()
@@ -879,8 +1988,8 @@ def open_task_window(task_id=None, task_data=None):
 
     # 5. Impact
     ctk.CTkLabel(frame, text="Impact", font=FONT_TITLE, text_color="#A0A0A0").pack(anchor="w", padx=15, pady=(0,5))
-    combo_impact = ctk.CTkComboBox(frame, values=["High", "Medium", "Low"], state="readonly", font=FONT_MAIN, height=35)
-    combo_impact.set("High")
+    combo_impact = ctk.CTkComboBox(frame, values=list(TASK_IMPACTS), state="readonly", font=FONT_MAIN, height=35)
+    combo_impact.set(DEFAULT_IMPACT)
     combo_impact.pack(fill="x", padx=15, pady=(0, 10))
 
     # 6. Urgent
@@ -921,8 +2030,530 @@ PLAN_CHATS_DIR = os.path.join(USER_DATA_DIR, "plan_chats")
 if not os.path.exists(PLAN_CHATS_DIR):
     os.makedirs(PLAN_CHATS_DIR)
 
+CLAUDE_MODEL = "claude-sonnet-4-6"
+GEMINI_MODEL = "gemini-2.0-flash"
+
+def current_ai_model(provider=None):
+    provider = provider or AI_PROVIDER
+    if provider == "Ollama":
+        return OLLAMA_MODEL
+    return GEMINI_MODEL if provider == "Gemini" else CLAUDE_MODEL
+
+PLAN_CACHE_FILE = os.path.join(USER_DATA_DIR, "plan_cache.json")
+PLAN_CACHE_MAX_ENTRIES = 50
+
+class PlanCache:
+    """Small on-disk LRU of generated plans, so an unchanged Plan My Day request returns instantly."""
+    def __init__(self, path, max_entries=PLAN_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = None  # key -> {"plan", "created", "used"}, least recently used first
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                data = read_json_file(self.path)
+            except (OSError, ValueError):
+                data = {}
+            self._entries = dict(sorted(data.items(), key=lambda item: item[1].get("used", 0)))
+        return self._entries
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def get(self, key, ttl_hours):
+        """Returns (plan, created timestamp) for a fresh entry, or None."""
+        if ttl_hours <= 0:
+            return None
+        with self._lock:
+            entries = self._load()
+            entry = entries.pop(key, None)
+            if entry is None:
+                return None
+            if time.time() - entry["created"] > ttl_hours * 3600:
+                self._save()
+                return None
+            entry["used"] = time.time()
+            entries[key] = entry
+            self._save()
+            return entry["plan"], entry["created"]
+
+    def put(self, key, plan):
+        with self._lock:
+            entries = self._load()
+            entries.pop(key, None)
+            now = time.time()
+            entries[key] = {"plan": plan, "created": now, "used": now}
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            count = len(self._load())
+            self._entries = {}
+            self._save()
+            return count
+
+plan_cache = PlanCache(PLAN_CACHE_FILE)
+
+def plan_cache_key(system_prompt, incomplete, goals, provider):
+    """Hashes everything a plan depends on, including the provider that writes it; task order
+    and key order don't affect the key."""
+    tasks = sorted(
+        [t.get('title', ''), t.get('priority', ''), t.get('status', 'Pending'),
+         t.get('category', 'General'), t.get('deadline', ''), t.get('notes', '').strip()]
+        for t in incomplete
+    )
+    payload = {
+        "prompt": system_prompt,
+        "tasks": tasks,
+        "hours": [WORKING_HOURS, PEAK_HOURS, WIND_DOWN_HOURS],
+        "goals": goals,
+        "provider": provider,
+        "model": current_ai_model(provider),
+        "date": datetime.date.today().isoformat(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+# Transcripts are append-only JSONL: a session header, then one record per message (plus
+# "reset" records from Regenerate and the latest cache "stats"). index.jsonl holds one small
+# entry per session so Past Plans can list thousands of sessions without opening them;
+# the last entry for a session wins.
+PLAN_TRANSCRIPT_SUFFIX = ".jsonl"
+PLAN_INDEX_FILE = os.path.join(PLAN_CHATS_DIR, "index.jsonl")
+PLAN_SUMMARY_MAX_CHARS = 100
+
+_plan_index_lock = threading.Lock()  # Chat windows and background maintenance both write the index
+
+def _append_jsonl(path, records):
+    if records:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+
+def _iter_jsonl(lines):
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue  # A line torn by a crash mid-append
+
+def plan_summary(messages):
+    """First non-empty line of the first plan; the planner is asked to open with a one-line summary."""
+    for msg in messages:
+        if msg["role"] == "assistant":
+            for line in msg["content"].splitlines():
+                line = line.strip().strip("#*").strip()
+                if line:
+                    return truncate_text(line, PLAN_SUMMARY_MAX_CHARS)
+    return ""
+
+def plan_index_entry(session_id, date, messages, provider=None, model=None):
+    replies = [m for m in messages if m["role"] == "assistant"]
+    return {
+        "id": session_id,
+        "date": date,
+        "provider": provider or (replies[-1].get("provider") if replies else None) or AI_PROVIDER,
+        "model": model or current_ai_model(),
+        "turns": sum(1 for m in messages if m["role"] == "user"),
+        "summary": plan_summary(messages),
+    }
+
+def load_plan_index():
+    """Returns {session id: index entry}, indexing any older one-file-per-session .json chats on first sight."""
+    with _plan_index_lock:
+        return _load_plan_index()
+
+def _load_plan_index():
+    entries = {}
+    line_count = 0
+    try:
+        with open(PLAN_INDEX_FILE, "r", encoding="utf-8") as f:
+            for entry in _iter_jsonl(f):
+                line_count += 1
+                if entry.get("deleted"):
+                    entries.pop(entry["id"], None)
+                else:
+                    entries[entry["id"]] = entry
+    except FileNotFoundError:
+        pass
+    for session_id in [i for i in entries if i.endswith(".json")]:
+        if session_id[:-len(".json")] + PLAN_TRANSCRIPT_SUFFIX in entries:
+            del entries[session_id]
+    legacy = []
+    for name in os.listdir(PLAN_CHATS_DIR):
+        if name.startswith("plan_") and name.endswith(".json") and name not in entries \
+                and name[:-len(".json")] + PLAN_TRANSCRIPT_SUFFIX not in entries:
+            try:
+                data = read_json_file(os.path.join(PLAN_CHATS_DIR, name))
+                entry = plan_index_entry(name, data.get("date", ""), data.get("messages", []),
+                                         data.get("provider"), data.get("model"))
+            except (OSError, ValueError, KeyError, AttributeError):
+                continue
+            entries[name] = entry
+            legacy.append(entry)
+    if line_count > 2 * len(entries) + 100:
+        # Mostly superseded entries: rewrite the index with one line per session
+        tmp_path = PLAN_INDEX_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries.values()))
+        os.replace(tmp_path, PLAN_INDEX_FILE)
+    else:
+        _append_jsonl(PLAN_INDEX_FILE, legacy)
+    return entries
+
+def load_plan_transcript(session_id):
+    """Reads one session, loose or archived: {"id", "date", "system_prompt", "messages", "cache_stats"}."""
+    path = os.path.join(PLAN_CHATS_DIR, session_id)
+    saved = True
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        month = plan_session_month(session_id)
+        data = PlanArchive(month).read(session_id) if month else None
+        if data is None:
+            raise
+        text = data.decode("utf-8")
+        saved = False  # Continuing an archived chat starts a fresh loose transcript
+    if session_id.endswith(".json"):
+        # Older chats: continuing one starts a JSONL transcript under the same name
+        data = json.loads(text)
+        return {"id": session_id[:-len(".json")] + PLAN_TRANSCRIPT_SUFFIX, "date": data.get("date", ""),
+                "system_prompt": PLAN_SYSTEM_PROMPT, "messages": data.get("messages", []),
+                "cache_stats": data.get("cache_stats"), "saved": False}
+    session = {"id": session_id, "date": "", "system_prompt": PLAN_SYSTEM_PROMPT,
+               "messages": [], "cache_stats": None, "saved": saved}
+    for record in _iter_jsonl(text.splitlines()):
+        kind = record.pop("type", None)
+        if kind == "session":
+            session["date"] = record.get("date", "")
+            session["system_prompt"] = record.get("system_prompt") or PLAN_SYSTEM_PROMPT
+        elif kind == "message":
+            session["messages"].append(record)
+        elif kind == "reset":
+            del session["messages"][record["keep"]:]
+        elif kind == "stats":
+            session["cache_stats"] = record["cache_stats"]
+    return session
+
+# Retention: sessions older than PLAN_ARCHIVE_AFTER_DAYS move into one compressed archive per
+# month. Each session is compressed on its own and listed in the archive's offset table, so
+# one session can be read without unpacking the rest of the month.
+PLAN_ARCHIVE_DIR = os.path.join(PLAN_CHATS_DIR, "archive")
+PLAN_ARCHIVE_SUFFIX = ".zarc"
+PLAN_ARCHIVE_MIN_IDLE_SECONDS = 3600  # Leave recently written sessions alone, they may still be open
+PLAN_MAINTENANCE_DELAY_MS = 3000
+_PLAN_SESSION_DATE = re.compile(r"^plan_(\d{4}-\d{2}-\d{2})_\d{6}")
+
+def plan_session_month(session_id):
+    match = _PLAN_SESSION_DATE.match(session_id)
+    return match.group(1)[:7] if match else None
+
+class PlanArchive:
+    """Archived sessions for one month: zlib-compressed members back to back in plans-<month>.zarc,
+    with an offset table (session id -> [offset, length]) in plans-<month>.offsets.json."""
+    def __init__(self, month):
+        self.path = os.path.join(PLAN_ARCHIVE_DIR, f"plans-{month}{PLAN_ARCHIVE_SUFFIX}")
+        self.table_path = os.path.join(PLAN_ARCHIVE_DIR, f"plans-{month}.offsets.json")
+
+    def table(self):
+        try:
+            return read_json_file(self.table_path)
+        except ValueError:
+            return {}
+
+    def _write_table(self, table):
+        tmp_path = self.table_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(table, f)
+        os.replace(tmp_path, self.table_path)
+
+    def read(self, session_id):
+        location = self.table().get(session_id)
+        if location is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(location[0])
+            return zlib.decompress(f.read(location[1]))
+
+    def add(self, sessions):
+        """Appends {session id: raw bytes}; a session archived before is superseded by the new copy."""
+        os.makedirs(PLAN_ARCHIVE_DIR, exist_ok=True)
+        table = self.table()
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            for session_id, data in sessions.items():
+                member = zlib.compress(data, 9)
+                f.write(member)
+                table[session_id] = [offset, len(member)]
+                offset += len(member)
+            f.flush()
+            os.fsync(f.fileno())
+        # The table is only written once the members are safely on disk
+        self._write_table(table)
+
+    def remove(self, session_ids):
+        """Drops sessions and rewrites the archive without them (or deletes it once empty)."""
+        table = self.table()
+        keep = {sid: loc for sid, loc in table.items() if sid not in session_ids}
+        if not keep:
+            for path in (self.table_path, self.path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return
+        tmp_path = self.path + ".tmp"
+        new_table = {}
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+            for session_id, (offset, length) in sorted(keep.items(), key=lambda item: item[1][0]):
+                src.seek(offset)
+                new_table[session_id] = [dst.tell(), length]
+                dst.write(src.read(length))
+        os.replace(tmp_path, self.path)
+        self._write_table(new_table)
+
+    def sizes(self):
+        """Compressed size of each live session, plus any space held by superseded copies."""
+        table = self.table()
+        sizes = {sid: length for sid, (offset, length) in table.items()}
+        if os.path.exists(self.path):
+            sizes[None] = max(0, os.path.getsize(self.path) - sum(sizes.values()))
+        return sizes
+
+def _plan_archive_months():
+    if not os.path.isdir(PLAN_ARCHIVE_DIR):
+        return []
+    return sorted(name[len("plans-"):-len(PLAN_ARCHIVE_SUFFIX)] for name in os.listdir(PLAN_ARCHIVE_DIR)
+                  if name.startswith("plans-") and name.endswith(PLAN_ARCHIVE_SUFFIX))
+
+def maintain_plan_chats():
+    """Archives old plan chats by month, then deletes the oldest sessions while history is over its size cap."""
+    load_plan_index()  # Make sure older .json chats are indexed before they move into an archive
+    now = time.time()
+    cutoff = (datetime.date.today() - datetime.timedelta(days=PLAN_ARCHIVE_AFTER_DAYS)).isoformat()
+    loose = {}
+    to_archive = {}
+    for name in os.listdir(PLAN_CHATS_DIR):
+        month = plan_session_month(name)
+        path = os.path.join(PLAN_CHATS_DIR, name)
+        if month is None or not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        loose[name] = stat.st_size
+        if name[len("plan_"):len("plan_") + 10] < cutoff and now - stat.st_mtime > PLAN_ARCHIVE_MIN_IDLE_SECONDS:
+            to_archive.setdefault(month, []).append(name)
+
+    for month, names in sorted(to_archive.items()):
+        sessions = {}
+        for name in names:
+            with open(os.path.join(PLAN_CHATS_DIR, name), "rb") as f:
+                sessions[name] = f.read()
+        PlanArchive(month).add(sessions)
+        for name in names:
+            os.remove(os.path.join(PLAN_CHATS_DIR, name))
+            del loose[name]
+
+    # Size cap: loose transcripts plus archives, oldest sessions evicted first
+    archived = {month: PlanArchive(month).sizes() for month in _plan_archive_months()}
+    total = sum(loose.values()) + sum(sum(sizes.values()) for sizes in archived.values())
+    limit = PLAN_CHATS_MAX_MB * 1024 * 1024
+    if total <= limit:
+        return
+    sessions = [(name, loose[name], None) for name in loose]
+    for month, sizes in archived.items():
+        sessions.extend((sid, size, month) for sid, size in sizes.items() if sid is not None)
+    evicted = []
+    evicted_by_month = {}
+    for session_id, size, month in sorted(sessions):
+        if total <= limit:
+            break
+        if month is None:
+            os.remove(os.path.join(PLAN_CHATS_DIR, session_id))
+        else:
+            evicted_by_month.setdefault(month, set()).add(session_id)
+        evicted.append(session_id)
+        total -= size
+    for month, session_ids in evicted_by_month.items():
+        PlanArchive(month).remove(session_ids)  # Rewriting also reclaims superseded copies
+    with _plan_index_lock:
+        _append_jsonl(PLAN_INDEX_FILE, [{"id": session_id, "deleted": True} for session_id in evicted])
+
+def start_plan_chat_maintenance():
+    def run():
+        try:
+            maintain_plan_chats()
+        except OSError:
+            pass  # Try again next launch
+    threading.Thread(target=run, daemon=True).start()
+
+STREAM_FRAME_MS = 33
+
+class AIStream:
+    """Streams one AI reply on the AI executor; the UI drains the buffered text once per frame.
+
+    Transient failures are retried with backoff as long as no text has arrived yet, since a
+    reply that has already started can't be resumed without repeating itself.
+    """
+    def __init__(self, system_prompt, messages, provider=None):
+        self.system_prompt = system_prompt
+        self.messages = list(messages)
+        self.provider = provider or AI_PROVIDER
+        self.received = False
+        self.error = None
+        self.timing = None
+        self.retries = 0
+        self.done = False
+        self.future = None
+        self.last_activity = time.monotonic()
+        self._chunks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        self.future = ai_executor.submit(self.run)
+        return self
+
+    def run(self):
+        while not self._stop.is_set():
+            self.last_activity = time.monotonic()
+            stream = _stream_ai(self.system_prompt, self.messages, self.provider)
+            try:
+                for chunk in stream:
+                    if self._stop.is_set():
+                        break
+                    self.received = True
+                    self.last_activity = time.monotonic()
+                    with self._lock:
+                        self._chunks.append(chunk)
+                break
+            except Exception as e:
+                if self.received or self.retries >= AI_MAX_RETRIES or not is_transient_ai_error(e):
+                    self.error = str(e)
+                    break
+                self.last_activity = time.monotonic()
+                if self._stop.wait(ai_retry_delay(self.retries)):
+                    break
+                self.retries += 1
+            finally:
+                stream.close()
+        self.timing = last_ai_timing()
+        self.done = True
+
+    def stalled(self):
+        """True once nothing has arrived for longer than the provider's timeout allows."""
+        limit = AI_TIMEOUT_SECONDS.get(self.provider, 60) + AI_CONNECT_TIMEOUT_SECONDS + 5
+        return not self.done and time.monotonic() - self.last_activity > limit
+
+    def drain(self):
+        with self._lock:
+            text = "".join(self._chunks)
+            self._chunks.clear()
+        return text
+
+    def stop(self):
+        self._stop.set()
+        if self.future is not None:
+            self.future.cancel()
+
+class HedgedAIStream:
+    """Fastest-available mode: races the configured providers for one reply.
+
+    The primary provider starts at once. The next one joins after HEDGE_DELAY_MS, or as soon
+    as every running attempt has failed. The first attempt to produce text wins and the rest
+    are stopped. Offers the same interface as AIStream.
+    """
+    def __init__(self, system_prompt, messages, providers):
+        self.system_prompt = system_prompt
+        self.messages = list(messages)
+        self.providers = list(providers)
+        self.attempts = []
+        self.winner = None
+        self.error = None
+        self.timing = None
+        self.done = False
+        self._stop = threading.Event()
+
+    @property
+    def provider(self):
+        return self.winner.provider if self.winner else self.providers[0]
+
+    @property
+    def retries(self):
+        return self.winner.retries if self.winner else 0
+
+    def start(self):
+        # The coordinator only watches the attempts, so it stays off the executor and can't
+        # take a worker slot away from the requests it is waiting on
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def run(self):
+        pending = list(self.providers)
+        next_start = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            running = [a for a in self.attempts if not a.done]
+            if pending and (not running or now >= next_start):
+                self.attempts.append(AIStream(self.system_prompt, self.messages, pending.pop(0)).start())
+                next_start = now + HEDGE_DELAY_MS / 1000
+                continue
+            self.winner = next((a for a in self.attempts if a.received or (a.done and not a.error)), None)
+            if self.winner or not (running or pending):
+                break
+            self._stop.wait(0.02)
+        for attempt in self.attempts:
+            if attempt is not self.winner:
+                attempt.stop()
+        if self.winner:
+            while not self.winner.done and not self._stop.wait(0.05):
+                pass
+            self.error = self.winner.error
+            self.timing = self.winner.timing
+        elif not self._stop.is_set():
+            self.error = "; ".join(f"{a.provider}: {a.error}" for a in self.attempts)
+        self.done = True
+
+    def stalled(self):
+        if self.winner:
+            return self.winner.stalled()
+        return bool(self.attempts) and len(self.attempts) == len(self.providers) and all(
+            a.stalled() for a in self.attempts)
+
+    def drain(self):
+        return self.winner.drain() if self.winner else ""
+
+    def stop(self):
+        self._stop.set()
+        for attempt in self.attempts:
+            attempt.stop()
+
+def available_ai_providers():
+    """The selected provider followed by every other provider that has a key or model configured."""
+    configured = [name for name, setting in (("Claude", ANTHROPIC_API_KEY), ("Gemini", GEMINI_API_KEY),
+                                             ("Ollama", OLLAMA_MODEL)) if setting]
+    return [AI_PROVIDER] + [name for name in configured if name != AI_PROVIDER]
+
+def racing_ai_providers():
+    """The providers a new request may be answered by: every available one in fastest-available
+    mode, otherwise just the selected one."""
+    providers = available_ai_providers()
+    return providers if AI_FASTEST_AVAILABLE and len(providers) > 1 else [AI_PROVIDER]
+
+def new_ai_stream(system_prompt, messages):
+    providers = racing_ai_providers()
+    if len(providers) > 1:
+        return HedgedAIStream(system_prompt, messages, providers)
+    return AIStream(system_prompt, messages)
+
 class PlanChatWindow(ctk.CTkToplevel):
-    def __init__(self, parent, system_prompt, messages):
+    def __init__(self, parent, system_prompt, messages, cache_keys=None, cached_at=None, session=None):
         super().__init__(parent)
         self.title("Plan My Day")
         width, height = 650, 600
@@ -930,15 +2561,32 @@ class PlanChatWindow(ctk.CTkToplevel):
 
         self.system_prompt = system_prompt
         self.messages = list(messages)
-        self.chat_file = os.path.join(
-            PLAN_CHATS_DIR,
-            f"plan_{datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json"
-        )
+        self.cache_stats = {"requests": 0, "hits": 0, "input_tokens": 0, "cached_tokens": 0,
+                            "hit_first_token_ms": [], "miss_first_token_ms": []}
+        self.cache_keys = cache_keys or {}  # Provider -> plan cache key; the plan is cached under whoever answers
+        self.stream = None
+        self.stream_text = ""
+        self._pump_job = None
+        if session:
+            # Reopened from Past Plans: keep appending to the same transcript
+            self.session_id = session["id"]
+            self.session_date = session["date"]
+            self.cache_stats.update(session.get("cache_stats") or {})
+            self._saved_count = len(self.messages) if session.get("saved", True) else None
+        else:
+            now = datetime.datetime.now()
+            self.session_id = f"plan_{now.strftime('%Y-%m-%d_%H%M%S')}{PLAN_TRANSCRIPT_SUFFIX}"
+            self.session_date = now.strftime("%Y-%m-%d %H:%M:%S")
+            self._saved_count = None  # Nothing written yet, not even the session header
+        self._reset_keep = None
 
         ctk.CTkLabel(self, text="Plan My Day", font=FONT_HEADER).pack(pady=(15, 5))
 
         self.chat_display = ctk.CTkTextbox(self, font=FONT_MAIN, wrap="word", state="disabled")
-        self.chat_display.pack(fill="both", expand=True, padx=15, pady=(0, 10))
+        self.chat_display.pack(fill="both", expand=True, padx=15, pady=(0, 5))
+
+        self.lbl_latency = ctk.CTkLabel(self, text="", font=FONT_MAIN, text_color="#A0A0A0")
+        self.lbl_latency.pack(anchor="e", padx=15)
 
         input_frame = ctk.CTkFrame(self, fg_color="transparent")
         input_frame.pack(fill="x", padx=15, pady=(0, 10))
@@ -958,112 +2606,330 @@ class PlanChatWindow(ctk.CTkToplevel):
         ctk.CTkButton(btn_frame, text="Close", command=self.destroy,
                        fg_color="#FF3B30", hover_color="#d32f2f", font=FONT_BOLD,
                        width=100).pack(side="right")
+        self.btn_regenerate = ctk.CTkButton(btn_frame, text="Regenerate", command=self._regenerate,
+                                            fg_color="#555555", hover_color="#666666", font=FONT_BOLD,
+                                            width=100)
+        self.btn_regenerate.pack(side="left")
 
         for msg in self.messages:
             self._append_to_display(msg["role"], msg["content"])
+        if cached_at:
+            cached_time = datetime.datetime.fromtimestamp(cached_at).strftime("%I:%M %p")
+            self.lbl_latency.configure(text=f"Cached {self.messages[-1].get('provider', AI_PROVIDER)} plan from "
+                                            f"{cached_time}. Regenerate for a fresh one.")
+        elif session:
+            self.lbl_latency.configure(text=f"Plan from {self.session_date}")
 
-        self._save_chat()
+        # Transcripts start once there is a plan; a fresh request is saved when its reply completes
+        if self.messages and self.messages[-1]["role"] == "assistant":
+            self._save_chat()
+
+        # A conversation that ends on the user's turn (a fresh plan) streams its first reply right away
+        if self.messages and self.messages[-1]["role"] == "user":
+            self._start_stream()
 
     def _append_to_display(self, role, content):
+        self._begin_display_turn(role)
+        self._append_display_text(content)
+
+    def _begin_display_turn(self, role):
         self.chat_display.configure(state="normal")
         if self.chat_display.get("1.0", "end-1c"):
             self.chat_display.insert("end", "\n\n")
         label = "You" if role == "user" else "Planner"
         self.chat_display.insert("end", f"--- {label} ---\n")
-        self.chat_display.insert("end", content)
+        self.chat_display.configure(state="disabled")
+
+    def _append_display_text(self, text):
+        self.chat_display.configure(state="normal")
+        self.chat_display.insert("end", text)
         self.chat_display.configure(state="disabled")
         self.chat_display.see("end")
 
     def _send_message(self):
         user_text = self.entry.get().strip()
-        if not user_text:
+        if not user_text or self.stream is not None:
             return
         self.entry.delete(0, "end")
         self.messages.append({"role": "user", "content": user_text})
         self._append_to_display("user", user_text)
-
-        self.btn_send.configure(state="disabled", text="...")
+        self._start_stream()
+
+    def _start_stream(self):
+        self.stream_text = ""
+        self.stream = new_ai_stream(self.system_prompt, self.messages).start()
+        self._begin_display_turn("assistant")
+        self.btn_send.configure(text="Stop", command=self._stop_stream,
+                                fg_color="#FF9500", hover_color="#e08600")
         self.entry.configure(state="disabled")
+        self.btn_regenerate.configure(state="disabled")
+        if isinstance(self.stream, HedgedAIStream):
+            self.lbl_latency.configure(text=f"Generating via the fastest of {', '.join(self.stream.providers)}...")
+        else:
+            self.lbl_latency.configure(text=f"Generating via {self.stream.provider}...")
+        self._pump_stream()
+
+    def _pump_stream(self):
+        self._pump_job = None
+        text = self.stream.drain()
+        if text:
+            self.stream_text += text
+            self._append_display_text(text)
+        if self.stream.done:
+            self._finish_stream()
+        elif self.stream.stalled():
+            self.stream.stop()
+            self.stream.error = f"No response from {self.stream.provider} (timed out)."
+            self._finish_stream()
+        else:
+            if self.stream.retries and not self.stream_text:
+                self.lbl_latency.configure(
+                    text=f"{self.stream.provider} busy, retrying ({self.stream.retries}/{AI_MAX_RETRIES})...")
+            self._pump_job = self.after(STREAM_FRAME_MS, self._pump_stream)
+
+    def _stop_stream(self):
+        """Cancels the reply in progress and keeps whatever text has arrived so far."""
+        if self.stream is None:
+            return
+        self.stream.stop()
+        if self._pump_job is not None:
+            self.after_cancel(self._pump_job)
+            self._pump_job = None
+        text = self.stream.drain()
+        if text:
+            self.stream_text += text
+            self._append_display_text(text)
+        self._finish_stream(stopped=True)
+
+    def _finish_stream(self, stopped=False):
+        stream, self.stream = self.stream, None
+        if not self.stream_text and (stopped or stream.error):
+            self._drop_turn(None if stopped else stream.error)
+            return
+        if stopped:
+            self._append_display_text("\n[Stopped]")
+        elif stream.error:
+            self._append_display_text(f"\n[Error: {stream.error}]")
+        reply = {"role": "assistant", "content": self.stream_text, "provider": stream.provider}
+        self.messages.append(reply)
+        cache_key = self.cache_keys.get(stream.provider)
+        if cache_key and len(self.messages) == 2 and not (stopped or stream.error):
+            plan_cache.put(cache_key, self.stream_text)
+        if stream.timing and not stopped:
+            reply["timing"] = stream.timing
+            self._update_cache_stats(stream.timing)
+            self.lbl_latency.configure(text=format_ai_timing(stream.timing))
+        else:
+            self.lbl_latency.configure(text="")
+        self._reset_input()
+        self._save_chat()
 
-        def call_api():
-            try:
-                response_text = _call_ai(self.system_prompt, self.messages)
-                self.after(0, lambda: self._on_response(response_text))
-            except Exception as e:
-                self.after(0, lambda: self._on_error(str(e)))
-
-        threading.Thread(target=call_api, daemon=True).start()
-
-    def _on_response(self, response_text):
-        self.messages.append({"role": "assistant", "content": response_text})
-        self._append_to_display("assistant", response_text)
-        self.btn_send.configure(state="normal", text="Send")
+    def _update_cache_stats(self, timing):
+        """Tallies prompt-cache hits for this session, with time to first token on hits vs misses."""
+        if "cached_tokens" not in timing:
+            return
+        stats = self.cache_stats
+        hit = timing["cached_tokens"] > 0
+        stats["requests"] += 1
+        stats["hits"] += int(hit)
+        stats["input_tokens"] += timing["input_tokens"]
+        stats["cached_tokens"] += timing["cached_tokens"]
+        if "first_token_ms" in timing:
+            stats["hit_first_token_ms" if hit else "miss_first_token_ms"].append(timing["first_token_ms"])
+
+    def _reset_input(self):
+        self.btn_send.configure(text="Send", command=self._send_message,
+                                fg_color="#007AFF", hover_color="#0062cc")
         self.entry.configure(state="normal")
+        self.btn_regenerate.configure(state="normal")
         self.entry.focus()
-        self._save_chat()
 
-    def _on_error(self, error_msg):
+    def _regenerate(self):
+        """Discards the conversation and asks for a fresh plan, bypassing the plan cache."""
+        if self.stream is not None:
+            return
+        self.messages = self.messages[:1]
+        if self._saved_count:
+            self._reset_keep = 1
+        self.chat_display.configure(state="normal")
+        self.chat_display.delete("1.0", "end")
+        self.chat_display.configure(state="disabled")
+        self._append_to_display("user", self.messages[0]["content"])
+        self._start_stream()
+
+    def _drop_turn(self, error_msg=None):
+        """Removes a user turn that got no reply, after an error or a Stop before any text arrived."""
         self.messages.pop()
-        self._append_to_display("assistant", f"[Error: {error_msg}]")
-        self.btn_send.configure(state="normal", text="Send")
-        self.entry.configure(state="normal")
+        self.lbl_latency.configure(text="")
+        if not any(m["role"] == "assistant" for m in self.messages):
+            # The first plan never arrived, so there is no conversation to keep open
+            if error_msg:
+                messagebox.showerror("Error", f"Failed to generate plan:\n{error_msg}", parent=self.master)
+            self.destroy()
+            return
+        self._append_display_text(f"[Error: {error_msg}]" if error_msg else "[Stopped]")
+        self._reset_input()
+
+    def destroy(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream = None
+        if self._pump_job is not None:
+            self.after_cancel(self._pump_job)
+            self._pump_job = None
+        super().destroy()
 
     def _save_chat(self):
-        data = {
-            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "provider": AI_PROVIDER,
-            "model": OLLAMA_MODEL if AI_PROVIDER == "Ollama" else AI_PROVIDER,
-            "messages": self.messages,
-        }
+        """Appends the messages not yet written to this session's transcript and refreshes its index entry."""
+        records = []
+        if self._saved_count is None:
+            records.append({"type": "session", "date": self.session_date, "provider": AI_PROVIDER,
+                            "model": current_ai_model(), "fastest_available": AI_FASTEST_AVAILABLE,
+                            "system_prompt": self.system_prompt})
+            self._saved_count = 0
+        if self._reset_keep is not None:
+            # Regenerate dropped everything after the first message(s)
+            records.append({"type": "reset", "keep": self._reset_keep})
+            self._saved_count = self._reset_keep
+            self._reset_keep = None
+        records.extend(dict(msg, type="message") for msg in self.messages[self._saved_count:])
+        if self.cache_stats["requests"]:
+            records.append({"type": "stats", "cache_stats": self.cache_stats})
         try:
-            with open(self.chat_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception:
+            _append_jsonl(os.path.join(PLAN_CHATS_DIR, self.session_id), records)
+            self._saved_count = len(self.messages)
+            with _plan_index_lock:
+                _append_jsonl(PLAN_INDEX_FILE, [plan_index_entry(self.session_id, self.session_date, self.messages)])
+        except OSError:
             pass
 
-def _call_claude(system_prompt, messages):
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model="claude-sonnet-4-6",
+# The system prompt and the first (task list) message stay the same for a whole chat session,
+# so each provider is asked to cache that prefix and only the newer turns are processed fresh.
+GEMINI_CACHE_TTL_SECONDS = 600
+GEMINI_MIN_CACHE_TOKENS = 4096  # Gemini rejects explicit caches smaller than this
+OLLAMA_KEEP_ALIVE = "30m"  # Keeps the model, and its prompt cache, loaded between turns
+_gemini_prefix_caches = {}  # (model, key, prefix hash) -> (cache name or None, expiry)
+_gemini_cache_lock = threading.Lock()
+
+def _stream_claude(system_prompt, messages):
+    ephemeral = {"type": "ephemeral"}
+    # Breakpoints after the task list and after the previous reply: the stable prefix and the
+    # conversation so far are read from the cache, and only the new turn is processed fresh.
+    breakpoints = {0, len(messages) - 2}
+    claude_messages = []
+    for i, msg in enumerate(messages):
+        if i in breakpoints:
+            content = [{"type": "text", "text": msg["content"], "cache_control": ephemeral}]
+        else:
+            content = msg["content"]
+        claude_messages.append({"role": msg["role"], "content": content})
+    with get_ai_client("Claude").messages.stream(
+        model=CLAUDE_MODEL,
         max_tokens=2048,
-        system=system_prompt,
-        messages=messages,
-    )
-    return response.content[0].text
+        system=[{"type": "text", "text": system_prompt, "cache_control": ephemeral}],
+        messages=claude_messages,
+    ) as stream:
+        yield from stream.text_stream
+        usage = stream.get_final_message().usage
+        cache_read = usage.cache_read_input_tokens or 0
+        _record_ai_usage(usage.input_tokens + cache_read + (usage.cache_creation_input_tokens or 0), cache_read)
+
+def _gemini_prefix_cache(system_prompt, first_content):
+    """Returns the name of an explicit Gemini cache holding the system prompt and task list, or None."""
+    prefix = system_prompt + first_content.parts[0].text
+    if estimate_tokens(prefix, "Gemini") < GEMINI_MIN_CACHE_TOKENS:
+        return None
+    key = (GEMINI_MODEL, GEMINI_API_KEY, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+    with _gemini_cache_lock:
+        name, expires = _gemini_prefix_caches.get(key, (None, 0))
+        if time.time() < expires - 30:
+            return name
+        genai_types = load_ai_sdk("google.genai.types")
+        try:
+            name = get_ai_client("Gemini").caches.create(
+                model=GEMINI_MODEL,
+                config=genai_types.CreateCachedContentConfig(
+                    system_instruction=system_prompt,
+                    contents=[first_content],
+                    ttl=f"{GEMINI_CACHE_TTL_SECONDS}s",
+                ),
+            ).name
+        except Exception:
+            name = None  # Model without explicit caching; send uncached until the entry expires
+        _gemini_prefix_caches[key] = (name, time.time() + GEMINI_CACHE_TTL_SECONDS)
+        return name
 
-def _call_gemini(system_prompt, messages):
-    client = genai.Client(api_key=GEMINI_API_KEY)
+def _stream_gemini(system_prompt, messages):
+    genai_types = load_ai_sdk("google.genai.types")
     contents = []
     for msg in messages:
         role = "user" if msg["role"] == "user" else "model"
         contents.append(genai_types.Content(role=role, parts=[genai_types.Part(text=msg["content"])]))
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
+    cache_name = _gemini_prefix_cache(system_prompt, contents[0])
+    if cache_name:
+        contents = contents[1:]
+        config = genai_types.GenerateContentConfig(cached_content=cache_name, max_output_tokens=2048)
+    else:
+        config = genai_types.GenerateContentConfig(system_instruction=system_prompt, max_output_tokens=2048)
+    usage = None
+    for chunk in get_ai_client("Gemini").models.generate_content_stream(
+        model=GEMINI_MODEL,
         contents=contents,
-        config=genai_types.GenerateContentConfig(
-            system_instruction=system_prompt,
-            max_output_tokens=2048,
-        ),
-    )
-    return response.text
-
-def _call_ollama(system_prompt, messages):
+        config=config,
+    ):
+        usage = chunk.usage_metadata or usage
+        if chunk.text:
+            yield chunk.text
+    if usage is not None:
+        # Gemini leaves the cached count out when nothing came from the cache
+        _record_ai_usage(usage.prompt_token_count, usage.cached_content_token_count or 0)
+
+def _stream_ollama(system_prompt, messages):
     ollama_messages = [{"role": "system", "content": system_prompt}] + messages
-    response = ollama.chat(
+    for part in get_ai_client("Ollama").chat(
         model=OLLAMA_MODEL,
         messages=ollama_messages,
-    )
-    return response["message"]["content"]
-
-def _call_ai(system_prompt, messages):
-    if AI_PROVIDER == "Ollama":
-        return _call_ollama(system_prompt, messages)
-    elif AI_PROVIDER == "Gemini":
-        return _call_gemini(system_prompt, messages)
+        stream=True,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+    ):
+        if part["message"]["content"]:
+            yield part["message"]["content"]
+        if part.get("done"):
+            # Ollama reports how many prompt tokens it evaluated, but not how many its cache held
+            _record_ai_usage(part.get("prompt_eval_count"))
+
+def _stream_ai(system_prompt, messages, provider=None):
+    """Yields reply text chunks from the provider (the configured one by default) as they arrive."""
+    provider = provider or AI_PROVIDER
+    messages = [{"role": m["role"], "content": m["content"]} for m in messages]
+    messages = fit_messages_to_budget(system_prompt, messages, provider)
+    if provider == "Ollama":
+        chunks = _stream_ollama(system_prompt, messages)
+    elif provider == "Gemini":
+        chunks = _stream_gemini(system_prompt, messages)
     else:
-        return _call_claude(system_prompt, messages)
+        chunks = _stream_claude(system_prompt, messages)
+    with timed_ai_request(provider) as timing:
+        timing["input_tokens_est"] = estimate_request_tokens(system_prompt, messages, provider)
+        start = time.perf_counter()
+        try:
+            for chunk in chunks:
+                if "first_token_ms" not in timing:
+                    timing["first_token_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                yield chunk
+        finally:
+            chunks.close()
+
+_plan_window = None
 
 def plan_my_day():
+    global _plan_window
+    # One plan in flight at a time: a second click while generating just brings the window back
+    if _plan_window is not None and _plan_window.winfo_exists() and _plan_window.stream is not None:
+        _plan_window.lift()
+        _plan_window.focus()
+        return
+
     if AI_PROVIDER == "Claude" and not ANTHROPIC_API_KEY:
         messagebox.showwarning("API Key Missing",
                                "Please set your Anthropic API key in Settings first.",
@@ -1080,100 +2946,104 @@ def plan_my_day():
                                parent=app)
         return
 
-    if tasks_table is None:
+    if task_service is None:
         messagebox.showwarning("No Database", "Please set up a database first.",
                                parent=app)
         return
 
-    all_tasks = tasks_table.all()
-    incomplete = [t for t in all_tasks if t.get('status') != 'Completed']
-
-    if not incomplete:
+    # In fastest-available mode any of the raced providers may answer, so the task list is
+    # sized for the smallest input budget among them
+    providers = racing_ai_providers()
+    request = task_service.plan_request(WORKING_HOURS, PEAK_HOURS, WIND_DOWN_HOURS,
+                                        smallest_budget_provider(providers))
+    if request is None:
         messagebox.showinfo("No Tasks", "You have no incomplete tasks to plan around.",
                             parent=app)
         return
 
-    # Build task list text
-    task_lines = []
-    for t in incomplete:
-        line = (f"- {t['title']} | Priority: {t['priority']} | Status: {t.get('status', 'Pending')} "
-                f"| Category: {t.get('category', 'General')} | Deadline: {t['deadline']}")
-        if t.get('notes', '').strip():
-            line += f" | Notes: {t['notes'].strip()}"
-        task_lines.append(line)
-    task_text = "\n".join(task_lines)
-
-    today = datetime.datetime.now().strftime("%A, %B %d, %Y")
-
-    # Collect per-category goals for categories present in incomplete tasks
-    goals_section = ""
-    if goals_table is not None:
-        categories_in_play = set(t.get('category', 'General') for t in incomplete)
-        goal_lines = []
-        for cat in sorted(categories_in_play):
-            goal_doc = goals_table.get(Query().category == cat)
-            if goal_doc and goal_doc.get('goal', '').strip():
-                goal_lines.append(f"- {cat}: {goal_doc['goal']}")
-        if goal_lines:
-            goals_section = "\n\nLong-term goals by category:\n" + "\n".join(goal_lines)
-
-    system_prompt = (
-        "You are a productivity planner. The user will give you their current task list. "
-        "Create a practical, time-blocked daily plan for today. Prioritize by deadline and priority level.\n\n"
-        "STRICT RULES:\n"
-        "1. NEVER schedule any task outside the user's Working Hours. This is a hard constraint.\n"
-        "2. Schedule demanding, high-priority tasks during the user's Peak Hours.\n"
-        "3. Reserve lighter tasks, reviews, and admin work for Wind-Down Hours.\n"
-        "4. Align daily task prioritization with the user's long-term goals for each category.\n"
-        "5. Do NOT assume breaks; only include breaks if the user requests them.\n"
-        "6. Reference actual task titles in your plan.\n\n"
-        "Format the plan as follows:\n"
-        "- Start with a one-line summary of the day\n"
-        "- Use time blocks in the format 'HH:MM AM - HH:MM AM/PM: Task Title'\n"
-        "- Group tasks under headers: MORNING, AFTERNOON, EVENING\n"
-        "- End with a 'KEY FOCUS AREAS' bullet list\n\n"
-        "When the user sends follow-up messages, revise the plan accordingly and output the full updated plan."
-    )
-    user_message = (
-        f"Today is {today}.\n\n"
-        f"My Working Hours: {WORKING_HOURS}\n"
-        f"My Peak Hours (high focus): {PEAK_HOURS}\n"
-        f"My Wind-Down Hours (lower energy): {WIND_DOWN_HOURS}\n\n"
-        f"Here are my current tasks:\n\n{task_text}"
-        f"{goals_section}\n\n"
-        "Please create a daily plan for me. "
-        f"IMPORTANT: All tasks MUST be scheduled between {WORKING_HOURS} only. "
-        "Do NOT schedule anything outside these working hours."
-    )
-
-    # Show loading window
-    loading_win = ctk.CTkToplevel(app)
-    loading_win.title("Planning...")
-    center_window_to_parent(loading_win, 300, 120)
-    provider_label = f"{AI_PROVIDER} ({OLLAMA_MODEL})" if AI_PROVIDER == "Ollama" else AI_PROVIDER
-    ctk.CTkLabel(loading_win, text=f"Generating plan via {provider_label}...", font=FONT_TITLE).pack(pady=(30, 5))
-    ctk.CTkLabel(loading_win, text="This may take a few seconds.", font=FONT_MAIN, text_color="#A0A0A0").pack()
+    system_prompt = request["system_prompt"]
+    messages = request["messages"]
+    cache_keys = {provider: plan_cache_key(system_prompt, request["incomplete"], request["goal_lines"], provider)
+                  for provider in providers}
+    cached = None
+    for provider in providers:
+        cached = plan_cache.get(cache_keys[provider], PLAN_CACHE_TTL_HOURS)
+        if cached:
+            messages.append({"role": "assistant", "content": cached[0], "provider": provider})
+            break
+
+    # The chat window opens straight away and streams the plan in as it is generated
+    _plan_window = PlanChatWindow(app, system_prompt, messages, cache_keys=cache_keys,
+                                  cached_at=cached[1] if cached else None)
+
+class PastPlansWindow(ctk.CTkToplevel):
+    """Lists saved Plan My Day sessions from the plan index; a transcript is only read when opened."""
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Past Plans")
+        center_window_to_parent(self, 800, 500)
+
+        ctk.CTkLabel(self, text="Past Plans", font=FONT_HEADER).pack(pady=(15, 5))
+
+        self.filter_entry = ctk.CTkEntry(self, font=FONT_MAIN,
+                                         placeholder_text="Filter by date, provider or summary...")
+        self.filter_entry.pack(fill="x", padx=15, pady=(0, 10))
+        self.filter_entry.bind("<KeyRelease>", lambda e: self._show())
+
+        list_frame = ctk.CTkFrame(self, fg_color="transparent")
+        list_frame.pack(fill="both", expand=True, padx=15)
+        self.tree = ttk.Treeview(list_frame, columns=("date", "provider", "turns", "summary"),
+                                 show="headings", selectmode="browse")
+        for column, heading, width, stretch in (("date", "Date", 150, False), ("provider", "Provider", 170, False),
+                                                ("turns", "Turns", 60, False), ("summary", "Summary", 380, True)):
+            self.tree.heading(column, text=heading, anchor="w")
+            self.tree.column(column, width=width, anchor="w", stretch=stretch)
+        scrollbar = ctk.CTkScrollbar(list_frame, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<Double-1>", lambda e: self._open_selected())
 
-    initial_messages = [{"role": "user", "content": user_message}]
+        btn_frame = ctk.CTkFrame(self, fg_color="transparent")
+        btn_frame.pack(fill="x", padx=15, pady=15)
+        ctk.CTkButton(btn_frame, text="Close", command=self.destroy,
+                       fg_color="#FF3B30", hover_color="#d32f2f", font=FONT_BOLD,
+                       width=100).pack(side="right")
+        ctk.CTkButton(btn_frame, text="Open", command=self._open_selected,
+                       fg_color="#5856D6", hover_color="#4e4cb8", font=FONT_BOLD,
+                       width=100).pack(side="right", padx=(0, 10))
 
-    def call_api():
         try:
-            plan_text = _call_ai(system_prompt, initial_messages)
-            app.after(0, lambda: on_success(plan_text))
-        except Exception as e:
-            err_msg = str(e)
-            app.after(0, lambda: on_error(err_msg))
-
-    def on_success(plan_text):
-        loading_win.destroy()
-        initial_messages.append({"role": "assistant", "content": plan_text})
-        PlanChatWindow(app, system_prompt, initial_messages)
-
-    def on_error(error_msg):
-        loading_win.destroy()
-        messagebox.showerror("Error", f"Failed to generate plan:\n{error_msg}", parent=app)
+            self.entries = sorted(load_plan_index().values(), key=lambda e: e.get("date", ""), reverse=True)
+        except OSError:
+            self.entries = []
+        self._show()
+
+    def _show(self):
+        needle = self.filter_entry.get().strip().lower()
+        self.tree.delete(*self.tree.get_children())
+        for entry in self.entries:
+            provider = entry.get("provider") or ""
+            if entry.get("model") and entry["model"] != provider:
+                provider += f" ({entry['model']})"
+            values = (entry.get("date", ""), provider, entry.get("turns", 0), entry.get("summary", ""))
+            if needle and needle not in " ".join(str(v) for v in values).lower():
+                continue
+            self.tree.insert("", "end", iid=entry["id"], values=values)
+
+    def _open_selected(self):
+        selected = self.tree.selection()
+        if not selected:
+            return
+        try:
+            session = load_plan_transcript(selected[0])
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not open this plan:\n{e}", parent=self)
+            return
+        PlanChatWindow(app, session["system_prompt"], session["messages"], session=session)
 
-    threading.Thread(target=call_api, daemon=True).start()
+def open_past_plans():
+    PastPlansWindow(app)
 
 # --- 9. MAIN APP RENDER ---
 app = ctk.CTk()
@@ -1208,6 +3078,10 @@ btn_plan = ctk.CTkButton(top_row, text="Plan My Day", width=120, height=32,
                           command=plan_my_day, fg_color="#5856D6", hover_color="#4e4cb8", font=FONT_BOLD)
 btn_plan.pack(side="right", padx=(0, 10))
 
+btn_past_plans = ctk.CTkButton(top_row, text="Past Plans", width=100, height=32,
+                               command=open_past_plans, fg_color="#555555", hover_color="#666666", font=FONT_BOLD)
+btn_past_plans.pack(side="right", padx=(0, 10))
+
 
 # Bottom Row: Search | Filter | Hide | Export | Del | Add
 bottom_row = ctk.CTkFrame(header_frame, fg_color="transparent")
@@ -1216,7 +3090,7 @@ bottom_row.pack(fill="x")
 # Search
 entry_search = ctk.CTkEntry(bottom_row, textvariable=search_var, placeholder_text="Search tasks...", width=200, font=FONT_MAIN)
 entry_search.pack(side="left", padx=(0, 10))
-search_var.trace_add("write", lambda *args: refresh_task_list()) 
+search_var.trace_add("write", on_search_changed)
 
 # Filter
 filter_menu = ctk.CTkComboBox(
@@ -1244,14 +3118,27 @@ switch_hide = ctk.CTkSwitch(
 )
 switch_hide.pack(side="left", padx=15)
 
+select_menu = ctk.CTkOptionMenu(bottom_row, values=SELECT_OPTIONS, command=on_select_menu,
+                                width=110, height=32, font=FONT_MAIN)
+select_menu.set("Select")
+select_menu.pack(side="left")
+
 # Buttons Right
 btn_frame = ctk.CTkFrame(bottom_row, fg_color="transparent")
 btn_frame.pack(side="right")
 
-btn_export = ctk.CTkButton(btn_frame, text="Export CSV", width=90, height=32, 
-                           command=export_to_csv, fg_color="#5856D6", hover_color="#4e4cb8", font=FONT_BOLD)
+btn_bulk = ctk.CTkButton(btn_frame, text="Bulk Edit", width=90, height=32,
+                         command=open_bulk_edit_window, fg_color="#5856D6", hover_color="#4e4cb8", font=FONT_BOLD)
+btn_bulk.pack(side="left", padx=(0, 10))
+
+btn_export = ctk.CTkButton(btn_frame, text="Export", width=90, height=32, 
+                           command=export_tasks, fg_color="#5856D6", hover_color="#4e4cb8", font=FONT_BOLD)
 btn_export.pack(side="left", padx=(0, 10))
 
+btn_import = ctk.CTkButton(btn_frame, text="Import", width=90, height=32,
+                           command=import_tasks, fg_color="#5856D6", hover_color="#4e4cb8", font=FONT_BOLD)
+btn_import.pack(side="left", padx=(0, 10))
+
 btn_del = ctk.CTkButton(btn_frame, text="-", width=40, height=40, corner_radius=10,
     font=FONT_ICON, fg_color="#FF3B30", hover_color="#D70015", command=delete_selected_tasks)
 btn_del.pack(side="left", padx=(0, 10))
@@ -1267,7 +3154,7 @@ list_frame.pack(fill="both", expand=True, padx=30, pady=(0, 30))
 columns = ("select", "title", "category", "priority", "status", "deadline")
 tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
 
-tree.heading("select", text="✓", anchor="center")
+tree.heading("select", text="✓", anchor="center", command=toggle_check_all)
 tree.heading("title", text="Task Description", anchor="w")
 tree.heading("category", text="Category", anchor="w") 
 tree.heading("priority", text="Priority", anchor="center")
@@ -1286,11 +3173,31 @@ tree.configure(yscroll=scrollbar.set)
 tree.pack(side="left", fill="both", expand=True, padx=15, pady=15)
 scrollbar.pack(side="right", fill="y", pady=15, padx=(0,15))
 
+task_list_view = TaskListView(tree, scrollbar, lambda iid: int(iid) in checked_task_ids)
+
 tree.bind("<Button-1>", toggle_check) 
 tree.bind("<Double-1>", on_double_click) 
 
 # Apply initial theme (Dark by default per line 29)
 apply_tree_theme("Dark")
 
+def on_app_close():
+    # Pending cached writes and journaled changes are written out on close
+    _stop_db_watch()
+    try:
+        _close_db()
+    except Exception as e:
+        # The unsaved changes are still in memory; stay open unless the user gives them up
+        if not messagebox.askyesno("Save Failed", f"Could not save your latest changes: {e}\n\n"
+                                   "Quit anyway and lose them?", icon="warning"):
+            _start_db_watch()
+            return
+    ai_clients.invalidate()
+    app.destroy()
+
+app.protocol("WM_DELETE_WINDOW", on_app_close)
+mark_startup("window built")
+app.after(PLAN_MAINTENANCE_DELAY_MS, start_plan_chat_maintenance)
+app.after_idle(lambda: mark_startup("first paint"))
 app.after(150, check_config_on_startup)
 app.mainloop()
\ No newline at end of file
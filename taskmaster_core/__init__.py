@@ -0,0 +1,20 @@
+"""TaskMaster's core: task storage, search, import/export and plan requests, with no UI.
+
+The desktop app is a client of this package, and so is the taskmaster command line
+(python -m taskmaster_core, or taskmaster.py with a command).
+"""
+from .config import CONFIG_FILE, USER_DATA_DIR, load_config
+from .planning import PLAN_SYSTEM_PROMPT, build_plan_request
+from .service import TaskService
+from .storage import open_store
+from .tasks import DEFAULT_IMPACT, PRIORITY_ORDER, TASK_IMPACTS, TASK_STATUSES, filter_tasks, get_priority, make_task
+from .transfer import plan_task_import, write_task_export
+
+__all__ = [
+    "CONFIG_FILE", "USER_DATA_DIR", "load_config",
+    "PLAN_SYSTEM_PROMPT", "build_plan_request",
+    "TaskService",
+    "open_store",
+    "DEFAULT_IMPACT", "PRIORITY_ORDER", "TASK_IMPACTS", "TASK_STATUSES", "filter_tasks", "get_priority", "make_task",
+    "plan_task_import", "write_task_export",
+]
@@ -0,0 +1,148 @@
+"""The taskmaster command line: add, list, complete and export tasks, or build a plan request,
+without starting the GUI."""
+import argparse
+import datetime
+import json
+import os
+import sys
+
+from .config import (DEFAULT_PEAK_HOURS, DEFAULT_WIND_DOWN_HOURS, DEFAULT_WORKING_HOURS,
+                     load_config)
+from .service import TaskService
+from .tasks import DEFAULT_IMPACT, TASK_IMPACTS, TASK_STATUSES
+from .transfer import format_import_plan, normalize_import_row
+
+def _file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    return {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(ext, "csv")
+
+def _print_tasks(tasks, as_json):
+    if as_json:
+        for task in tasks:
+            print(json.dumps({"id": task.doc_id, **task}, ensure_ascii=False))
+        return
+    for task in tasks:
+        print(f"{task.doc_id:>6}  {task['priority']:<9}  {task.get('status', 'Pending'):<11}  "
+              f"{task['deadline']:<10}  {task.get('category', 'General')}: {task['title']}")
+
+def cmd_add(service, args):
+    if args.from_file:
+        plan = service.plan_import(args.from_file, _file_format(args.from_file))
+        print(format_import_plan(plan, os.path.basename(args.from_file)))
+        if not args.dry_run and plan["records"]:
+            print(f"Added {len(service.add_tasks(plan['records']))} task(s).")
+        return 0
+    if not args.title:
+        print("taskmaster add: give a title, or --from FILE", file=sys.stderr)
+        return 2
+    raw = {'title': args.title, 'category': args.category, 'impact': args.impact, 'is_urgent': args.urgent,
+           'deadline': args.deadline, 'status': args.status, 'notes': args.notes}
+    try:
+        record = normalize_import_row(raw, datetime.date.today().strftime("%Y-%m-%d"))
+    except ValueError as e:
+        print(f"taskmaster add: {e}", file=sys.stderr)
+        return 2
+    if not args.dry_run:
+        print(service.add_task(record))
+    return 0
+
+def cmd_list(service, args):
+    tasks = service.list_tasks(args.category, args.hide_done, args.search or "")
+    if args.status:
+        tasks = [t for t in tasks if t.get('status', 'Pending') == args.status]
+    _print_tasks(tasks, args.json)
+    return 0
+
+def cmd_complete(service, args):
+    done = service.complete(args.ids)
+    missing = [doc_id for doc_id in args.ids if service.tasks.get(doc_id) is None]
+    print(f"Completed {len(done)} task(s).")
+    if missing:
+        print(f"No task with id: {', '.join(map(str, missing))}", file=sys.stderr)
+        return 1
+    return 0
+
+def cmd_export(service, args):
+    fmt = args.format or ("jsonl" if _file_format(args.file) == "jsonl" else "csv")
+    doc_ids = [t.doc_id for t in service.list_tasks(args.category, args.hide_done, args.search or "")]
+    print(f"Exported {service.export(args.file, fmt, doc_ids)} task(s) to {args.file}.")
+    return 0
+
+def cmd_plan(service, args):
+    config = load_config()
+    request = service.plan_request(config.get('working_hours', DEFAULT_WORKING_HOURS),
+                                   config.get('peak_hours', DEFAULT_PEAK_HOURS),
+                                   config.get('wind_down_hours', DEFAULT_WIND_DOWN_HOURS),
+                                   args.provider or config.get('ai_provider', 'Claude'))
+    if request is None:
+        print("You have no incomplete tasks to plan around.", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps({"system": request["system_prompt"], "messages": request["messages"]},
+                         ensure_ascii=False, indent=2))
+    else:
+        print(request["system_prompt"] + "\n\n" + request["messages"][0]["content"])
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="taskmaster", description="Work with a TaskMaster database from the command line.")
+    parser.add_argument("--db", help="database file (default: the one the app last used)")
+    parser.add_argument("--journal", action="store_true", help="open a JSON database in journaled mode")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("-c", "--category", default="All Categories")
+    filters.add_argument("--hide-done", action="store_true", help="leave out completed tasks")
+    filters.add_argument("-s", "--search", help="only tasks whose title or notes match")
+
+    add = commands.add_parser("add", help="add one task, or every task in a CSV/JSON/JSONL file")
+    add.add_argument("title", nargs="?")
+    add.add_argument("-c", "--category")
+    add.add_argument("-i", "--impact", choices=TASK_IMPACTS, help=f"default: {DEFAULT_IMPACT}")
+    add.add_argument("-u", "--urgent", action="store_true")
+    add.add_argument("-d", "--deadline", help="YYYY-MM-DD (default: today)")
+    add.add_argument("--status", choices=TASK_STATUSES)
+    add.add_argument("-n", "--notes")
+    add.add_argument("--from", dest="from_file", metavar="FILE", help="import tasks from a file, skipping duplicates")
+    add.add_argument("--dry-run", action="store_true", help="check the input without adding anything")
+    add.set_defaults(run=cmd_add)
+
+    lst = commands.add_parser("list", parents=[filters], help="list tasks in priority order")
+    lst.add_argument("--status", choices=TASK_STATUSES)
+    lst.add_argument("--json", action="store_true", help="one JSON object per line")
+    lst.set_defaults(run=cmd_list)
+
+    complete = commands.add_parser("complete", help="mark tasks completed")
+    complete.add_argument("ids", nargs="+", type=int, metavar="ID")
+    complete.set_defaults(run=cmd_complete)
+
+    export = commands.add_parser("export", parents=[filters], help="export tasks to CSV or JSONL")
+    export.add_argument("file")
+    export.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension")
+    export.set_defaults(run=cmd_export)
+
+    plan = commands.add_parser("plan", help="print the Plan My Day request for today's tasks")
+    plan.add_argument("--provider", choices=("Claude", "Gemini", "Ollama"), help="budget the prompt for this provider")
+    plan.add_argument("--json", action="store_true", help="print the system prompt and messages as JSON")
+    plan.set_defaults(run=cmd_plan)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = load_config()
+    path = args.db or config.get('db_path')
+    if not path:
+        print("taskmaster: no database set up yet; pass --db or pick one in the app first", file=sys.stderr)
+        return 2
+    try:
+        service = TaskService(path, journaled=args.journal or config.get('json_journal', False))
+    except Exception as e:
+        print(f"taskmaster: could not open {path}: {e}", file=sys.stderr)
+        return 1
+    try:
+        return args.run(service, args)
+    except (OSError, ValueError) as e:
+        print(f"taskmaster {args.command}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        service.close()
@@ -0,0 +1,28 @@
+"""Where TaskMaster keeps its settings and data, shared by the app and the command line."""
+import json
+import os
+import platform
+
+APP_NAME = "TaskMaster"
+
+if platform.system() == "Darwin":
+    USER_DATA_DIR = os.path.join(os.path.expanduser("~"), "Library", "Application Support", APP_NAME)
+elif platform.system() == "Windows":
+    USER_DATA_DIR = os.path.join(os.getenv("APPDATA"), APP_NAME)
+else:
+    USER_DATA_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", APP_NAME)
+
+CONFIG_FILE = os.path.join(USER_DATA_DIR, 'todo_config.json')
+
+DEFAULT_WORKING_HOURS = "9:00 AM - 6:00 PM"
+DEFAULT_PEAK_HOURS = "9:00 AM - 12:00 PM"
+DEFAULT_WIND_DOWN_HOURS = "3:00 PM - 5:00 PM"
+
+def load_config():
+    """The saved settings, or {} if there are none yet or the file can't be read."""
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return config if isinstance(config, dict) else {}
@@ -0,0 +1,132 @@
+"""Plan My Day requests: the prompt, and keeping it inside each provider's input budget."""
+import datetime
+
+from .tasks import PRIORITY_ORDER
+
+PLAN_SYSTEM_PROMPT = (
+    "You are a productivity planner. The user will give you their current task list. "
+    "Create a practical, time-blocked daily plan for today. Prioritize by deadline and priority level.\n\n"
+    "STRICT RULES:\n"
+    "1. NEVER schedule any task outside the user's Working Hours. This is a hard constraint.\n"
+    "2. Schedule demanding, high-priority tasks during the user's Peak Hours.\n"
+    "3. Reserve lighter tasks, reviews, and admin work for Wind-Down Hours.\n"
+    "4. Align daily task prioritization with the user's long-term goals for each category.\n"
+    "5. Do NOT assume breaks; only include breaks if the user requests them.\n"
+    "6. Reference actual task titles in your plan.\n\n"
+    "Format the plan as follows:\n"
+    "- Start with a one-line summary of the day\n"
+    "- Use time blocks in the format 'HH:MM AM - HH:MM AM/PM: Task Title'\n"
+    "- Group tasks under headers: MORNING, AFTERNOON, EVENING\n"
+    "- End with a 'KEY FOCUS AREAS' bullet list\n\n"
+    "When the user sends follow-up messages, revise the plan accordingly and output the full updated plan."
+)
+
+# Rough characters per token for each provider's tokenizer on planning text. Estimates only
+# need to be close enough to keep requests under the input budget.
+AI_CHARS_PER_TOKEN = {"Claude": 3.5, "Gemini": 4.0, "Ollama": 3.8}
+AI_INPUT_TOKEN_BUDGET = {"Claude": 24000, "Gemini": 24000, "Ollama": 3000}
+AI_MESSAGE_OVERHEAD_TOKENS = 4
+PLAN_TASKS_BUDGET_SHARE = 0.5  # Share of the input budget the task list may take up
+PLAN_NOTE_MAX_CHARS = 200
+EARLIER_REQUEST_MAX_CHARS = 200
+
+def estimate_tokens(text, provider=None):
+    return int(len(text) / AI_CHARS_PER_TOKEN.get(provider, 4.0)) + 1
+
+def estimate_request_tokens(system_prompt, messages, provider=None):
+    return estimate_tokens(system_prompt, provider) + sum(
+        estimate_tokens(m["content"], provider) + AI_MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+def smallest_budget_provider(providers):
+    """The provider with the smallest input budget; a request sized for it fits all of them."""
+    return min(providers, key=lambda provider: AI_INPUT_TOKEN_BUDGET.get(provider, 24000))
+
+def truncate_text(text, max_chars):
+    text = text.strip()
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "\u2026"
+
+def fit_messages_to_budget(system_prompt, messages, provider=None, budget=None):
+    """Returns the messages to send, compacting older turns when the request would exceed the budget.
+
+    The first message (the task list), the latest plan and the new turn are always kept; the
+    turns in between collapse into a short list of the user's earlier requests, oldest dropped first.
+    That list goes in front of the new turn, so the system prompt and task list stay the exact
+    prefix the providers cache.
+    """
+    budget = budget or AI_INPUT_TOKEN_BUDGET.get(provider, 24000)
+    if len(messages) <= 3 or estimate_request_tokens(system_prompt, messages, provider) <= budget:
+        return messages
+    if messages[-1]["role"] != "user" or messages[-2]["role"] != "assistant":
+        return messages
+    first, latest_plan, new_turn = messages[0], messages[-2], messages[-1]
+    earlier = [truncate_text(m["content"], EARLIER_REQUEST_MAX_CHARS)
+               for m in messages[1:-2] if m["role"] == "user"]
+    while True:
+        note = ""
+        if earlier:
+            note = ("Earlier requests in this conversation (already reflected in your latest plan):\n"
+                    + "\n".join(f"- {request}" for request in earlier) + "\n\n")
+        compacted = [first, latest_plan, {"role": "user", "content": note + new_turn["content"]}]
+        if not earlier or estimate_request_tokens(system_prompt, compacted, provider) <= budget:
+            return compacted
+        earlier.pop(0)
+
+def build_plan_request(tasks, goals, working_hours, peak_hours, wind_down_hours, provider=None, today=None):
+    """The Plan My Day request for the incomplete tasks, or None when there is nothing to plan.
+
+    goals maps a category to its long-term goal. Returns a dict with the system prompt, the
+    messages to send, the incomplete tasks and the goal lines that went into the prompt.
+    """
+    incomplete = [t for t in tasks if t.get('status') != 'Completed']
+    if not incomplete:
+        return None
+
+    # Build task list text, most pressing first. Once the list fills its share of the input
+    # budget the remaining tasks are only counted, so huge lists still fit the context window.
+    ordered = sorted(incomplete, key=lambda t: (PRIORITY_ORDER.get(t.get('priority'), 99), t.get('deadline', '')))
+    task_budget = int(AI_INPUT_TOKEN_BUDGET.get(provider, 24000) * PLAN_TASKS_BUDGET_SHARE)
+    task_lines = []
+    used_tokens = 0
+    for t in ordered:
+        line = (f"- {t['title']} | Priority: {t['priority']} | Status: {t.get('status', 'Pending')} "
+                f"| Category: {t.get('category', 'General')} | Deadline: {t['deadline']}")
+        if t.get('notes', '').strip():
+            line += f" | Notes: {truncate_text(t['notes'], PLAN_NOTE_MAX_CHARS)}"
+        used_tokens += estimate_tokens(line, provider) + 1
+        if used_tokens > task_budget:
+            break
+        task_lines.append(line)
+    omitted = len(ordered) - len(task_lines)
+    if omitted:
+        task_lines.append(f"- ...and {omitted} lower-priority task(s) not listed here")
+    task_text = "\n".join(task_lines)
+
+    today = (today or datetime.datetime.now()).strftime("%A, %B %d, %Y")
+
+    # Collect per-category goals for categories present in incomplete tasks
+    goals_section = ""
+    goal_lines = []
+    for cat in sorted(set(t.get('category', 'General') for t in incomplete)):
+        goal = goals.get(cat, '')
+        if goal.strip():
+            goal_lines.append(f"- {cat}: {goal}")
+    if goal_lines:
+        goals_section = "\n\nLong-term goals by category:\n" + "\n".join(goal_lines)
+
+    user_message = (
+        f"Today is {today}.\n\n"
+        f"My Working Hours: {working_hours}\n"
+        f"My Peak Hours (high focus): {peak_hours}\n"
+        f"My Wind-Down Hours (lower energy): {wind_down_hours}\n\n"
+        f"Here are my current tasks:\n\n{task_text}"
+        f"{goals_section}\n\n"
+        "Please create a daily plan for me. "
+        f"IMPORTANT: All tasks MUST be scheduled between {working_hours} only. "
+        "Do NOT schedule anything outside these working hours."
+    )
+    return {
+        "system_prompt": PLAN_SYSTEM_PROMPT,
+        "messages": [{"role": "user", "content": user_message}],
+        "incomplete": incomplete,
+        "goal_lines": goal_lines,
+    }
@@ -0,0 +1,211 @@
+"""Full-text search over task titles and notes."""
+import bisect
+import itertools
+import json
+import operator
+import os
+import re
+import zlib
+
+# Full-text search. An inverted index maps each word of a task's title and notes to
+# {doc_id: weight}; a sorted vocabulary gives prefix lookups. It is saved next to the
+# database with a per-task checksum, so startup only re-indexes tasks that changed.
+SEARCH_INDEX_SUFFIX = ".search"
+SEARCH_INDEX_VERSION = 1
+SEARCH_TITLE_WEIGHT = 3
+MIN_PREFIX_LENGTH = 2
+NARROW_RATIO = 2  # Narrow by the earlier result only when it is this many times smaller than a posting list
+_SEARCH_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text):
+    return _SEARCH_TOKEN_RE.findall(text.lower())
+
+def _search_signature(doc):
+    return zlib.crc32(f"{doc.get('title', '')}\0{doc.get('notes', '')}".encode('utf-8'))
+
+def _search_weights(doc):
+    weights = {}
+    for token in tokenize(doc.get('title', '')):
+        weights[token] = weights.get(token, 0) + SEARCH_TITLE_WEIGHT
+    for token in tokenize(doc.get('notes', '') or ''):
+        weights[token] = weights.get(token, 0) + 1
+    return weights
+
+class SearchIndex:
+    def __init__(self):
+        self._postings = {}
+        self._vocab = []
+        self._signatures = {}
+
+    @classmethod
+    def load_or_build(cls, path, table):
+        index = cls()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('version') == SEARCH_INDEX_VERSION:
+                index._postings = {token: dict(zip(ids, weights)) for token, (ids, weights) in saved['postings'].items()}
+                index._signatures = {int(doc_id): sig for doc_id, sig in saved['signatures'].items()}
+        except (OSError, ValueError, KeyError):
+            pass
+        index._vocab = sorted(index._postings)
+
+        # Bring the saved index in line with the table: drop stale ids, index new or edited tasks
+        docs = {doc.doc_id: doc for doc in table.all()}
+        stale = {doc_id for doc_id, sig in index._signatures.items()
+                 if doc_id not in docs or _search_signature(docs[doc_id]) != sig}
+        if stale:
+            index._forget(stale)
+        for doc_id, doc in docs.items():
+            if doc_id not in index._signatures:
+                index._add(doc)
+        return index
+
+    def save(self, path):
+        data = {
+            'version': SEARCH_INDEX_VERSION,
+            'signatures': self._signatures,
+            # Parallel id/weight lists parse several times faster than a list of pairs
+            'postings': {token: [list(ids), list(ids.values())] for token, ids in self._postings.items()},
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False))
+        os.replace(tmp_path, path)
+
+    def _add(self, doc):
+        for token, weight in _search_weights(doc).items():
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = {}
+                bisect.insort(self._vocab, token)
+            ids[doc.doc_id] = weight
+        self._signatures[doc.doc_id] = _search_signature(doc)
+
+    def _remove(self, doc):
+        for token in _search_weights(doc):
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.pop(doc.doc_id, None)
+            if not ids:
+                self._drop_token(token)
+        self._signatures.pop(doc.doc_id, None)
+
+    def _forget(self, doc_ids):
+        # The old text of these tasks is unknown, so sweep every posting list once
+        for token in list(self._postings):
+            ids = self._postings[token]
+            for doc_id in doc_ids & ids.keys():
+                del ids[doc_id]
+            if not ids:
+                self._drop_token(token)
+        for doc_id in doc_ids:
+            self._signatures.pop(doc_id, None)
+
+    def _drop_token(self, token):
+        del self._postings[token]
+        pos = bisect.bisect_left(self._vocab, token)
+        if pos < len(self._vocab) and self._vocab[pos] == token:
+            del self._vocab[pos]
+
+    def on_change(self, old_doc, new_doc):
+        if old_doc is not None and new_doc is not None and _search_signature(old_doc) == _search_signature(new_doc):
+            return
+        if old_doc is not None:
+            self._remove(old_doc)
+        if new_doc is not None:
+            self._add(new_doc)
+
+    def _expand(self, term):
+        """The tokens a query term matches: the word itself first, then words starting with it,
+        most common first.
+
+        Every such word is kept: the rarer ones only add short posting lists, so the cost stays
+        in proportion to the tasks matched.
+        """
+        exact = [term] if term in self._postings else []
+        if len(term) < MIN_PREFIX_LENGTH:
+            # A single letter matches whole words only; as a prefix it would match most tasks
+            return exact
+        tokens = []
+        for i in range(bisect.bisect_left(self._vocab, term), len(self._vocab)):
+            token = self._vocab[i]
+            if not token.startswith(term):
+                break
+            if token != term:
+                tokens.append(token)
+        tokens.sort(key=lambda t: len(self._postings[t]), reverse=True)
+        return exact + tokens
+
+    def _term_scores(self, term, within=None):
+        """{doc_id: score} for one query term; exact word hits count double over prefix hits.
+
+        A document matching several words is scored by the first of them: the exact word, else
+        the most common one. Writing them last to first lets dict.update settle that in C.
+        within, if given, bounds the documents that matter.
+        """
+        scores = {}
+        for token in reversed(self._expand(term)):
+            postings = self._postings[token]
+            if within is not None and len(within) * NARROW_RATIO < len(postings):
+                # Walk the (much smaller) earlier result instead of the whole posting list
+                ids = within.keys() & postings.keys()
+                weights = map(postings.__getitem__, ids)
+            else:
+                # Cheaper to take whole; the caller intersects with within anyway
+                ids, weights = postings.keys(), postings.values()
+            if token == term:
+                weights = map(operator.mul, weights, itertools.repeat(2))
+            scores.update(zip(ids, weights))
+        return scores
+
+    def refine(self, totals, term):
+        """The tasks of a result ({doc_id: score}) that also match term, with its score added.
+
+        Every word term is a prefix of is checked against the result, so none of its tasks is missed.
+        """
+        scores = self._term_scores(term, within=totals)
+        both = totals.keys() & scores.keys()
+        return dict(zip(both, map(operator.add, map(totals.__getitem__, both), map(scores.__getitem__, both))))
+
+    def search(self, query):
+        """Ranked {doc_id: score} of tasks matching every term of the query as a word prefix."""
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+        # Start from the term with the fewest postings; later terms only score surviving docs
+        terms = sorted(terms, key=self._estimate)
+        totals = self._term_scores(terms[0])
+        for term in terms[1:]:
+            if not totals:
+                break
+            totals = self.refine(totals, term)
+        return totals
+
+    def _estimate(self, term):
+        return sum(len(self._postings[token]) for token in self._expand(term))
+
+class IncrementalSearch:
+    """Remembers the result for the words already typed, so each keystroke only has to score
+    the word being typed against it instead of rescanning."""
+    def __init__(self, index):
+        self._index = index
+        self._head = None
+        self._head_result = None
+
+    def search(self, query):
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        head, last = terms[:-1], terms[-1]
+        if head != self._head:
+            self._head, self._head_result = head, self._index.search(" ".join(head))
+        if not head:
+            return self._index.search(last)
+        if last in head or not self._head_result:
+            return self._head_result
+        return self._index.refine(self._head_result, last)
+
+    def invalidate(self, *args):
+        self._head = self._head_result = None
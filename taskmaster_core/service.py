@@ -0,0 +1,125 @@
+"""TaskService: everything the app does with a task database, without any UI."""
+import datetime
+
+from .planning import build_plan_request
+from .search import SEARCH_INDEX_SUFFIX, IncrementalSearch, SearchIndex, tokenize
+from .storage import WriteBackCache, open_store
+from .tasks import DEFAULT_IMPACT, bulk_changes, filter_tasks, get_priority
+from .transfer import plan_task_import, write_task_export
+
+class TaskService:
+    """One open task database: tasks, category goals and search, behind a write-back cache.
+
+    The app opens one per database with a Tk scheduler so writes are batched; scripts leave
+    scheduler out and every change is written straight away. close() saves everything.
+    """
+    def __init__(self, path, journaled=False, flush_latency_ms=0, scheduler=None):
+        self.path = path
+        self.db = WriteBackCache(open_store(path, journaled), flush_latency_ms, scheduler)
+        self.tasks = self.db.table('tasks')
+        self.goals = self.db.table('category_goals')
+        self._search_index = None
+        self._search = None
+
+    # Search is only built when first needed, so one-off scripts don't pay for it
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            self._search_index = SearchIndex.load_or_build(self.path + SEARCH_INDEX_SUFFIX, self.tasks)
+            self.tasks.add_listener(self._search_index.on_change)
+        return self._search_index
+
+    @property
+    def search(self):
+        if self._search is None:
+            self._search = IncrementalSearch(self.search_index)
+            self.tasks.add_listener(self._search.invalidate)
+        return self._search
+
+    def list_tasks(self, category="All Categories", hide_completed=False, search_text=""):
+        """Tasks matching the list filters, in the order the task list shows them."""
+        searcher = self.search if tokenize(search_text) else None
+        return filter_tasks(self.tasks, searcher, category, hide_completed, search_text)
+
+    def categories(self):
+        cats = set(self.tasks.distinct('category'))
+        cats.add("General")
+        return sorted(cats)
+
+    def due_today(self):
+        """Doc ids of unfinished tasks due today."""
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        completed = self.tasks.ids_where('status', 'Completed')
+        return [doc_id for doc_id in self.tasks.ids_between('deadline', today, today)
+                if doc_id not in completed]
+
+    def add_task(self, record):
+        return self.tasks.insert(record)
+
+    def add_tasks(self, records):
+        """Adds many tasks and writes them to disk as one batch; returns their doc ids."""
+        doc_ids = self.tasks.insert_many(records)
+        self.db.flush()
+        return doc_ids
+
+    def update_task(self, doc_id, fields):
+        """Changes one task, recomputing its priority when impact or urgency change."""
+        task = self.tasks.get(doc_id)
+        if task is None:
+            return False
+        fields = dict(fields)
+        if 'impact' in fields or 'is_urgent' in fields:
+            fields['priority'] = get_priority(fields.get('impact', task.get('impact', DEFAULT_IMPACT)),
+                                              fields.get('is_urgent', task.get('is_urgent', False)))
+        return bool(self.tasks.update(fields, doc_ids=[doc_id]))
+
+    def bulk_edit(self, doc_ids, **edit):
+        """Applies one edit (see bulk_changes) to many tasks as a single batch; returns the changed ids."""
+        return self.tasks.update_many(bulk_changes(self.tasks, doc_ids, **edit))
+
+    def complete(self, doc_ids):
+        return self.bulk_edit(doc_ids, status="Completed")
+
+    def remove_tasks(self, doc_ids):
+        return self.tasks.remove(doc_ids=list(doc_ids))
+
+    def get_goal(self, category):
+        doc = self.goals.get(category=category)
+        return doc.get('goal', '') if doc else ''
+
+    def set_goal(self, category, goal):
+        if self.goals.get(category=category):
+            self.goals.update({'goal': goal}, category=category)
+        else:
+            self.goals.insert({'category': category, 'goal': goal})
+
+    def export(self, file_path, fmt="csv", doc_ids=None, progress=None, cancel_event=None):
+        """Writes the tasks (all of them by default) to a CSV or JSONL file; see write_task_export."""
+        if doc_ids is None:
+            doc_ids = self.tasks.doc_ids()
+        return write_task_export(self.tasks, doc_ids, file_path, fmt, progress, cancel_event)
+
+    def plan_import(self, file_path, fmt, progress=None, cancel_event=None):
+        """Dry run of importing a file; pass the plan's records to add_tasks to commit it.
+
+        It compares against a snapshot of the tasks, so it can run on a worker thread.
+        """
+        existing_tasks = list(self.tasks.snapshot().values())
+        return plan_task_import(file_path, fmt, existing_tasks, progress, cancel_event)
+
+    def plan_request(self, working_hours, peak_hours, wind_down_hours, provider=None):
+        """The Plan My Day request for the current tasks, or None when nothing is left to plan."""
+        goals = {doc['category']: doc.get('goal', '') for doc in self.goals.all() if 'category' in doc}
+        return build_plan_request(self.tasks.all(), goals, working_hours, peak_hours, wind_down_hours, provider)
+
+    def flush(self):
+        self.db.flush()
+
+    def close(self):
+        """Writes out pending changes and the search index, then closes the database."""
+        try:
+            if self._search_index is not None:
+                self._search_index.save(self.path + SEARCH_INDEX_SUFFIX)
+        except OSError:
+            pass
+        self.db.close()
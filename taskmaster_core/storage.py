@@ -0,0 +1,897 @@
+"""Task storage: the TinyDB/SQLite backends and the write-back cache in front of them."""
+import bisect
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from tinydb import TinyDB, Query
+
+# Storage backends. Both expose the same small table interface used by the app:
+# all(), get(doc_id=... | field=value), search(field=value), insert(record),
+# update(fields, doc_ids=... | field=value), remove(doc_ids=...), plus
+# apply_batch(upserts, removes, inserts) which writes many records with one disk write.
+# Records in inserts are keyed by a provisional id; the backend stores them under ids it
+# allocates from what is on disk at that moment (so another process's new records are
+# never overwritten) and returns {provisional_id: stored_id}.
+# The backend is picked from the file extension (.json -> TinyDB, .db/.sqlite -> SQLite).
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+# Fields copied out of the JSON payload into real columns so SQLite can index them
+SQLITE_INDEXED_FIELDS = {
+    'tasks': ('category', 'status', 'priority', 'deadline'),
+    'category_goals': ('category',),
+}
+
+class StoredDoc(dict):
+    """A task/goal record plus the id it is stored under (mirrors tinydb's Document)."""
+    def __init__(self, value, doc_id):
+        super().__init__(value)
+        self.doc_id = doc_id
+
+class TinyDBTable:
+    def __init__(self, table):
+        self._table = table
+
+    def all(self):
+        return self._table.all()
+
+    def get(self, doc_id=None, **where):
+        if doc_id is not None:
+            return self._table.get(doc_id=doc_id)
+        return self._table.get(Query().fragment(where))
+
+    def search(self, **where):
+        return self._table.search(Query().fragment(where))
+
+    def insert(self, record):
+        return self._table.insert(record)
+
+    def update(self, fields, doc_ids=None, **where):
+        if doc_ids is not None:
+            return self._table.update(fields, doc_ids=doc_ids)
+        return self._table.update(fields, Query().fragment(where))
+
+    def remove(self, doc_ids):
+        return self._table.remove(doc_ids=doc_ids)
+
+    def apply_batch(self, upserts, removes, inserts=None):
+        stored = {}
+
+        def updater(table):
+            for doc_id in removes:
+                table.pop(doc_id, None)
+            table.update(upserts)
+            if inserts:
+                # table was just re-read from the file; never go below the provisional ids, so a
+                # new id can't clash with one the caller still holds
+                next_id = max(max(table, default=0) + 1, min(inserts))
+                for provisional_id, doc in inserts.items():
+                    table[next_id] = doc
+                    stored[provisional_id] = next_id
+                    next_id += 1
+        # tinydb has no public multi-document write; _update_table is what insert/update use internally
+        self._table._update_table(updater)
+        self._table._next_id = None  # Its cached next id may be stale now
+        return stored
+
+class TinyDBStore:
+    engine = "JSON (TinyDB)"
+
+    def __init__(self, path):
+        self.path = path
+        self._db = TinyDB(path)
+
+    def table(self, name):
+        return TinyDBTable(self._db.table(name))
+
+    def close(self):
+        self._db.close()
+
+# Journaled JSON mode: the TinyDB file stays the on-disk format, but each write is
+# appended to "<db>.journal" and folded into the JSON file later by a background
+# compaction. Journal records are idempotent so replaying one twice is harmless.
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_COMPACT_BYTES = 256 * 1024
+JOURNAL_IDLE_SECONDS = 5
+
+class JournaledTinyDBTable:
+    """Table of a journaled store. Only serves the write-back cache: all() once when the cache
+    loads, then apply_batch() for each flush."""
+    def __init__(self, store, name):
+        self._store = store
+        self._name = name
+
+    def all(self):
+        return [StoredDoc(doc, int(doc_id)) for doc_id, doc in self._store._take_loaded(self._name).items()]
+
+    def apply_batch(self, upserts, removes, inserts=None):
+        with self._store._lock:
+            stored = self._store._allocate_ids(self._name, inserts or {})
+            # Journal "insert" records overwrite by doc id, so they double as upserts
+            entries = [{'op': 'insert', 'table': self._name, 'doc_id': doc_id, 'doc': doc}
+                       for doc_id, doc in upserts.items()]
+            entries += [{'op': 'insert', 'table': self._name, 'doc_id': stored[doc_id], 'doc': doc}
+                        for doc_id, doc in (inserts or {}).items()]
+            if removes:
+                entries.append({'op': 'remove', 'table': self._name, 'doc_ids': list(removes)})
+            self._store._append_many(entries)
+        return stored
+
+class JournaledTinyDBStore:
+    """The JSON file plus the journal of writes since it was last compacted.
+
+    No copy of the data is kept in memory (the cache above holds the only one), so a write
+    costs one journal append; compaction rebuilds the JSON file from disk in the background.
+    """
+    engine = "JSON (TinyDB, journaled)"
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.own_writes = {}  # See WriteBackCache.only_own_writes_since
+        self.last_compaction_error = None  # Until a compaction succeeds the journal keeps growing
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()  # One compaction at a time, close() included
+        self._compaction_error_listeners = []
+        self._idle_timer = None
+        self._compacting = False
+
+        # Held only until each table has been loaded into the cache
+        self._loaded = replay_journal(read_json_file(path), self.journal_path)
+        self._max_ids = _max_doc_ids(self._loaded)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        if self._journal.tell() and not _journal_ends_with_newline(self.journal_path):
+            # Start new records on a fresh line so a torn one can't swallow them
+            self._append_raw("\n")
+        self._journal_end = self._journal.tell()
+
+    def table(self, name):
+        return JournaledTinyDBTable(self, name)
+
+    def add_compaction_error_listener(self, callback):
+        """callback(error) runs on the compaction thread when a background compaction fails."""
+        self._compaction_error_listeners.append(callback)
+
+    def _take_loaded(self, name):
+        with self._lock:
+            docs = self._loaded.pop(name, None)
+        if docs is None:
+            docs = replay_journal(read_json_file(self.path), self.journal_path).get(name, {})
+        return docs
+
+    def _allocate_ids(self, name, inserts):
+        """{provisional_id: stored_id} for new records, past every id in the file and journal."""
+        self._catch_up()
+        next_id = max(self._max_ids.get(name, 0) + 1, min(inserts, default=0))
+        stored = {}
+        for provisional_id in inserts:
+            stored[provisional_id] = next_id
+            next_id += 1
+        if stored:
+            self._max_ids[name] = next_id - 1
+        return stored
+
+    def _catch_up(self):
+        # Another process sharing the database appends to the same journal; note the ids it used
+        size = os.fstat(self._journal.fileno()).st_size
+        if size == self._journal_end:
+            return
+        if size > self._journal_end:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(self._journal_end)
+                foreign = {}
+                for entry in _journal_entries(f.read()):
+                    if entry['op'] == 'insert':
+                        foreign.setdefault(entry['table'], {})[str(entry['doc_id'])] = None
+        else:
+            # It compacted the journal into the JSON file
+            foreign = replay_journal(read_json_file(self.path), self.journal_path)
+        for name, max_id in _max_doc_ids(foreign).items():
+            self._max_ids[name] = max(self._max_ids.get(name, 0), max_id)
+        self._journal_end = size
+
+    def _append_raw(self, text):
+        self._journal.write(text)
+        self._journal.flush()
+        self._journal_end = self._journal.tell()
+
+    def _append_many(self, entries):
+        if not entries:
+            return
+        self._append_raw("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+        if self._journal.tell() >= JOURNAL_COMPACT_BYTES:
+            self._start_compaction()
+        else:
+            self._schedule_idle_compaction()
+
+    def _schedule_idle_compaction(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self._idle_timer = threading.Timer(JOURNAL_IDLE_SECONDS, self._start_compaction)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _start_compaction(self):
+        with self._lock:
+            if self._compacting or self._journal.closed:
+                return
+            self._compacting = True
+        threading.Thread(target=self._compact_in_background, daemon=True).start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception as e:
+            self.last_compaction_error = e
+            for callback in self._compaction_error_listeners:
+                callback(e)
+        finally:
+            self._compacting = False
+
+    def compact(self):
+        """Folds the journal into the JSON file and drops the journal entries it covers.
+
+        The file is rebuilt from what is on disk, so an external edit to it is kept, with
+        our journal replayed on top as the next open would do. A compaction already running
+        (started by the idle timer, say) is waited for first.
+        """
+        with self._compaction_lock:
+            self._compact()
+            self.last_compaction_error = None
+
+    def _compact(self):
+        with self._lock:
+            if self._journal.closed:
+                return
+            self._journal.flush()
+            covered = os.fstat(self._journal.fileno()).st_size
+            if covered == 0:
+                return
+            file_mtime = _file_mtime(self.path)
+
+        data = replay_journal(read_json_file(self.path), self.journal_path, end=covered)
+        snapshot = json.dumps(data)
+        if _file_mtime(self.path) != file_mtime:
+            return  # Rewritten while we read it; the next compaction picks the edit up
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            with contextlib.suppress(FileNotFoundError):
+                shutil.copymode(self.path, tmp_path)  # mkstemp makes it private to us
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            # Keep anything appended while the snapshot was being written
+            self._journal.flush()
+            with open(self.journal_path, 'rb') as f:
+                f.seek(covered)
+                tail = f.read()
+            self._journal.close()
+            with open(self.journal_path, 'wb') as f:
+                f.write(tail)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal_end = self._journal.tell()
+            record_own_write(self.own_writes, file_mtime, _file_mtime(self.path))
+
+    def close(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+        self.compact()
+        with self._lock:
+            self._journal.close()
+
+def read_json_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return {}
+    return json.loads(raw) if raw.strip() else {}
+
+def _journal_ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+OWN_WRITES_KEEP = 64
+
+def record_own_write(own_writes, before, after):
+    """Remembers that we took the file from mtime before to mtime after ({after: before})."""
+    if before != after:  # Too coarse a clock to tell the two states apart
+        own_writes[after] = before
+        while len(own_writes) > OWN_WRITES_KEEP:
+            del own_writes[next(iter(own_writes))]
+
+def _file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def _max_doc_ids(data):
+    return {name: max(map(int, docs), default=0) for name, docs in data.items()}
+
+def _journal_entries(raw):
+    for line in raw.decode('utf-8', errors='replace').splitlines():
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # A line torn by a crash mid-append (or a blank one); the records around it are intact
+            continue
+
+def replay_journal(data, journal_path, end=None):
+    """Applies the journal records (up to byte offset end) to a TinyDB-format dict ({table: {doc_id: doc}})."""
+    if not os.path.exists(journal_path):
+        return data
+    with open(journal_path, 'rb') as f:
+        raw = f.read() if end is None else f.read(end)
+    for entry in _journal_entries(raw):
+        table = data.setdefault(entry['table'], {})
+        if entry['op'] == 'insert':
+            table[str(entry['doc_id'])] = entry['doc']
+        elif entry['op'] == 'update':
+            for doc_id in entry['doc_ids']:
+                if str(doc_id) in table:
+                    table[str(doc_id)].update(entry['fields'])
+        elif entry['op'] == 'remove':
+            for doc_id in entry['doc_ids']:
+                table.pop(str(doc_id), None)
+    return data
+
+class SQLiteTable:
+    def __init__(self, store, name):
+        self._store = store
+        self._name = name
+        self._columns = SQLITE_INDEXED_FIELDS.get(name, ())
+
+    def _where_sql(self, where):
+        clauses, params = [], []
+        for field, value in where.items():
+            if field in self._columns:
+                clauses.append(f'"{field}" = ?')
+            else:
+                clauses.append("json_extract(data, ?) = ?")
+                params.append(f"$.{field}")
+            params.append(value)
+        return " AND ".join(clauses) or "1", params
+
+    def _column_values(self, record):
+        return [record.get(field) for field in self._columns]
+
+    def all(self):
+        rows = self._store._query(f'SELECT doc_id, data FROM "{self._name}" ORDER BY doc_id')
+        return [StoredDoc(json.loads(data), doc_id) for doc_id, data in rows]
+
+    def get(self, doc_id=None, **where):
+        if doc_id is not None:
+            rows = self._store._query(f'SELECT doc_id, data FROM "{self._name}" WHERE doc_id = ?', (doc_id,))
+        else:
+            sql, params = self._where_sql(where)
+            rows = self._store._query(f'SELECT doc_id, data FROM "{self._name}" WHERE {sql} LIMIT 1', params)
+        return StoredDoc(json.loads(rows[0][1]), rows[0][0]) if rows else None
+
+    def search(self, **where):
+        sql, params = self._where_sql(where)
+        rows = self._store._query(f'SELECT doc_id, data FROM "{self._name}" WHERE {sql} ORDER BY doc_id', params)
+        return [StoredDoc(json.loads(data), doc_id) for doc_id, data in rows]
+
+    def insert(self, record):
+        cols = "".join(f', "{c}"' for c in self._columns)
+        marks = ", ?" * len(self._columns)
+        with self._store._transaction() as cur:
+            cur.execute(f'INSERT INTO "{self._name}" (data{cols}) VALUES (?{marks})',
+                        [json.dumps(record, ensure_ascii=False)] + self._column_values(record))
+            return cur.lastrowid
+
+    def update(self, fields, doc_ids=None, **where):
+        if doc_ids is None:
+            doc_ids = [doc.doc_id for doc in self.search(**where)]
+        assignments = "".join(f', "{c}" = ?' for c in self._columns)
+        updated = []
+        with self._store._transaction() as cur:
+            for doc_id in doc_ids:
+                row = cur.execute(f'SELECT data FROM "{self._name}" WHERE doc_id = ?', (doc_id,)).fetchone()
+                if row is None:
+                    continue
+                record = json.loads(row[0])
+                record.update(fields)
+                cur.execute(f'UPDATE "{self._name}" SET data = ?{assignments} WHERE doc_id = ?',
+                            [json.dumps(record, ensure_ascii=False)] + self._column_values(record) + [doc_id])
+                updated.append(doc_id)
+        return updated
+
+    def remove(self, doc_ids):
+        doc_ids = list(doc_ids)
+        with self._store._transaction() as cur:
+            cur.executemany(f'DELETE FROM "{self._name}" WHERE doc_id = ?', [(d,) for d in doc_ids])
+        return doc_ids
+
+    def apply_batch(self, upserts, removes, inserts=None):
+        cols = "".join(f', "{c}"' for c in self._columns)
+        marks = ", ?" * len(self._columns)
+        stored = {}
+        with self._store._transaction() as cur:
+            cur.executemany(f'DELETE FROM "{self._name}" WHERE doc_id = ?', [(d,) for d in removes])
+            cur.executemany(
+                f'INSERT OR REPLACE INTO "{self._name}" (doc_id, data{cols}) VALUES (?, ?{marks})',
+                [[doc_id, json.dumps(doc, ensure_ascii=False)] + self._column_values(doc)
+                 for doc_id, doc in upserts.items()]
+            )
+            # AUTOINCREMENT picks the ids inside the write lock, past any another connection used
+            for provisional_id, doc in (inserts or {}).items():
+                cur.execute(f'INSERT INTO "{self._name}" (data{cols}) VALUES (?{marks})',
+                            [json.dumps(doc, ensure_ascii=False)] + self._column_values(doc))
+                stored[provisional_id] = cur.lastrowid
+        return stored
+
+class SQLiteStore:
+    engine = "SQLite"
+
+    def __init__(self, path):
+        self.path = path
+        # The connection is shared with worker threads, so every access goes through the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._transaction() as cur:
+            for name, columns in SQLITE_INDEXED_FIELDS.items():
+                cols = "".join(f', "{c}" TEXT' for c in columns)
+                cur.execute(f'CREATE TABLE IF NOT EXISTS "{name}" '
+                            f'(doc_id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL{cols})')
+                for c in columns:
+                    cur.execute(f'CREATE INDEX IF NOT EXISTS "idx_{name}_{c}" ON "{name}" ("{c}")')
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+            cur.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def table(self, name):
+        if name not in SQLITE_INDEXED_FIELDS:
+            raise ValueError(f"Unknown table: {name}")
+        return SQLiteTable(self, name)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def is_sqlite_path(path):
+    return path.lower().endswith(SQLITE_EXTENSIONS)
+
+def describe_engine(path, journaled=False):
+    if is_sqlite_path(path):
+        return SQLiteStore.engine
+    return JournaledTinyDBStore.engine if journaled else TinyDBStore.engine
+
+def open_store(path, journaled=False):
+    """Opens the backend for path; journaled only affects JSON databases."""
+    if is_sqlite_path(path):
+        return SQLiteStore(path)
+    return JournaledTinyDBStore(path) if journaled else TinyDBStore(path)
+
+def migrate_tinydb_to_sqlite(json_path, sqlite_path):
+    """Copies every table of a TinyDB JSON file into a new SQLite database, keeping doc ids."""
+    # Include writes still sitting in a journal from journaled mode
+    data = replay_journal(read_json_file(json_path), json_path + JOURNAL_SUFFIX)
+
+    store = SQLiteStore(sqlite_path)
+    counts = {}
+    try:
+        with store._transaction() as cur:
+            for name, columns in SQLITE_INDEXED_FIELDS.items():
+                docs = data.get(name, {})
+                cols = "".join(f', "{c}"' for c in columns)
+                marks = ", ?" * len(columns)
+                cur.executemany(
+                    f'INSERT OR REPLACE INTO "{name}" (doc_id, data{cols}) VALUES (?, ?{marks})',
+                    [[int(doc_id), json.dumps(doc, ensure_ascii=False)] + [doc.get(c) for c in columns]
+                     for doc_id, doc in docs.items()]
+                )
+                counts[name] = len(docs)
+    finally:
+        store.close()
+    return counts
+
+# Write-back cache. Tables are loaded into memory once and served from there; writes
+# only mark records dirty and are flushed to the backend in one batch after a short
+# debounce (never later than the configured max latency), on close, or on flush().
+FLUSH_DEBOUNCE_MS = 300
+
+# Secondary indexes kept by the cache: hash indexes map a value to the set of doc ids
+# holding it, sorted indexes keep (value, doc_id) pairs in order for range lookups.
+HASH_INDEXED_FIELDS = {
+    'tasks': ('category', 'status', 'priority'),
+    'category_goals': ('category',),
+}
+SORTED_INDEXED_FIELDS = {
+    'tasks': ('deadline',),
+}
+# What the UI shows for a record that lacks the field, so index lookups agree with it
+INDEX_DEFAULTS = {'category': 'General', 'status': 'Pending'}
+
+class CachedTable:
+    def __init__(self, cache, backend, name):
+        self._cache = cache
+        self._backend = backend
+        self._name = name
+        self._docs = {doc.doc_id: StoredDoc(doc, doc.doc_id) for doc in backend.all()}
+        # Ids handed out by insert() are provisional until flushed: the backend may store the
+        # record under another id if someone else took that one meanwhile (see _reassign)
+        self._next_id = max(self._docs, default=0) + 1
+        self._new = set()
+        self._last_moved = {}
+        self._dirty = set()
+        self._removed = set()
+        self._listeners = []
+
+        self._hash_indexes = {field: {} for field in HASH_INDEXED_FIELDS.get(name, ())}
+        self._sorted_indexes = {field: [] for field in SORTED_INDEXED_FIELDS.get(name, ())}
+        for doc in self._docs.values():
+            for field, index in self._hash_indexes.items():
+                index.setdefault(self._index_key(doc, field), set()).add(doc.doc_id)
+        for field, index in self._sorted_indexes.items():
+            index.extend(sorted((self._index_key(doc, field), doc.doc_id) for doc in self._docs.values()))
+
+    @staticmethod
+    def _index_key(doc, field):
+        value = doc.get(field)
+        if value is None:
+            value = INDEX_DEFAULTS.get(field, '')
+        return value
+
+    def _index_add(self, doc):
+        for field, index in self._hash_indexes.items():
+            index.setdefault(self._index_key(doc, field), set()).add(doc.doc_id)
+        for field, index in self._sorted_indexes.items():
+            bisect.insort(index, (self._index_key(doc, field), doc.doc_id))
+
+    def _index_remove(self, doc):
+        for field, index in self._hash_indexes.items():
+            key = self._index_key(doc, field)
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.discard(doc.doc_id)
+                if not bucket:
+                    del index[key]
+        for field, index in self._sorted_indexes.items():
+            entry = (self._index_key(doc, field), doc.doc_id)
+            pos = bisect.bisect_left(index, entry)
+            if pos < len(index) and index[pos] == entry:
+                del index[pos]
+
+    def ids_where(self, field, value):
+        """Doc ids whose field equals value, from the hash index. Do not mutate the result."""
+        return self._hash_indexes[field].get(value, frozenset())
+
+    def distinct(self, field):
+        return list(self._hash_indexes[field])
+
+    def ids_between(self, field, low, high):
+        """Doc ids whose field lies in [low, high], in field order, from the sorted index."""
+        index = self._sorted_indexes[field]
+        start = bisect.bisect_left(index, (low,))
+        end = bisect.bisect_left(index, (high, float('inf')))
+        return [doc_id for _, doc_id in index[start:end]]
+
+    def get_many(self, doc_ids):
+        return [self._docs[doc_id] for doc_id in doc_ids]
+
+    def doc_ids(self):
+        return list(self._docs)
+
+    def add_listener(self, callback):
+        """callback(old_doc, new_doc) runs after every change; old_doc is None for inserts, new_doc for removals."""
+        self._listeners.append(callback)
+
+    def _notify(self, old_doc, new_doc):
+        for callback in self._listeners:
+            callback(old_doc, new_doc)
+
+    # Returned documents are shared with the cache and must be treated as read-only
+    def all(self):
+        return list(self._docs.values())
+
+    def get(self, doc_id=None, **where):
+        if doc_id is not None:
+            return self._docs.get(doc_id)
+        return next(iter(self.search(**where)), None)
+
+    def search(self, **where):
+        indexed = [field for field in where if field in self._hash_indexes]
+        if indexed:
+            # Start from the smallest matching bucket and check the rest per document
+            field = min(indexed, key=lambda f: len(self.ids_where(f, where[f])))
+            candidates = self.get_many(sorted(self.ids_where(field, where[field])))
+        else:
+            candidates = self._docs.values()
+        return [doc for doc in candidates
+                if all(self._index_key(doc, f) == v if f in INDEX_DEFAULTS else doc.get(f) == v
+                       for f, v in where.items())]
+
+    def insert(self, record):
+        doc_id = self._next_id
+        self._next_id += 1
+        self._docs[doc_id] = StoredDoc(record, doc_id)
+        self._index_add(self._docs[doc_id])
+        self._removed.discard(doc_id)
+        self._new.add(doc_id)
+        self._notify(None, self._docs[doc_id])
+        self._mark_dirty(doc_id)
+        return self._stored_id(doc_id)
+
+    def insert_many(self, records):
+        """Inserts all records with a single flush scheduled; returns their doc ids."""
+        doc_ids = []
+        for record in records:
+            doc_id = self._next_id
+            self._next_id += 1
+            self._docs[doc_id] = StoredDoc(record, doc_id)
+            self._index_add(self._docs[doc_id])
+            self._removed.discard(doc_id)
+            self._new.add(doc_id)
+            self._dirty.add(doc_id)
+            self._notify(None, self._docs[doc_id])
+            doc_ids.append(doc_id)
+        if doc_ids:
+            self._cache._schedule_flush()
+        return [self._stored_id(doc_id) for doc_id in doc_ids]
+
+    def _stored_id(self, doc_id):
+        # Without a scheduler the flush already ran, possibly storing the record under another id
+        return self._last_moved.get(doc_id, doc_id)
+
+    def update(self, fields, doc_ids=None, **where):
+        if doc_ids is None:
+            doc_ids = [doc.doc_id for doc in self.search(**where)]
+        updated = []
+        for doc_id in doc_ids:
+            doc = self._docs.get(doc_id)
+            if doc is None:
+                continue
+            # Copy on write so lists handed out earlier keep their old values
+            new_doc = StoredDoc(doc, doc_id)
+            new_doc.update(fields)
+            self._index_remove(doc)
+            self._docs[doc_id] = new_doc
+            self._index_add(new_doc)
+            self._mark_dirty(doc_id)
+            self._notify(doc, new_doc)
+            updated.append(doc_id)
+        return updated
+
+    def update_many(self, changes):
+        """Applies {doc_id: fields} with a single flush scheduled; returns the updated doc ids."""
+        updated = []
+        for doc_id, fields in changes.items():
+            doc = self._docs.get(doc_id)
+            if doc is None:
+                continue
+            new_doc = StoredDoc(doc, doc_id)
+            new_doc.update(fields)
+            self._index_remove(doc)
+            self._docs[doc_id] = new_doc
+            self._index_add(new_doc)
+            self._dirty.add(doc_id)
+            self._notify(doc, new_doc)
+            updated.append(doc_id)
+        if updated:
+            self._cache._schedule_flush()
+        return updated
+
+    def remove(self, doc_ids):
+        removed = []
+        for doc_id in doc_ids:
+            doc = self._docs.pop(doc_id, None)
+            if doc is not None:
+                self._index_remove(doc)
+                self._notify(doc, None)
+                removed.append(doc_id)
+        for doc_id in removed:
+            self._dirty.discard(doc_id)
+            if doc_id in self._new:
+                # Never stored, and its id may belong to someone else's record on disk
+                self._new.discard(doc_id)
+            else:
+                self._removed.add(doc_id)
+        if removed:
+            self._cache._schedule_flush()
+        return removed
+
+    def _mark_dirty(self, doc_id):
+        self._dirty.add(doc_id)
+        self._cache._schedule_flush()
+
+    def pending_count(self):
+        return len(self._dirty) + len(self._removed)
+
+    def _flush(self):
+        if not self._dirty and not self._removed:
+            return False
+        inserts = {doc_id: dict(self._docs[doc_id]) for doc_id in sorted(self._new)}
+        upserts = {doc_id: dict(self._docs[doc_id]) for doc_id in self._dirty - self._new}
+        stored = self._backend.apply_batch(upserts, sorted(self._removed), inserts)
+        self._new.clear()
+        self._dirty.clear()
+        self._removed.clear()
+        moved = self._last_moved = {doc_id: stored_id for doc_id, stored_id in stored.items() if doc_id != stored_id}
+        if moved:
+            self._reassign(moved)
+        return True
+
+    def _reassign(self, moved):
+        """Moves records to other doc ids ({old_id: new_id}) and tells listeners and the cache."""
+        docs = [(self._docs.pop(old_id), new_id) for old_id, new_id in moved.items()]
+        for doc, _ in docs:
+            self._index_remove(doc)
+            self._notify(doc, None)
+        for doc, new_id in docs:
+            new_doc = StoredDoc(doc, new_id)
+            self._docs[new_id] = new_doc
+            self._index_add(new_doc)
+            self._notify(None, new_doc)
+        for pending in (self._new, self._dirty):
+            carried = {moved[doc_id] for doc_id in pending & moved.keys()}
+            pending.difference_update(moved)
+            pending.update(carried)
+        self._next_id = max(self._next_id, max(moved.values()) + 1)
+        self._cache._ids_reassigned(self._name, moved)
+
+    def snapshot(self):
+        """A shallow copy of the documents, safe to diff on another thread."""
+        return dict(self._docs)
+
+    def apply_external(self, snapshot, upserts, removes):
+        """Merges changes made to the database by someone else, record by record.
+
+        snapshot is what the changes were diffed against. Records changed locally since
+        then, or still waiting to be flushed, keep the local version.
+        """
+        changed = 0
+        for doc_id, record in upserts.items():
+            if doc_id in self._new:
+                # Someone else stored a record under the id ours was given; ours moves aside
+                self._reassign({doc_id: self._next_id})
+            elif self._docs.get(doc_id) is not snapshot.get(doc_id) or doc_id in self._dirty or doc_id in self._removed:
+                continue
+            doc = self._docs.get(doc_id)
+            new_doc = StoredDoc(record, doc_id)
+            if doc is not None:
+                self._index_remove(doc)
+            self._docs[doc_id] = new_doc
+            self._index_add(new_doc)
+            self._next_id = max(self._next_id, doc_id + 1)
+            self._notify(doc, new_doc)
+            changed += 1
+        for doc_id in removes:
+            doc = self._docs.get(doc_id)
+            if doc is None or doc is not snapshot.get(doc_id) or doc_id in self._dirty:
+                continue
+            del self._docs[doc_id]
+            self._index_remove(doc)
+            self._notify(doc, None)
+            changed += 1
+        return changed
+
+class WriteBackCache:
+    """Wraps a store so reads come from memory and writes reach disk in debounced batches.
+
+    scheduler is anything with Tk's after()/after_cancel(); without one every write is
+    flushed immediately.
+    """
+    def __init__(self, store, max_latency_ms, scheduler=None):
+        self.store = store
+        self.max_latency_ms = max_latency_ms
+        self._scheduler = scheduler
+        self._tables = {}
+        self._flush_id = None
+        self._first_dirty_at = None
+        self._own_writes = {}
+        self._reassign_listeners = []
+
+    @property
+    def engine(self):
+        return self.store.engine
+
+    def only_own_writes_since(self, mtime, current_mtime):
+        """True if the file went from mtime to current_mtime through our own writes alone.
+
+        A backend write re-reads the file, so it can carry along an external edit the cache
+        hasn't merged; then the mtime before that write isn't one we left, and this is False.
+        """
+        own_writes = getattr(self.store, 'own_writes', self._own_writes)
+        for _ in range(len(own_writes)):
+            if current_mtime == mtime:
+                return True
+            current_mtime = own_writes.get(current_mtime)
+        return current_mtime == mtime
+
+    def table(self, name):
+        if name not in self._tables:
+            self._tables[name] = CachedTable(self, self.store.table(name), name)
+        return self._tables[name]
+
+    def pending_count(self):
+        return sum(t.pending_count() for t in self._tables.values())
+
+    def add_reassign_listener(self, callback):
+        """callback(table_name, {old_id: new_id}) runs when new records end up under other ids
+        than insert() returned, because another process sharing the database took those."""
+        self._reassign_listeners.append(callback)
+
+    def _ids_reassigned(self, name, moved):
+        for callback in self._reassign_listeners:
+            callback(name, moved)
+
+    def _schedule_flush(self):
+        if self._scheduler is None or self.max_latency_ms <= 0:
+            self.flush()
+            return
+        now = time.monotonic()
+        if self._first_dirty_at is None:
+            self._first_dirty_at = now
+        # Each write pushes the flush back by the debounce, but never past the max latency
+        remaining_ms = self.max_latency_ms - (now - self._first_dirty_at) * 1000
+        delay = int(max(0, min(FLUSH_DEBOUNCE_MS, remaining_ms)))
+        if self._flush_id is not None:
+            self._scheduler.after_cancel(self._flush_id)
+        self._flush_id = self._scheduler.after(delay, self.flush)
+
+    def flush(self):
+        if self._flush_id is not None:
+            self._scheduler.after_cancel(self._flush_id)
+            self._flush_id = None
+        self._first_dirty_at = None
+        before = _file_mtime(self.store.path)
+        wrote = [table._flush() for table in self._tables.values()]
+        if any(wrote):
+            record_own_write(self._own_writes, before, _file_mtime(self.store.path))
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+# External changes. These run on a worker thread: read the database file from scratch
+# (independently of the open store) and diff it against a snapshot of the cache.
+def read_database_snapshot(path):
+    """Returns {table: {doc_id: record}} as currently stored on disk."""
+    if is_sqlite_path(path):
+        conn = sqlite3.connect(path)
+        try:
+            return {name: {doc_id: json.loads(data)
+                           for doc_id, data in conn.execute(f'SELECT doc_id, data FROM "{name}"')}
+                    for name in SQLITE_INDEXED_FIELDS}
+        finally:
+            conn.close()
+    data = replay_journal(read_json_file(path), path + JOURNAL_SUFFIX)
+    return {name: {int(doc_id): doc for doc_id, doc in docs.items()} for name, docs in data.items()}
+
+def diff_table(current, fresh):
+    """(upserts, removes) that turn the current {doc_id: doc} into fresh."""
+    upserts = {doc_id: doc for doc_id, doc in fresh.items() if current.get(doc_id) != doc}
+    removes = [doc_id for doc_id in current if doc_id not in fresh]
+    return upserts, removes
@@ -0,0 +1,95 @@
+"""Task records: priority, filtering and bulk edits. Nothing here touches the UI or the disk."""
+import datetime
+import hashlib
+
+from .search import tokenize
+
+TASK_IMPACTS = ("High", "Medium", "Low")
+DEFAULT_IMPACT = "High"  # For new tasks from the form, the command line and imports alike
+TASK_STATUSES = ("Pending", "In Progress", "Completed", "On Hold")
+
+PRIORITY_ORDER = {"Critical": 0, "Important": 1, "Planned": 2, "Review": 3, "Delegate": 4, "Trivial": 5}
+
+def get_priority(impact, is_urgent):
+    if impact == "High": return "Critical" if is_urgent else "Planned"
+    elif impact == "Medium": return "Important" if is_urgent else "Review"
+    else: return "Delegate" if is_urgent else "Trivial"
+
+def make_task(title, impact=DEFAULT_IMPACT, category="General", is_urgent=False, deadline=None,
+              status="Pending", notes="", created_at=None):
+    """A new task record with its priority worked out; dates default to today."""
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    return {
+        'title': title, 'impact': impact, 'category': category or "General",
+        'is_urgent': is_urgent, 'priority': get_priority(impact, is_urgent), 'deadline': deadline or today,
+        'status': status,
+        'notes': notes,
+        'created_at': created_at or today,
+    }
+
+def task_content_hash(task):
+    """Identity of a task for de-duplication: its title, category and deadline."""
+    key = "\x1f".join(str(task.get(field) or '').strip().casefold() for field in ('title', 'category', 'deadline'))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def filter_tasks(table, searcher, current_filter, hide_completed, search_txt):
+    """Tasks matching the list filters, in display order. Touches no widgets, so it can run on a worker."""
+    # 1. Search Filter: word-prefix match on title and notes. Starting from its ids means a
+    # narrow search only ever touches the tasks it matched.
+    ranks = searcher.search(search_txt) if tokenize(search_txt) else None
+    ids = None if ranks is None else ranks.keys()
+
+    # 2. Category Filter
+    if current_filter != "All Categories":
+        category_ids = table.ids_where('category', current_filter)
+        ids = category_ids if ids is None else ids & category_ids
+
+    # 3. Hide Completed Filter
+    if hide_completed and ids is not None:
+        ids = ids - table.ids_where('status', 'Completed')
+    completed_ids = table.ids_where('status', 'Completed') if hide_completed and ids is None else frozenset()
+
+    # Sort Logic: walk the priority index in display order, so only matching rows are touched
+    ordered = []
+    priorities = table.distinct('priority')
+    priorities.sort(key=lambda p: PRIORITY_ORDER.get(p, 99))
+    for priority in priorities:
+        bucket = table.ids_where('priority', priority)
+        if ids is not None:
+            bucket = ids & bucket
+        elif completed_ids:
+            bucket = bucket - completed_ids
+        ordered.extend(sorted(bucket))
+
+    # Best matches first; the sort is stable, so ties keep the priority order
+    if ranks is not None:
+        ordered.sort(key=ranks.__getitem__, reverse=True)
+    return table.get_many(ordered)
+
+def bulk_changes(table, doc_ids, status=None, category=None, impact=None, is_urgent=None, shift_days=0):
+    """{doc_id: changed fields} for a bulk edit; None (or 0 days) leaves a field as it is."""
+    changes = {}
+    for doc_id in doc_ids:
+        task = table.get(doc_id)
+        if task is None:
+            continue
+        fields = {}
+        if status is not None:
+            fields['status'] = status
+        if category is not None:
+            fields['category'] = category
+        if impact is not None or is_urgent is not None:
+            new_impact = impact if impact is not None else task.get('impact', DEFAULT_IMPACT)
+            new_urgent = is_urgent if is_urgent is not None else task.get('is_urgent', False)
+            fields.update(impact=new_impact, is_urgent=new_urgent, priority=get_priority(new_impact, new_urgent))
+        if shift_days:
+            try:
+                deadline = datetime.date.fromisoformat(task['deadline'])
+            except (KeyError, ValueError):
+                pass  # Leave a malformed deadline alone rather than guess
+            else:
+                fields['deadline'] = (deadline + datetime.timedelta(days=shift_days)).isoformat()
+        fields = {field: value for field, value in fields.items() if task.get(field) != value}
+        if fields:
+            changes[doc_id] = fields
+    return changes
@@ -0,0 +1,185 @@
+"""Bulk export and import of tasks as CSV, JSON and JSON Lines files."""
+import csv
+import datetime
+import json
+import os
+
+from .tasks import DEFAULT_IMPACT, TASK_IMPACTS, TASK_STATUSES, get_priority, task_content_hash
+
+# Exports stream from the task cache a chunk at a time on a worker thread, through a buffered
+# writer, into a temp file that replaces the target only once the export is complete.
+EXPORT_CSV_HEADER = ["ID", "Title", "Category", "Priority", "Status", "Deadline", "Impact", "Urgent", "Notes", "Created At"]
+EXPORT_CSV_FIELDS = ['title', 'category', 'priority', 'status', 'deadline', 'impact', 'is_urgent', 'notes', 'created_at']
+EXPORT_CHUNK = 500
+EXPORT_BUFFER_BYTES = 1 << 20
+
+def write_task_export(table, doc_ids, file_path, fmt="csv", progress=None, cancel_event=None):
+    """Writes the given tasks as CSV or JSONL; returns the number written, or None if cancelled."""
+    tmp_path = file_path + ".part"
+    written = 0
+    cancelled = False
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_BYTES) as file:
+            writer = csv.writer(file) if fmt == "csv" else None
+            if writer:
+                writer.writerow(EXPORT_CSV_HEADER)
+            for start in range(0, len(doc_ids), EXPORT_CHUNK):
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+                for doc_id in doc_ids[start:start + EXPORT_CHUNK]:
+                    task = table.get(doc_id)
+                    if task is None:
+                        continue  # Deleted since the export started
+                    if writer:
+                        writer.writerow([doc_id] + [task.get(field, '') for field in EXPORT_CSV_FIELDS])
+                    else:
+                        file.write(json.dumps({"id": doc_id, **task}, ensure_ascii=False) + "\n")
+                    written += 1
+                if progress:
+                    progress(min(start + EXPORT_CHUNK, len(doc_ids)))
+        if cancelled:
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, file_path)
+        return written
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+# Imports read the file a line at a time on a worker thread and validate every row against
+# the task form's rules. Nothing is written until the dry-run summary is confirmed; then all
+# new tasks go into the cache at once and reach disk in a single batch.
+IMPORT_ERRORS_SHOWN = 5
+IMPORT_COLUMNS = {**{h.lower(): f for h, f in zip(EXPORT_CSV_HEADER[1:], EXPORT_CSV_FIELDS)},
+                  **{f: f for f in EXPORT_CSV_FIELDS}}
+
+def _read_lines(file, progress):
+    """Decoded lines of a binary file, reporting the bytes read so far."""
+    read = 0
+    for i, line in enumerate(file):
+        read += len(line)
+        if progress and i % EXPORT_CHUNK == 0:
+            progress(read)
+        text = line.decode('utf-8')
+        yield text.lstrip('\ufeff') if i == 0 else text
+
+def iter_import_rows(file, fmt, progress=None):
+    """Yields (row number, raw dict or None, error or None) from an open binary file."""
+    if fmt == "csv":
+        reader = csv.reader(_read_lines(file, progress))
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = [IMPORT_COLUMNS.get(name.strip().lower()) for name in header]
+        if 'title' not in fields:
+            raise ValueError("The CSV file has no Title column.")
+        for row_no, row in enumerate(reader, start=2):
+            if any(cell.strip() for cell in row):
+                yield row_no, {f: v for f, v in zip(fields, row) if f}, None
+    elif fmt == "jsonl":
+        for row_no, line in enumerate(_read_lines(file, progress), start=1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError:
+                yield row_no, None, "not valid JSON"
+                continue
+            yield (row_no, raw, None) if isinstance(raw, dict) else (row_no, None, "not a JSON object")
+    else:
+        # A JSON document has to be parsed whole: a list of tasks, {"tasks": [...]},
+        # or a database file's {"tasks": {doc_id: task}}
+        data = json.load(file)
+        if isinstance(data, dict):
+            data = data.get('tasks', data)
+        if isinstance(data, dict):
+            data = list(data.values())
+        if not isinstance(data, list):
+            raise ValueError("The JSON file does not contain a list of tasks.")
+        for row_no, raw in enumerate(data, start=1):
+            yield (row_no, raw, None) if isinstance(raw, dict) else (row_no, None, "not a JSON object")
+
+def _import_choice(value, choices, default, field):
+    text = str(value if value is not None else '').strip()
+    if not text:
+        return default
+    for choice in choices:
+        if choice.lower() == text.lower():
+            return choice
+    raise ValueError(f"unknown {field} '{text}'")
+
+def _import_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else '').strip().lower()
+    if text in ('true', 'yes', 'y', '1'):
+        return True
+    if text in ('false', 'no', 'n', '0', ''):
+        return False
+    raise ValueError(f"urgent must be yes or no, not '{value}'")
+
+def _import_date(value, default, field):
+    text = str(value if value is not None else '').strip()
+    if not text:
+        return default
+    try:
+        # fromisoformat is much faster than strptime but also takes other ISO forms
+        if len(text) == 10 and text[4] == text[7] == '-':
+            return datetime.date.fromisoformat(text).isoformat()
+    except ValueError:
+        pass
+    raise ValueError(f"{field} '{text}' is not a YYYY-MM-DD date")
+
+def normalize_import_row(raw, today):
+    """A task record built from an imported row, or ValueError saying what is wrong with it."""
+    title = str(raw.get('title') or '').strip()
+    if not title:
+        raise ValueError("missing title")
+    impact = _import_choice(raw.get('impact'), TASK_IMPACTS, DEFAULT_IMPACT, "impact")
+    is_urgent = _import_bool(raw.get('is_urgent'))
+    return {
+        'title': title, 'impact': impact, 'category': str(raw.get('category') or '').strip() or "General",
+        'is_urgent': is_urgent, 'priority': get_priority(impact, is_urgent),
+        'deadline': _import_date(raw.get('deadline'), today, "deadline"),
+        'status': _import_choice(raw.get('status'), TASK_STATUSES, "Pending", "status"),
+        'notes': str(raw.get('notes') or ''),
+        'created_at': _import_date(raw.get('created_at'), today, "created date"),
+    }
+
+def plan_task_import(file_path, fmt, existing_tasks, progress=None, cancel_event=None):
+    """Dry run of an import: the new records plus what would be skipped, or None if cancelled."""
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    seen = {task_content_hash(task) for task in existing_tasks}
+    plan = {"records": [], "duplicates": 0, "errors": []}
+    with open(file_path, 'rb') as file:
+        for count, (row_no, raw, error) in enumerate(iter_import_rows(file, fmt, progress)):
+            if count % EXPORT_CHUNK == 0 and cancel_event is not None and cancel_event.is_set():
+                return None
+            if error is None:
+                try:
+                    record = normalize_import_row(raw, today)
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                plan["errors"].append((row_no, error))
+                continue
+            content_hash = task_content_hash(record)
+            if content_hash in seen:
+                plan["duplicates"] += 1
+                continue
+            seen.add(content_hash)
+            plan["records"].append(record)
+    return plan
+
+def format_import_plan(plan, file_name):
+    lines = [f"{len(plan['records'])} new task(s) will be imported from {file_name}."]
+    if plan["duplicates"]:
+        lines.append(f"{plan['duplicates']} duplicate(s) will be skipped.")
+    if plan["errors"]:
+        lines.append(f"{len(plan['errors'])} invalid row(s) will be skipped:")
+        lines += [f"    Row {row_no}: {error}" for row_no, error in plan["errors"][:IMPORT_ERRORS_SHOWN]]
+        if len(plan["errors"]) > IMPORT_ERRORS_SHOWN:
+            lines.append(f"    ...and {len(plan['errors']) - IMPORT_ERRORS_SHOWN} more")
+    return "\n".join(lines)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class ManualScheduler:
+    """Stands in for Tk's after()/after_cancel(): nothing runs until the test flushes."""
+    def __init__(self):
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, delay, callback):
+        self._next_id += 1
+        self.pending[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+@pytest.fixture
+def scheduler():
+    return ManualScheduler()
@@ -0,0 +1,15 @@
+from taskmaster_core.planning import (AI_INPUT_TOKEN_BUDGET, build_plan_request, estimate_request_tokens,
+                                      smallest_budget_provider)
+from taskmaster_core.tasks import make_task
+
+HOURS = ("9:00 AM - 6:00 PM", "9:00 AM - 12:00 PM", "3:00 PM - 5:00 PM")
+
+def test_raced_request_fits_the_smallest_budget():
+    provider = smallest_budget_provider(["Claude", "Gemini", "Ollama"])
+    assert provider == "Ollama"
+    tasks = [make_task(f"Write chapter {i} of the quarterly planning report", deadline="2026-02-01")
+             for i in range(2000)]
+    request = build_plan_request(tasks, {}, *HOURS, provider=provider)
+    for racer in ("Claude", "Gemini", "Ollama"):
+        tokens = estimate_request_tokens(request["system_prompt"], request["messages"], racer)
+        assert tokens <= AI_INPUT_TOKEN_BUDGET[racer]
@@ -0,0 +1,97 @@
+import pytest
+
+from taskmaster_core.search import NARROW_RATIO, SEARCH_TITLE_WEIGHT, IncrementalSearch, SearchIndex
+from taskmaster_core.storage import StoredDoc
+
+def build_index(records):
+    index = SearchIndex()
+    for doc_id, (title, notes) in records.items():
+        index.on_change(None, StoredDoc({'title': title, 'notes': notes}, doc_id))
+    return index
+
+@pytest.fixture
+def index():
+    return build_index({
+        1: ("Quarterly report", ""),
+        2: ("Report bug", "reported by the client"),
+        3: ("Buy groceries", "milk and bread"),
+        4: ("Review budget report", ""),
+        5: ("Reporting tool", ""),
+    })
+
+def test_terms_match_word_prefixes(index):
+    assert set(index.search("rep")) == {1, 2, 4, 5}
+    assert set(index.search("gro")) == {3}
+    assert index.search("xyz") == {}
+
+def test_single_letter_matches_whole_words_only(index):
+    assert index.search("r") == {}
+    assert set(build_index({1: ("Plan a trip", "")}).search("a")) == {1}
+
+def test_exact_word_outranks_prefix_match(index):
+    scores = index.search("report")
+    assert scores[1] == SEARCH_TITLE_WEIGHT * 2
+    assert scores[5] == SEARCH_TITLE_WEIGHT
+    assert scores[1] > scores[5]
+
+def test_every_term_must_match(index):
+    assert set(index.search("rep bu")) == {2, 4}
+    assert set(index.search("report milk")) == set()
+
+COMMON_PRO_WORDS = ["project", "progress", "process", "product", "profile", "program", "promise", "provider",
+                    "protocol", "prototype"]
+
+def pro_index():
+    # Many common words start with "pro"; the one we look for is the rarest of them
+    records = {}
+    for word in COMMON_PRO_WORDS:
+        for _ in range(3):
+            records[len(records) + 1] = (f"{word} work", "")
+    records[len(records) + 1] = ("Quarterly proposal", "")
+    return build_index(records), len(records)
+
+def test_prefix_matches_every_word_it_starts():
+    index, proposal = pro_index()
+    assert proposal in index.search("pro")
+    assert len(index.search("pro")) == proposal
+    assert set(index.search("quarterly pro")) == {proposal}
+
+def test_narrowing_by_a_small_result_scores_like_a_full_scan():
+    records = {doc_id: ("common chore", "") for doc_id in range(1, 101)}
+    records.update({101: ("rare common errand", ""), 102: ("rare errand", "")})
+    index = build_index(records)
+    rare = index.search("rare")
+    assert len(rare) * NARROW_RATIO < len(index.search("common"))
+    assert index.refine(rare, "common") == {101: SEARCH_TITLE_WEIGHT * 4}
+    assert index.search("rare com") == {101: SEARCH_TITLE_WEIGHT * 3}
+
+def test_index_follows_edits(index):
+    index.on_change(StoredDoc({'title': "Buy groceries", 'notes': "milk and bread"}, 3),
+                    StoredDoc({'title': "Buy stamps", 'notes': ""}, 3))
+    assert index.search("groceries") == {}
+    assert set(index.search("stamp")) == {3}
+    index.on_change(StoredDoc({'title': "Buy stamps", 'notes': ""}, 3), None)
+    assert index.search("buy") == {}
+
+def test_incremental_search_matches_a_fresh_search(index):
+    incremental = IncrementalSearch(index)
+    typed = "review budget rep"
+    queries = [typed[:end] for end in range(1, len(typed) + 1)]
+    for query in queries + queries[::-1] + ["rep rep", "bu rep", ""]:
+        assert incremental.search(query) == index.search(query), query
+
+def test_incremental_search_narrows_to_rare_prefix_words():
+    index, proposal = pro_index()
+    incremental = IncrementalSearch(index)
+    typed = "quarterly pro"
+    for end in range(1, len(typed) + 1):
+        assert incremental.search(typed[:end]) == index.search(typed[:end]), typed[:end]
+    assert set(incremental.search(typed)) == {proposal}
+
+def test_incremental_search_sees_changes_after_invalidate(index):
+    incremental = IncrementalSearch(index)
+    assert set(incremental.search("report bu")) == {2, 4}
+    index.on_change(None, StoredDoc({'title': "Report bugs fixed", 'notes': ""}, 6))
+    incremental.invalidate()
+    assert set(incremental.search("report bu")) == {2, 4, 6}
+    assert incremental.search("report bug") == index.search("report bug")
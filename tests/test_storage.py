@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+
+import pytest
+
+from taskmaster_core import TaskService, make_task
+from taskmaster_core import storage
+from taskmaster_core.storage import (JOURNAL_SUFFIX, WriteBackCache, diff_table, open_store,
+                                     read_database_snapshot, replay_journal)
+
+def write_journal(path, entries, torn=None):
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+        if torn is not None:
+            f.write(torn)
+
+def titles(docs):
+    return {int(doc_id): doc['title'] for doc_id, doc in docs.items()}
+
+# --- Journal replay ---
+
+def test_replay_applies_journal_records_in_order(tmp_path):
+    journal = tmp_path / "tasks.json.journal"
+    write_journal(journal, [
+        {'op': 'insert', 'table': 'tasks', 'doc_id': 3, 'doc': {'title': "Three"}},
+        {'op': 'update', 'table': 'tasks', 'doc_ids': [1], 'fields': {'title': "One, renamed"}},
+        {'op': 'remove', 'table': 'tasks', 'doc_ids': [2]},
+        {'op': 'insert', 'table': 'tasks', 'doc_id': 3, 'doc': {'title': "Three, replaced"}},
+    ])
+    data = {'tasks': {"1": {'title': "One"}, "2": {'title': "Two"}}}
+    assert titles(replay_journal(data, str(journal))['tasks']) == {1: "One, renamed", 3: "Three, replaced"}
+
+def test_replay_skips_a_torn_record(tmp_path):
+    journal = tmp_path / "tasks.json.journal"
+    write_journal(journal, [{'op': 'insert', 'table': 'tasks', 'doc_id': 1, 'doc': {'title': "Kept"}}],
+                  torn='{"op": "insert", "table": "tasks", "doc_id": 2, "do')
+    with open(journal, 'a', encoding='utf-8') as f:
+        # Written after a crash; the store starts new records on a fresh line
+        f.write("\n" + json.dumps({'op': 'insert', 'table': 'tasks', 'doc_id': 3, 'doc': {'title': "After"}}) + "\n")
+    assert titles(replay_journal({}, str(journal))['tasks']) == {1: "Kept", 3: "After"}
+
+def test_replay_stops_at_end_offset(tmp_path):
+    journal = tmp_path / "tasks.json.journal"
+    first = {'op': 'insert', 'table': 'tasks', 'doc_id': 1, 'doc': {'title': "Covered"}}
+    write_journal(journal, [first, {'op': 'remove', 'table': 'tasks', 'doc_ids': [1]}])
+    end = len(json.dumps(first)) + 1
+    assert titles(replay_journal({}, str(journal), end=end)['tasks']) == {1: "Covered"}
+
+def test_journaled_writes_survive_without_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "JOURNAL_IDLE_SECONDS", 3600)
+    path = str(tmp_path / "tasks.json")
+    service = TaskService(path, journaled=True)
+    kept, done, dropped = service.add_tasks([make_task("Kept"), make_task("Done"), make_task("Dropped")])
+    service.update_task(done, {'status': "Completed"})
+    service.remove_tasks([dropped])
+
+    # Nothing folded into the JSON file yet: a new process reads it back from the journal
+    assert (tmp_path / ("tasks.json" + JOURNAL_SUFFIX)).stat().st_size > 0
+    on_disk = read_database_snapshot(path)['tasks']
+    assert titles(on_disk) == {kept: "Kept", done: "Done"}
+    assert on_disk[done]['status'] == "Completed"
+
+    reopened = TaskService(path, journaled=True)
+    assert titles(reopened.tasks.snapshot()) == {kept: "Kept", done: "Done"}
+    reopened.close()
+    service.close()
+
+    # Compacted on close: the JSON file alone holds everything
+    with open(path, 'r', encoding='utf-8') as f:
+        assert titles(json.load(f)['tasks']) == {kept: "Kept", done: "Done"}
+    assert (tmp_path / ("tasks.json" + JOURNAL_SUFFIX)).stat().st_size == 0
+
+def test_close_waits_for_a_background_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "JOURNAL_IDLE_SECONDS", 3600)
+    path = str(tmp_path / "tasks.json")
+    service = TaskService(path, journaled=True)
+    service.add_tasks([make_task(f"Task {i}") for i in range(50)])
+
+    # Hold the background compaction between reading the file and replacing it
+    reading, release = threading.Event(), threading.Event()
+    replay = storage.replay_journal
+
+    def slow_replay(*args, **kwargs):
+        if threading.current_thread() is not threading.main_thread() and not reading.is_set():
+            reading.set()
+            release.wait(5)
+        return replay(*args, **kwargs)
+
+    monkeypatch.setattr(storage, "replay_journal", slow_replay)
+    service.db.store._start_compaction()
+    assert reading.wait(5)
+    closing = threading.Thread(target=service.close)
+    closing.start()
+    closing.join(0.2)
+    assert closing.is_alive()  # close() waits instead of compacting alongside
+    release.set()
+    closing.join(5)
+    assert not closing.is_alive()
+
+    assert service.db.store.last_compaction_error is None
+    with open(path, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)['tasks']) == 50
+    assert (tmp_path / ("tasks.json" + JOURNAL_SUFFIX)).stat().st_size == 0
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_failed_background_compaction_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "JOURNAL_IDLE_SECONDS", 3600)
+    service = TaskService(str(tmp_path / "tasks.json"), journaled=True)
+    service.add_task(make_task("Still in the journal"))
+    store = service.db.store
+    errors = []
+    store.add_compaction_error_listener(errors.append)
+
+    def disk_full():
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(store, "_compact", disk_full)
+    store._start_compaction()
+    deadline = time.monotonic() + 5
+    while store._compacting and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [str(e) for e in errors] == ["No space left on device"]
+    assert store.last_compaction_error is errors[0]
+
+    monkeypatch.undo()
+    service.close()
+    assert store.last_compaction_error is None
+    assert titles(read_database_snapshot(str(tmp_path / "tasks.json"))['tasks']) == {1: "Still in the journal"}
+
+# --- Merging external changes ---
+
+def test_apply_external_merges_record_by_record(tmp_path, scheduler):
+    cache = WriteBackCache(open_store(str(tmp_path / "tasks.json")), 1000, scheduler)
+    tasks = cache.table('tasks')
+    one, two, three, four = tasks.insert_many([make_task("One"), make_task("Two"), make_task("Three"),
+                                               make_task("Four")])
+    cache.flush()
+    snapshot = tasks.snapshot()
+
+    # Local edits made after the snapshot, still waiting to be flushed
+    tasks.update({'status': "Completed"}, doc_ids=[two])
+    tasks.update({'status': "On Hold"}, doc_ids=[four])
+
+    # Someone else renamed one and two, and removed three and four
+    fresh = {doc_id: dict(doc) for doc_id, doc in snapshot.items() if doc_id in (one, two)}
+    fresh[one]['title'] = "One, edited elsewhere"
+    fresh[two]['title'] = "Two, edited elsewhere"
+    upserts, removes = diff_table(snapshot, fresh)
+
+    assert tasks.apply_external(snapshot, upserts, removes) == 2
+    assert tasks.get(one)['title'] == "One, edited elsewhere"
+    assert tasks.get(two)['title'] == "Two"
+    assert tasks.get(two)['status'] == "Completed"
+    assert tasks.get(three) is None
+    assert tasks.get(four)['status'] == "On Hold"
+    assert tasks.ids_where('status', 'Completed') == {two}
+    cache.close()
+
+def test_apply_external_moves_a_new_task_off_a_taken_id(tmp_path, scheduler):
+    cache = WriteBackCache(open_store(str(tmp_path / "tasks.json")), 1000, scheduler)
+    moved = []
+    cache.add_reassign_listener(lambda name, ids: moved.append((name, ids)))
+    tasks = cache.table('tasks')
+    snapshot = tasks.snapshot()
+    ours = tasks.insert(make_task("Ours"))
+
+    theirs = dict(make_task("Theirs"))
+    assert tasks.apply_external(snapshot, {ours: theirs}, []) == 1
+    assert moved == [('tasks', {ours: ours + 1})]
+    assert tasks.get(ours)['title'] == "Theirs"
+    assert tasks.get(ours + 1)['title'] == "Ours"
+    assert tasks.pending_count() == 1
+    cache.close()
+
+# --- Two apps sharing one database ---
+
+@pytest.mark.parametrize("file_name, journaled", [
+    ("tasks.json", False), ("tasks.json", True), ("tasks.db", False),
+])
+def test_concurrent_writers_keep_each_others_tasks(tmp_path, scheduler, file_name, journaled):
+    path = str(tmp_path / file_name)
+    first = TaskService(path, journaled, flush_latency_ms=1000, scheduler=scheduler)
+    second = TaskService(path, journaled)
+    moved = []
+    first.db.add_reassign_listener(lambda name, ids: moved.append((name, ids)))
+
+    provisional = first.add_task(make_task("From the first app"))
+    taken = second.add_task(make_task("From the second app"))  # Flushed at once, under the same id
+    assert taken == provisional
+
+    first.flush()
+    assert len(moved) == 1
+    name, ids = moved[0]
+    assert name == 'tasks' and provisional in ids
+    assert first.tasks.get(ids[provisional])['title'] == "From the first app"
+    assert first.list_tasks(search_text="first")[0].doc_id == ids[provisional]
+
+    first.close()
+    second.close()
+    reopened = TaskService(path, journaled)
+    assert titles(reopened.tasks.snapshot()) == {taken: "From the second app",
+                                                 ids[provisional]: "From the first app"}
+    reopened.close()
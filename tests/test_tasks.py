@@ -0,0 +1,16 @@
+from taskmaster_core import TaskService
+from taskmaster_core.tasks import DEFAULT_IMPACT, get_priority
+
+def test_urgency_change_keeps_the_default_impact_of_a_task_without_one(tmp_path):
+    service = TaskService(str(tmp_path / "tasks.json"))
+    # Written by an older version or by hand: no impact field
+    first, second = service.add_tasks([{'title': "No impact", 'status': "Pending", 'priority': "Planned"},
+                                       {'title': "No impact either", 'status': "Pending", 'priority': "Planned"}])
+
+    service.bulk_edit([first], is_urgent=True)
+    assert service.tasks.get(first)['impact'] == DEFAULT_IMPACT
+    assert service.tasks.get(first)['priority'] == get_priority(DEFAULT_IMPACT, True)
+
+    service.update_task(second, {'is_urgent': True})
+    assert service.tasks.get(second)['priority'] == get_priority(DEFAULT_IMPACT, True)
+    service.close()
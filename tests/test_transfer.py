@@ -0,0 +1,82 @@
+import datetime
+import json
+import threading
+
+import pytest
+
+from taskmaster_core.tasks import DEFAULT_IMPACT, make_task
+from taskmaster_core.transfer import normalize_import_row, plan_task_import
+
+TODAY = "2026-01-15"
+
+# --- Normalizing one row ---
+
+def test_normalize_fills_defaults():
+    record = normalize_import_row({'title': "  Water the plants  "}, TODAY)
+    assert record == {
+        'title': "Water the plants", 'impact': DEFAULT_IMPACT, 'category': "General", 'is_urgent': False,
+        'priority': make_task("x", DEFAULT_IMPACT)['priority'], 'deadline': TODAY, 'status': "Pending",
+        'notes': "", 'created_at': TODAY,
+    }
+
+def test_normalize_accepts_loose_spellings_and_recomputes_priority():
+    record = normalize_import_row({'title': "Ship it", 'impact': "medium", 'status': "in progress",
+                                   'is_urgent': "Yes", 'priority': "Trivial", 'deadline': "2026-02-01"}, TODAY)
+    assert (record['impact'], record['status'], record['is_urgent']) == ("Medium", "In Progress", True)
+    assert record['priority'] == "Important"
+    assert record['deadline'] == "2026-02-01"
+
+@pytest.mark.parametrize("raw, message", [
+    ({'title': "   "}, "missing title"),
+    ({'title': "Task", 'impact': "Huge"}, "unknown impact 'Huge'"),
+    ({'title': "Task", 'status': "Someday"}, "unknown status 'Someday'"),
+    ({'title': "Task", 'is_urgent': "maybe"}, "urgent must be yes or no"),
+    ({'title': "Task", 'deadline': "15/01/2026"}, "is not a YYYY-MM-DD date"),
+])
+def test_normalize_rejects_bad_rows(raw, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_import_row(raw, TODAY)
+
+# --- Planning a whole file ---
+
+def test_csv_plan_skips_duplicates_and_reports_bad_rows(tmp_path):
+    path = tmp_path / "tasks.csv"
+    path.write_text(
+        "\ufeffTitle,Category,Deadline,Impact,Urgent\n"
+        "Pay rent,Finance,2026-02-01,High,yes\n"
+        "Book flights,Travel,2026-03-01,Low,no\n"
+        "book flights,travel,2026-03-01,Medium,no\n"
+        ",Work,2026-02-01,High,no\n"
+        "Call mom,Family,2026-02-01,Enormous,no\n"
+        "Call mom,Family,2026-02-02,High,no\n",
+        encoding='utf-8')
+    existing = [make_task("Pay rent", category="Finance", deadline="2026-02-01")]
+
+    plan = plan_task_import(str(path), "csv", existing)
+    assert [(r['title'], r['deadline']) for r in plan["records"]] == [("Book flights", "2026-03-01"),
+                                                                       ("Call mom", "2026-02-02")]
+    assert plan["duplicates"] == 2
+    assert plan["errors"] == [(5, "missing title"), (6, "unknown impact 'Enormous'")]
+
+def test_jsonl_plan_reports_unparsable_lines(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text('{"title": "One"}\n\nnot json\n[1, 2]\n{"title": "Two", "is_urgent": true}\n', encoding='utf-8')
+    plan = plan_task_import(str(path), "jsonl", [])
+    assert [r['title'] for r in plan["records"]] == ["One", "Two"]
+    assert plan["errors"] == [(3, "not valid JSON"), (4, "not a JSON object")]
+
+def test_json_plan_reads_a_database_file(tmp_path):
+    path = tmp_path / "other.json"
+    path.write_text(json.dumps({'tasks': {"1": make_task("From another database", "Low", deadline="2026-04-01"),
+                                          "2": {'title': "Undated"}}}), encoding='utf-8')
+    plan = plan_task_import(str(path), "json", [])
+    assert [(r['title'], r['impact']) for r in plan["records"]] == [("From another database", "Low"),
+                                                                     ("Undated", DEFAULT_IMPACT)]
+    assert plan["records"][1]['deadline'] == datetime.date.today().isoformat()
+
+def test_cancelled_plan_returns_none(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text('{"title": "One"}\n', encoding='utf-8')
+    cancel_event = threading.Event()
+    cancel_event.set()
+    assert plan_task_import(str(path), "jsonl", [], cancel_event=cancel_event) is None